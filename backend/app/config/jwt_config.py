@@ -1,7 +1,11 @@
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from jose import JWTError, jwt
 from typing import Optional
+import hashlib
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +14,7 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "IGQ4JP6vw9ZGE1aVEY2sGYpHTNS2dpFt7BkiAsIA2-LKgAFVPdixs5o_dtbX_3EWcVv1bKHyTl0BjuzpvtY5aA") # Clave por defecto para desarrollo 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # 30 minutos por defecto
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))  # tokens verificados en memoria por worker
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -33,3 +38,63 @@ def verify_token(token: str) -> Optional[dict]:
         return payload if payload else None
     except JWTError:
         return None
+
+
+class Principal:
+    """
+    Usuario autenticado según las claims del token.
+    """
+    __slots__ = ("tipo_usuario", "cedula", "estado", "exp")
+
+    def __init__(self, tipo_usuario, cedula, estado=None, exp=None):
+        self.tipo_usuario = tipo_usuario
+        self.cedula = cedula
+        self.estado = estado
+        self.exp = exp
+
+
+class CacheTokens:
+    """
+    LRU acotada de tokens ya verificados, indexada por el SHA-256 del token (no guarda
+    el token). Un acierto evita jwt.decode; una entrada con `exp` vencido se descarta y
+    el token se vuelve a verificar, que lanza ExpiredSignatureError.
+    """
+
+    def __init__(self, maximo: int):
+        self._datos = OrderedDict()
+        self._maximo = maximo
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def principal(self, token: str) -> Principal:
+        """
+        Principal del token. Lanza JWTError si el token no es válido.
+        """
+        clave = hashlib.sha256(token.encode("utf-8")).digest()
+        with self._lock:
+            principal = self._datos.get(clave)
+            if principal is not None:
+                if principal.exp is None or principal.exp >= time.time():
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return principal
+                del self._datos[clave]
+
+        # Fuera del candado: la verificación no bloquea a las demás peticiones
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        principal = Principal(payload.get("tipo"), payload.get("cedula"), payload.get("estado"), payload.get("exp"))
+        with self._lock:
+            self.fallos += 1
+            self._datos[clave] = principal
+            if len(self._datos) > self._maximo:
+                self._datos.popitem(last=False)
+        return principal
+
+    def metricas(self):
+        with self._lock:
+            return {"tokens": len(self._datos), "maximo": self._maximo,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+cache_tokens = CacheTokens(TOKEN_CACHE_MAX)
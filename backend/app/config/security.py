@@ -1,22 +1,182 @@
 # backend/app/utils/security.py
+"""
+Hash y verificación de contraseñas con bcrypt.
+
+bcrypt consume ~50-250 ms de CPU por llamada. Para que una ráfaga de logins no
+ocupe los hilos de FastAPI ni la CPU del worker, el cálculo se hace en un pool de
+procesos acotado (BCRYPT_PROCESOS = hashes simultáneos). Las solicitudes que
+esperan turno se cuentan; si ya hay BCRYPT_MAX_EN_COLA en curso o esperando se
+lanza BcryptOcupado (los routers responden 503) en vez de encolar sin límite.
+
+API async (hash_password_async, verify_password_async, hash_passwords_async) para
+los endpoints: esperan el resultado del pool sin ocupar un hilo del threadpool.
+La API sync (hash_password, verify_password) bloquea el hilo que la
+llama hasta que termina bcrypt: solo para scripts de línea de comandos.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
 import bcrypt
+from concurrent.futures import ProcessPoolExecutor
+from config.config import BCRYPT_PROCESOS, BCRYPT_MAX_EN_COLA
+
+
+class BcryptOcupado(Exception):
+    """
+    La cola del pool de bcrypt está llena: reintentar más tarde.
+    """
+
+
+def _truncar(password: str) -> bytes:
+    # bcrypt solo usa los primeros 72 caracteres: truncar ANTES de hashear y al verificar
+    password_truncated = password[:72] if len(password) > 72 else password
+    return password_truncated.encode("utf-8")
+
+
+# Funciones que ejecutan los procesos del pool (deben ser de nivel de módulo)
+def _hashear(password: str) -> str:
+    return bcrypt.hashpw(_truncar(password), bcrypt.gensalt()).decode("utf-8")
+
+
+def _verificar(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(_truncar(plain_password), hashed_password.encode("utf-8"))
+
+
+def _calentar():
+    return True
+
+
+# ============================================================
+# POOL DE PROCESOS
+# ============================================================
+_pool = None
+_pool_lock = threading.Lock()
+_metricas_lock = threading.Lock()
+_metricas = {
+    "en_cola": 0,         # enviadas al pool y sin terminar (incluye las que se están calculando)
+    "max_en_cola": 0,
+    "completadas": 0,
+    "rechazadas": 0,
+    "espera_total": 0.0,  # desde que se envía hasta que termina, en segundos
+    "espera_max": 0.0,
+}
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: el worker de uvicorn tiene hilos y fork podría copiar locks tomados
+                _pool = ProcessPoolExecutor(
+                    max_workers=BCRYPT_PROCESOS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def iniciar_pool_bcrypt():
+    """
+    Arranca los procesos del pool (al iniciar la app) para que el primer login no pague el arranque.
+    """
+    pool = _obtener_pool()
+    for futuro in [pool.submit(_calentar) for _ in range(BCRYPT_PROCESOS)]:
+        futuro.result()
 
+
+def cerrar_pool_bcrypt():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _terminar(inicio: float):
+    def callback(_futuro):
+        espera = time.monotonic() - inicio
+        with _metricas_lock:
+            _metricas["en_cola"] -= 1
+            _metricas["completadas"] += 1
+            _metricas["espera_total"] += espera
+            _metricas["espera_max"] = max(_metricas["espera_max"], espera)
+    return callback
+
+
+def _enviar(funcion, *args, limite: int = BCRYPT_MAX_EN_COLA):
+    """
+    Envía el cálculo al pool si hay cupo en la cola; si no, lanza BcryptOcupado.
+    """
+    with _metricas_lock:
+        if _metricas["en_cola"] >= limite:
+            _metricas["rechazadas"] += 1
+            raise BcryptOcupado("Demasiadas solicitudes de autenticación en curso")
+        _metricas["en_cola"] += 1
+        _metricas["max_en_cola"] = max(_metricas["max_en_cola"], _metricas["en_cola"])
+    try:
+        futuro = _obtener_pool().submit(funcion, *args)
+    except Exception:
+        with _metricas_lock:
+            _metricas["en_cola"] -= 1
+        raise
+    futuro.add_done_callback(_terminar(time.monotonic()))
+    return futuro
+
+
+def obtener_metricas_bcrypt():
+    with _metricas_lock:
+        completadas = _metricas["completadas"]
+        return {
+            "procesos": BCRYPT_PROCESOS,
+            "limite_cola": BCRYPT_MAX_EN_COLA,
+            "en_cola": _metricas["en_cola"],
+            "max_en_cola": _metricas["max_en_cola"],
+            "completadas": completadas,
+            "rechazadas": _metricas["rechazadas"],
+            "espera_media_ms": round(_metricas["espera_total"] / completadas * 1000, 2) if completadas else 0.0,
+            "espera_max_ms": round(_metricas["espera_max"] * 1000, 2),
+        }
+
+
+# ============================================================
+# API
+# ============================================================
 def hash_password(password: str) -> str:
     """
     Hashea una contraseña usando bcrypt.
     IMPORTANTE: Trunca a 72 caracteres antes de hashear.
     """
-    # Truncar ANTES de pasar a passlib
-    password_truncated = password[:72] if len(password) > 72 else password
-    return bcrypt.hashpw(password_truncated.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return _enviar(_hashear, password).result()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica si una contraseña coincide con el hash.
     """
-    # Truncar también en la verificación
-    plain_password_truncated = plain_password[:72] if len(plain_password) > 72 else plain_password
-    return bcrypt.checkpw(
-        plain_password_truncated.encode("utf-8"),
-        hashed_password.encode("utf-8"),
-    )
+    return _enviar(_verificar, plain_password, hashed_password).result()
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_enviar(_hashear, password))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(_enviar(_verificar, plain_password, hashed_password))
+
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    Hashea varias contraseñas (importación masiva) en el mismo pool.
+    Mantiene a lo sumo BCRYPT_PROCESOS en la cola a la vez, así los logins que
+    llegan mientras tanto se intercalan en vez de esperar a todo el lote, y no
+    cuenta contra el límite de la cola (no se rechaza a medias).
+    Retorna los hashes en el mismo orden de entrada.
+    """
+    cupos = asyncio.Semaphore(BCRYPT_PROCESOS)
+
+    async def hashear(password):
+        async with cupos:
+            return await asyncio.wrap_future(_enviar(_hashear, password, limite=float("inf")))
+
+    return list(await asyncio.gather(*(hashear(p) for p in passwords)))
@@ -0,0 +1,64 @@
+# backend/app/data/copia.py
+"""
+Carga masiva con COPY ... FROM STDIN (formato text de PostgreSQL) sobre psycopg2.
+
+Las filas se envían a medida que se generan, agrupadas en bloques: no se arma
+el archivo completo en memoria.
+"""
+
+FILAS_POR_BLOQUE = 5000
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def campo(valor) -> str:
+    """
+    Formatea un valor para el formato text de COPY (None -> \\N, escapa tabs y saltos de línea).
+    """
+    if valor is None:
+        return "\\N"
+    return str(valor).translate(_ESCAPES)
+
+
+def fila(*valores) -> str:
+    return "\t".join(campo(v) for v in valores) + "\n"
+
+
+class FlujoCopy:
+    """
+    Objeto tipo archivo para copy_expert que lee de un generador de bloques de texto.
+    """
+
+    def __init__(self, bloques):
+        self._bloques = iter(bloques)
+        self._buffer = ""
+
+    def read(self, tamano=-1):
+        while tamano < 0 or len(self._buffer) < tamano:
+            bloque = next(self._bloques, None)
+            if bloque is None:
+                break
+            self._buffer += bloque
+        if tamano < 0:
+            salida, self._buffer = self._buffer, ""
+        else:
+            salida, self._buffer = self._buffer[:tamano], self._buffer[tamano:]
+        return salida
+
+
+def copiar(cursor, tabla_columnas: str, filas):
+    """
+    COPY tabla (columnas) FROM STDIN con filas ya formateadas (ver `fila`).
+    `cursor` es un cursor psycopg2; la transacción la maneja quien llama.
+    """
+    def bloques():
+        bloque = []
+        for f in filas:
+            bloque.append(f)
+            if len(bloque) >= FILAS_POR_BLOQUE:
+                yield "".join(bloque)
+                bloque = []
+        if bloque:
+            yield "".join(bloque)
+
+    cursor.copy_expert(f"COPY {tabla_columnas} FROM STDIN", FlujoCopy(bloques()), size=1 << 20)
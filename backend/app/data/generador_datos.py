@@ -0,0 +1,334 @@
+# backend/app/data/generador_datos.py
+"""
+Generador de datos sintéticos para pruebas de rendimiento.
+
+Crea N fisioterapeutas, M pacientes (cada uno vinculado a un fisioterapeuta en Trata)
+y K filas de Terapia_Asignada con distribuciones realistas:
+  * ejercicios por paciente con cola larga (pocos pacientes con historiales enormes)
+  * grupos de 3 a 8 ejercicios, uno cada 1-3 semanas
+  * grupos anteriores casi siempre completados, el último grupo a medias
+  * fecha de realización 0-6 días después de la asignación, calificaciones
+    Dolor/Sensacion/Cansancio en el 85% de los completados
+También carga Progreso_Grupo y los contadores del paciente (migraciones 002 y 003)
+a partir de lo generado, sin recalcular sobre la tabla.
+
+Todo se carga con COPY: cada proceso genera un rango de pacientes y envía sus filas
+por su propia conexión mientras las genera (no se guardan en memoria ni en disco).
+Con --rapido se quitan los índices secundarios de Terapia_Asignada durante la carga
+y se desactivan los triggers de llaves foráneas (requiere superusuario).
+
+Requiere las migraciones aplicadas y la tabla Ejercicio con datos.
+Todos los usuarios generados tienen la contraseña CONTRASENA_GENERADA.
+
+Uso (desde backend/app):
+    python -m data.generador_datos --fisios 1000 --pacientes 200000 --terapias 10000000
+    python -m data.generador_datos --fisios 20000 --pacientes 4000000 --terapias 100000000 --rapido
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+from multiprocessing import Pool
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from config.config import DATABASE_URL
+from config.security import hash_password
+from data.copia import copiar
+
+CONTRASENA_GENERADA = "Generado123"
+
+NOMBRES = ["Ana", "Luis", "María", "Carlos", "Laura", "Andrés", "Sofía", "Jorge", "Valentina",
+           "Diego", "Camila", "Felipe", "Daniela", "Juan", "Paula", "Santiago", "Natalia", "Mateo"]
+APELLIDOS = ["Gómez", "Rodríguez", "López", "Martínez", "García", "Hernández", "Díaz", "Moreno",
+             "Álvarez", "Ramírez", "Torres", "Vargas", "Castro", "Ortiz", "Rojas", "Mejía"]
+OBSERVACIONES = ["Sin molestias", "Leve molestia al final", "Se sintió bien",
+                 "Costó completar las repeticiones", "Dolor al inicio, luego mejoró"]
+
+def _motor():
+    return create_engine(DATABASE_URL, poolclass=NullPool)
+
+
+def _nombre(rnd) -> str:
+    return f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+
+
+def cedula_fisio(prefijo: str, n: int) -> str:
+    return f"{prefijo}1{n:09d}"
+
+
+def cedula_paciente(prefijo: str, n: int) -> str:
+    return f"{prefijo}2{n:09d}"
+
+
+def repartir(total: int, partes: int):
+    """
+    Divide `total` en `partes` enteros que suman exactamente `total`.
+    """
+    base, resto = divmod(total, partes)
+    return [base + (1 if i < resto else 0) for i in range(partes)]
+
+
+# ============================================================
+# PLAN POR PACIENTE
+# ============================================================
+def planear_pacientes(rnd, pacientes: int, terapias: int, dias: int):
+    """
+    Para cada paciente del rango: lista de grupos (tamaño, día de asignación, completados).
+    Los días son desplazamientos desde la fecha de inicio del periodo generado.
+    """
+    # Al menos un ejercicio por paciente; el resto con cola larga (Pareto acotada),
+    # escalado para sumar exactamente `terapias`
+    pesos = [min(rnd.paretovariate(1.6), 40.0) for _ in range(pacientes)]
+    escala = (terapias - pacientes) / sum(pesos)
+    cantidades = [1 + int(p * escala) for p in pesos]
+    for i in rnd.choices(range(pacientes), k=terapias - sum(cantidades)):
+        cantidades[i] += 1
+
+    planes = []
+    for cantidad in cantidades:
+        tamanos = []
+        while cantidad > 0:
+            tamano = min(rnd.randint(3, 8), cantidad)
+            tamanos.append(tamano)
+            cantidad -= tamano
+
+        # Los grupos se asignan cada 7-21 días; el último queda cerca del final del periodo
+        separaciones = [rnd.randint(7, 21) for _ in tamanos]
+        duracion = sum(separaciones[:-1])
+        dia = max(0, dias - duracion - rnd.randint(0, 30))
+        grupos = []
+        for indice, tamano in enumerate(tamanos):
+            if indice == len(tamanos) - 1:
+                completados = rnd.randint(0, tamano)
+            elif rnd.random() < 0.9:
+                completados = tamano
+            else:
+                completados = rnd.randint(0, tamano)
+            grupos.append((tamano, min(dia, dias), completados))
+            dia += separaciones[indice]
+        planes.append(grupos)
+    return planes
+
+
+# ============================================================
+# CARGA POR PROCESO
+# ============================================================
+def cargar_rango(tarea: dict):
+    """
+    Genera y carga con COPY los pacientes [desde, hasta) y todas sus terapias.
+    Se ejecuta en un proceso aparte con su propia conexión y transacción.
+    """
+    rnd = random.Random(tarea["semilla"])
+    prefijo = tarea["prefijo"]
+    inicio_periodo = date.fromisoformat(tarea["inicio_periodo"])
+    dias = tarea["dias"]
+    ejercicios = tarea["ejercicios"]
+    fisios = tarea["fisios"]
+    desde, hasta = tarea["desde"], tarea["hasta"]
+
+    # Fechas como texto, precalculadas una sola vez
+    fechas = [(inicio_periodo + timedelta(days=d)).isoformat() for d in range(dias + 8)]
+    planes = planear_pacientes(rnd, hasta - desde, tarea["terapias"], dias)
+
+    def filas_paciente():
+        for i, grupos in enumerate(planes):
+            n = desde + i
+            total = sum(g[0] for g in grupos)
+            completados = sum(g[2] for g in grupos)
+            pendientes = total - completados
+            progreso = f"{completados * 100 / total:.2f}" if total else "0"
+            estado = "activo" if pendientes else "inactivo"
+            yield (f"{cedula_paciente(prefijo, n)}\t{_nombre(rnd)}\t{prefijo}p{n}@sintetico.invalid\t"
+                   f"{tarea['hash']}\t{estado}\t3{n % 1000000000:09d}\t{progreso}\t{pendientes}\t{completados}\n")
+
+    def filas_trata():
+        for i in range(len(planes)):
+            # Algunos fisioterapeutas tienen carteras mucho más grandes que otros
+            fisio = int(fisios * rnd.random() ** 1.5)
+            yield f"{cedula_fisio(prefijo, fisio)}\t{cedula_paciente(prefijo, desde + i)}\n"
+
+    # Última realización de cada grupo (día), en el orden en que se generan las terapias
+    fines = []
+
+    def filas_terapia():
+        id_terapia = tarea["primer_id"]
+        for i, grupos in enumerate(planes):
+            cedula = cedula_paciente(prefijo, desde + i)
+            for numero, (tamano, dia, completados) in enumerate(grupos, start=1):
+                asignacion = fechas[dia]
+                fin = -1
+                for k in range(tamano):
+                    ejercicio = rnd.choice(ejercicios)
+                    if k < completados:
+                        dia_realizacion = min(dia + rnd.randint(0, 6), dias)
+                        fin = max(fin, dia_realizacion)
+                        if rnd.random() < 0.85:
+                            observacion = rnd.choice(OBSERVACIONES) if rnd.random() < 0.3 else "\\N"
+                            calificacion = (f"{observacion}\t{rnd.randint(1, 5)}\t"
+                                            f"{rnd.randint(1, 5)}\t{rnd.randint(1, 5)}")
+                        else:
+                            calificacion = "\\N\t\\N\t\\N\t\\N"
+                        yield (f"{id_terapia}\t{numero}\t{cedula}\t{ejercicio}\tCompletado\t"
+                               f"{asignacion}\t{fechas[dia_realizacion]}\t{calificacion}\n")
+                    else:
+                        yield (f"{id_terapia}\t{numero}\t{cedula}\t{ejercicio}\tPendiente\t"
+                               f"{asignacion}\t\\N\t\\N\t\\N\t\\N\t\\N\n")
+                    id_terapia += 1
+                fines.append(fin)
+
+    def filas_progreso():
+        fin_grupo = iter(fines)
+        for i, grupos in enumerate(planes):
+            cedula = cedula_paciente(prefijo, desde + i)
+            for numero, (tamano, dia, completados) in enumerate(grupos, start=1):
+                fin = next(fin_grupo)
+                yield (f"{cedula}\t{numero}\t{tamano}\t{completados}\t{fechas[dia]}\t"
+                       f"{fechas[fin] if fin >= 0 else chr(92) + 'N'}\n")
+
+    conexion = _motor().raw_connection()
+    try:
+        cursor = conexion.cursor()
+        cursor.execute("SET statement_timeout = 0")
+        if tarea["rapido"]:
+            cursor.execute("SET session_replication_role = replica")
+        copiar(cursor, "Paciente (Cedula, Nombre, Correo, Contrasena, Estado, Telefono, "
+                        "Progreso, Ejercicios_pendientes, Ejercicios_completados)", filas_paciente())
+        copiar(cursor, "Trata (Cedula_fisioterapeuta, Cedula_paciente)", filas_trata())
+        copiar(cursor, "Terapia_Asignada (Id_terapia, Grupo_terapia, Cedula_paciente, Id_ejercicio, Estado, "
+                        "Fecha_asignacion, Fecha_realizacion, Observaciones, Dolor, Sensacion, Cansancio)",
+                filas_terapia())
+        copiar(cursor, "Progreso_Grupo (Cedula_paciente, Grupo_terapia, Total, Completados, "
+                        "Fecha_inicio, Fecha_fin)", filas_progreso())
+        conexion.commit()
+    finally:
+        conexion.close()
+    return hasta - desde, tarea["terapias"]
+
+
+# ============================================================
+# ORQUESTACIÓN
+# ============================================================
+def _indices_secundarios(conn):
+    return conn.execute(text("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE tablename = 'terapia_asignada' AND indexname NOT LIKE '%pkey'
+    """)).fetchall()
+
+
+def generar(fisios: int, pacientes: int, terapias: int, procesos: int, dias: int,
+            prefijo: str, semilla: int, rapido: bool):
+    motor = _motor()
+    hoy = date.today()
+    inicio_periodo = hoy - timedelta(days=dias)
+    t0 = time.perf_counter()
+
+    with motor.begin() as conn:
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        ejercicios = [fila[0] for fila in conn.execute(text("SELECT Id_ejercicio FROM Ejercicio"))]
+        if not ejercicios:
+            raise SystemExit("La tabla Ejercicio está vacía: cargar primero insercionesEjercicios.txt")
+
+        # Particiones mensuales para todo el periodo (migración 004)
+        if conn.execute(text("SELECT to_regproc('crear_particion_terapia')")).scalar():
+            conn.execute(text("""
+                SELECT crear_particion_terapia(mes::date)
+                FROM generate_series(date_trunc('month', CAST(:inicio AS date)), CAST(:fin AS date), INTERVAL '1 month') mes
+            """), {"inicio": inicio_periodo, "fin": hoy})
+
+        # Bloque de Id_terapia reservado en la secuencia
+        ultimo_id = conn.execute(text("""
+            SELECT setval(pg_get_serial_sequence('terapia_asignada', 'id_terapia'),
+                          nextval(pg_get_serial_sequence('terapia_asignada', 'id_terapia')) + :terapias - 1)
+        """), {"terapias": terapias}).scalar()
+        primer_id = ultimo_id - terapias + 1
+
+        contrasena = hash_password(CONTRASENA_GENERADA)
+        raw = conn.connection
+        cursor = raw.cursor()
+        copiar(cursor, "Fisioterapeuta (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)", (
+            f"{cedula_fisio(prefijo, n)}\tFisio {n}\t{prefijo}f{n}@sintetico.invalid\t{contrasena}\tActivo\t4{n:09d}\n"
+            for n in range(fisios)
+        ))
+
+        indices = _indices_secundarios(conn) if rapido else []
+        for nombre, _ in indices:
+            conn.execute(text(f'DROP INDEX "{nombre}"'))
+    print(f"Fisioterapeutas: {fisios:,} ({time.perf_counter() - t0:.1f}s)")
+
+    # Rangos de pacientes y de terapias por proceso
+    procesos = max(1, min(procesos, pacientes))
+    rangos_pacientes = repartir(pacientes, procesos)
+    rangos_terapias = repartir(terapias, procesos)
+    tareas = []
+    desde = 0
+    siguiente_id = primer_id
+    for i in range(procesos):
+        tareas.append({
+            "semilla": semilla * 1000 + i,
+            "prefijo": prefijo,
+            "inicio_periodo": inicio_periodo.isoformat(),
+            "dias": dias,
+            "ejercicios": ejercicios,
+            "fisios": fisios,
+            "desde": desde,
+            "hasta": desde + rangos_pacientes[i],
+            "terapias": rangos_terapias[i],
+            "primer_id": siguiente_id,
+            "hash": contrasena,
+            "rapido": rapido,
+        })
+        desde += rangos_pacientes[i]
+        siguiente_id += rangos_terapias[i]
+
+    t1 = time.perf_counter()
+    with Pool(procesos) as pool:
+        for cargados_pacientes, cargadas_terapias in pool.imap_unordered(cargar_rango, tareas):
+            print(f"  + {cargados_pacientes:,} pacientes, {cargadas_terapias:,} terapias")
+    duracion = time.perf_counter() - t1
+    print(f"Pacientes y terapias cargados en {duracion:.1f}s ({terapias / max(duracion, 1e-9):,.0f} terapias/s)")
+
+    with motor.begin() as conn:
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        if rapido:
+            # Con session_replication_role = replica no se dispararon los triggers que llenan
+            # Terapia_Ubicacion (migración 008)
+            conn.execute(text("""
+                INSERT INTO Terapia_Ubicacion (Id_terapia, Fecha_asignacion)
+                SELECT Id_terapia, Fecha_asignacion FROM Terapia_Asignada
+                WHERE Id_terapia BETWEEN :primero AND :ultimo
+            """), {"primero": primer_id, "ultimo": ultimo_id})
+        if indices:
+            t2 = time.perf_counter()
+            conn.execute(text("SET LOCAL maintenance_work_mem = '1GB'"))
+            for nombre, definicion in indices:
+                # pg_indexes muestra el índice de la tabla particionada como "ON ONLY": sin ONLY
+                # se vuelve a crear en todas las particiones
+                conn.execute(text(definicion.replace(" ON ONLY ", " ON ", 1)))
+            print(f"Índices recreados en {time.perf_counter() - t2:.1f}s")
+    with motor.connect() as conn:
+        conn.execute(text("SET statement_timeout = 0"))
+        for tabla in ("Fisioterapeuta", "Paciente", "Trata", "Progreso_Grupo", "Terapia_Asignada", "Terapia_Ubicacion"):
+            conn.execute(text(f"ANALYZE {tabla}"))
+        conn.commit()
+    print(f"Listo en {time.perf_counter() - t0:.1f}s. Contraseña de los usuarios generados: {CONTRASENA_GENERADA}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fisios", type=int, default=100)
+    parser.add_argument("--pacientes", type=int, default=10000)
+    parser.add_argument("--terapias", type=int, default=500000)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--dias", type=int, default=730, help="días hacia atrás que cubre el historial")
+    parser.add_argument("--prefijo", default="9", help="prefijo de las cédulas generadas (evita choques)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--rapido", action="store_true",
+                        help="quita índices secundarios y triggers de FK durante la carga (superusuario)")
+    args = parser.parse_args()
+
+    if args.terapias < args.pacientes:
+        parser.error("--terapias debe ser mayor o igual a --pacientes (al menos un ejercicio por paciente)")
+    generar(args.fisios, args.pacientes, args.terapias, args.procesos, args.dias,
+            args.prefijo, args.semilla, args.rapido)
@@ -0,0 +1,70 @@
+# backend/app/data/migraciones.py
+"""
+Aplica en orden las migraciones versionadas de backend/scriptsSql/migraciones.
+
+Cada archivo se llama NNN_descripcion.txt; NNN es la versión. Las versiones aplicadas
+se registran en la tabla Schema_Migraciones, así que ejecutar el comando de nuevo
+solo aplica las pendientes.
+
+Uso (desde backend/app):
+    python -m data.migraciones
+"""
+from pathlib import Path
+from sqlalchemy import text
+
+DIRECTORIO_MIGRACIONES = Path(__file__).resolve().parents[2] / "scriptsSql" / "migraciones"
+
+
+def listar_migraciones():
+    """
+    Devuelve [(version, nombre, ruta)] ordenado por versión.
+    """
+    migraciones = []
+    for ruta in DIRECTORIO_MIGRACIONES.glob("*.txt"):
+        version, _, nombre = ruta.stem.partition("_")
+        if version.isdigit():
+            migraciones.append((int(version), nombre, ruta))
+    return sorted(migraciones)
+
+
+def aplicar_migraciones(engine):
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción.
+    Retorna la lista de versiones aplicadas.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS Schema_Migraciones (
+                Version INT PRIMARY KEY,
+                Nombre VARCHAR(200) NOT NULL,
+                Fecha_aplicacion TIMESTAMP NOT NULL DEFAULT now()
+            )
+        """))
+        aplicadas = {fila[0] for fila in conn.execute(text("SELECT Version FROM Schema_Migraciones"))}
+
+    nuevas = []
+    for version, nombre, ruta in listar_migraciones():
+        if version in aplicadas:
+            continue
+        print(f"Aplicando migración {version:03d} - {nombre}")
+        sql = ruta.read_text(encoding="utf-8")
+        with engine.begin() as conn:
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            # no_parameters: el script se envía tal cual (puede contener '%')
+            conn.execution_options(no_parameters=True).exec_driver_sql(sql)
+            conn.execute(
+                text("INSERT INTO Schema_Migraciones (Version, Nombre) VALUES (:version, :nombre)"),
+                {"version": version, "nombre": nombre}
+            )
+        nuevas.append(version)
+    return nuevas
+
+
+if __name__ == "__main__":
+    from data.db import engine
+
+    aplicadas = aplicar_migraciones(engine)
+    if aplicadas:
+        print(f"Migraciones aplicadas: {', '.join(f'{v:03d}' for v in aplicadas)}")
+    else:
+        print("La base de datos ya está actualizada")
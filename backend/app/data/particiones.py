@@ -0,0 +1,112 @@
+# backend/app/data/particiones.py
+"""
+Mantenimiento de las particiones mensuales de Terapia_Asignada (migración 004).
+
+Cada partición se llama terapia_asignada_AAAA_MM y cubre un mes de Fecha_asignacion.
+Una partición desprendida queda como tabla normal (para archivarla con pg_dump o
+borrarla) y se puede volver a adjuntar. Los resúmenes (Progreso_Grupo y los
+contadores del paciente) no cambian al desprender: siguen contando esas terapias.
+
+Uso (desde backend/app):
+    python -m data.particiones listar
+    python -m data.particiones crear --meses 3
+    python -m data.particiones desprender 2024-01
+    python -m data.particiones adjuntar 2024-01
+"""
+import argparse
+from datetime import date, datetime
+from sqlalchemy import text
+
+TABLA = "terapia_asignada"
+
+
+def nombre_particion(mes: date) -> str:
+    return f"{TABLA}_{mes:%Y_%m}"
+
+
+def _rango_mes(mes: date):
+    inicio = mes.replace(day=1)
+    fin = date(inicio.year + (inicio.month == 12), inicio.month % 12 + 1, 1)
+    return inicio, fin
+
+
+def listar_particiones(engine):
+    """
+    Retorna [(nombre, límites, filas estimadas)] de las particiones adjuntas.
+    """
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+            FROM pg_inherits i
+            INNER JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:tabla AS regclass)
+            ORDER BY c.relname
+        """), {"tabla": TABLA}).fetchall()
+
+
+def asegurar_particiones_futuras(engine, meses: int) -> int:
+    """
+    Crea las particiones del mes actual y de los próximos `meses` meses que falten.
+    Retorna cuántas se crearon. Seguro de llamar desde varios workers a la vez.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('crear_particiones_terapia'))"))
+        return conn.execute(text("SELECT crear_particiones_terapia(:meses)"), {"meses": meses}).scalar()
+
+
+def desprender_particion(engine, mes: date):
+    """
+    Saca la partición del mes de Terapia_Asignada; la tabla y sus datos se conservan.
+    """
+    nombre = nombre_particion(mes)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'ALTER TABLE {TABLA} DETACH PARTITION "{nombre}"')
+    return nombre
+
+
+def adjuntar_particion(engine, mes: date):
+    """
+    Vuelve a adjuntar una partición desprendida. Primero se valida un CHECK con el rango
+    del mes (bloquea solo la partición) para que ATTACH no tenga que recorrerla con
+    Terapia_Asignada bloqueada.
+    """
+    nombre = nombre_particion(mes)
+    inicio, fin = _rango_mes(mes)
+    restriccion = f"{nombre}_rango"
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f'ALTER TABLE "{nombre}" ADD CONSTRAINT "{restriccion}" '
+            f"CHECK (fecha_asignacion >= '{inicio}' AND fecha_asignacion < '{fin}')"
+        )
+        conn.exec_driver_sql(
+            f"ALTER TABLE {TABLA} ATTACH PARTITION \"{nombre}\" FOR VALUES FROM ('{inicio}') TO ('{fin}')"
+        )
+        conn.exec_driver_sql(f'ALTER TABLE "{nombre}" DROP CONSTRAINT "{restriccion}"')
+    return nombre
+
+
+def _mes(valor: str) -> date:
+    return datetime.strptime(valor, "%Y-%m").date()
+
+
+if __name__ == "__main__":
+    from data.db import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("listar")
+    crear = comandos.add_parser("crear")
+    crear.add_argument("--meses", type=int, default=3)
+    for comando in ("desprender", "adjuntar"):
+        comandos.add_parser(comando).add_argument("mes", type=_mes, help="AAAA-MM")
+    args = parser.parse_args()
+
+    if args.comando == "listar":
+        for nombre, limites, filas in listar_particiones(engine):
+            print(f"{nombre:<32} {limites:<60} ~{max(filas, 0):,} filas")
+    elif args.comando == "crear":
+        print(f"Particiones creadas: {asegurar_particiones_futuras(engine, args.meses)}")
+    elif args.comando == "desprender":
+        print(f"Partición desprendida: {desprender_particion(engine, args.mes)}")
+    elif args.comando == "adjuntar":
+        print(f"Partición adjuntada: {adjuntar_particion(engine, args.mes)}")
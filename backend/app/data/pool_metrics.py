@@ -0,0 +1,86 @@
+# backend/app/data/pool_metrics.py
+"""
+Pool de conexiones instrumentado: mide cuánto esperan las sesiones por una conexión
+y cuántas conexiones están en uso, para dimensionar workers contra max_connections.
+"""
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class MetricasPool:
+    """
+    Contadores del pool. Se actualizan desde varios hilos, por eso usan un lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.esperando = 0          # sesiones esperando conexión en este momento
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.en_uso_max = 0
+
+    def inicio_espera(self):
+        with self._lock:
+            self.esperando += 1
+
+    def fin_espera(self, segundos: float, en_uso: int):
+        with self._lock:
+            self.esperando -= 1
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+            self.en_uso_max = max(self.en_uso_max, en_uso)
+
+    def fallo_espera(self, timeout: bool):
+        with self._lock:
+            self.esperando -= 1
+            if timeout:
+                self.timeouts += 1
+
+    def resumen(self, pool) -> dict:
+        with self._lock:
+            promedio = self.espera_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "tamano_pool": pool.size(),
+                "en_uso": pool.checkedout(),
+                "en_uso_max": self.en_uso_max,
+                "disponibles": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "esperando": self.esperando,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(promedio * 1000, 3),
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+            }
+
+
+class PoolInstrumentado(QueuePool):
+    """
+    QueuePool que registra el tiempo de espera de cada checkout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def _do_get(self):
+        self.metricas.inicio_espera()
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except Exception as e:
+            self.metricas.fallo_espera(timeout=isinstance(e, exc.TimeoutError))
+            raise
+        self.metricas.fin_espera(time.perf_counter() - inicio, self.checkedout())
+        return conexion
+
+
+class PoolAsyncInstrumentado(PoolInstrumentado, AsyncAdaptedQueuePool):
+    """
+    Variante para el motor async (asyncpg).
+    """
@@ -0,0 +1,760 @@
+# backend/app/data/sentencias.py
+"""
+Registro central de las sentencias SQL frecuentes.
+
+Cada sentencia se define una sola vez a nivel de módulo con `registrar(nombre, sql)`
+y se ejecuta con `ejecutar(db, SENTENCIA, parametros)` (Session) o
+`await ejecutar_async(db, SENTENCIA, parametros)` (AsyncSession).
+
+- Motor sync (psycopg2): la primera vez que una conexión usa una sentencia se envía
+  PREPARE; las siguientes llamadas solo envían EXECUTE, así PostgreSQL no vuelve a
+  analizar ni planificar la consulta. Las sentencias preparadas viven mientras viva
+  la conexión del pool.
+- Motor async (asyncpg): el driver ya prepara y cachea las sentencias por conexión,
+  solo se reutiliza el mismo objeto text().
+
+Cada ejecución acumula llamadas, errores y latencia por sentencia (/metricas/sentencias).
+Con DB_PREPARED_STATEMENTS=false (p. ej. detrás de pgbouncer en modo transacción)
+se ejecuta el text() normal, sin PREPARE.
+"""
+import re
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import DB_PREPARED_STATEMENTS
+
+# :nombre -> parámetro (no confunde los casts ::tipo)
+_PATRON_PARAMETRO = re.compile(r"(?<![:\w]):(\w+)")
+
+
+class EstadisticasSentencia:
+    """
+    Contadores de una sentencia en este worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.llamadas = 0
+        self.errores = 0
+        self.tiempo_total = 0.0
+        self.tiempo_max = 0.0
+
+    def registrar(self, segundos: float, error: bool = False):
+        with self._lock:
+            self.llamadas += 1
+            if error:
+                self.errores += 1
+            self.tiempo_total += segundos
+            if segundos > self.tiempo_max:
+                self.tiempo_max = segundos
+
+    def resumen(self):
+        with self._lock:
+            return {
+                "llamadas": self.llamadas,
+                "errores": self.errores,
+                "tiempo_total_ms": round(self.tiempo_total * 1000, 2),
+                "tiempo_promedio_ms": round(self.tiempo_total / self.llamadas * 1000, 3) if self.llamadas else 0,
+                "tiempo_max_ms": round(self.tiempo_max * 1000, 2),
+            }
+
+
+class Sentencia:
+    """
+    Sentencia SQL registrada: el text() de SQLAlchemy más su versión PREPARE/EXECUTE.
+    """
+
+    def __init__(self, nombre: str, sql: str):
+        self.nombre = nombre
+        self.sql = sql
+        self.text = text(sql)
+        self.nombre_preparado = "s_" + re.sub(r"\W", "_", nombre)
+
+        # Parámetros en orden de aparición -> $1, $2, ...
+        self.parametros = []
+        for p in _PATRON_PARAMETRO.findall(sql):
+            if p not in self.parametros:
+                self.parametros.append(p)
+        sql_preparada = _PATRON_PARAMETRO.sub(lambda m: f"${self.parametros.index(m.group(1)) + 1}", sql)
+        self.sql_prepare = f"PREPARE {self.nombre_preparado} AS {sql_preparada}"
+        if self.parametros:
+            argumentos = ", ".join(f"%({p})s" for p in self.parametros)
+            self.sql_execute = f"EXECUTE {self.nombre_preparado} ({argumentos})"
+        else:
+            self.sql_execute = f"EXECUTE {self.nombre_preparado}"
+
+        self.estadisticas = EstadisticasSentencia()
+
+    def __repr__(self):
+        return f"<Sentencia {self.nombre}>"
+
+
+REGISTRO = {}
+
+
+def registrar(nombre: str, sql: str) -> Sentencia:
+    if nombre in REGISTRO:
+        raise ValueError(f"La sentencia '{nombre}' ya está registrada")
+    sentencia = Sentencia(nombre, sql)
+    REGISTRO[nombre] = sentencia
+    return sentencia
+
+
+def _ejecutar_preparada(db: Session, sentencia: Sentencia, parametros: dict):
+    conn = db.connection()
+    # conn.info pertenece a la conexión DBAPI del pool: sobrevive entre checkouts
+    preparadas = conn.info.setdefault("sentencias_preparadas", set())
+    if sentencia.nombre_preparado not in preparadas:
+        conn.exec_driver_sql(sentencia.sql_prepare, execution_options={"no_parameters": True})
+        preparadas.add(sentencia.nombre_preparado)
+    return conn.exec_driver_sql(sentencia.sql_execute, {p: parametros[p] for p in sentencia.parametros})
+
+
+def ejecutar(db: Session, sentencia: Sentencia, parametros: dict = None):
+    """
+    Ejecuta la sentencia en una sesión sync y retorna el resultado (fetchone/fetchall/rowcount).
+    """
+    parametros = parametros or {}
+    inicio = time.perf_counter()
+    try:
+        if DB_PREPARED_STATEMENTS:
+            resultado = _ejecutar_preparada(db, sentencia, parametros)
+        else:
+            resultado = db.execute(sentencia.text, parametros)
+    except Exception:
+        sentencia.estadisticas.registrar(time.perf_counter() - inicio, error=True)
+        raise
+    sentencia.estadisticas.registrar(time.perf_counter() - inicio)
+    return resultado
+
+
+async def ejecutar_async(db: AsyncSession, sentencia: Sentencia, parametros: dict = None):
+    """
+    Ejecuta la sentencia en una sesión async (asyncpg prepara y cachea por conexión).
+    """
+    inicio = time.perf_counter()
+    try:
+        resultado = await db.execute(sentencia.text, parametros or {})
+    except Exception:
+        sentencia.estadisticas.registrar(time.perf_counter() - inicio, error=True)
+        raise
+    sentencia.estadisticas.registrar(time.perf_counter() - inicio)
+    return resultado
+
+
+def ejecutar_por_lotes(db: Session, sentencia: Sentencia, parametros: dict = None, filas_por_lote: int = 1000):
+    """
+    Ejecuta la sentencia con un cursor del lado del servidor (stream_results) y entrega
+    las filas en lotes de `filas_por_lote` a medida que llegan, sin cargar todo en memoria.
+    No usa PREPARE: el cursor con nombre de psycopg2 necesita la consulta original.
+    El tiempo registrado es el del recorrido completo.
+    """
+    inicio = time.perf_counter()
+    try:
+        resultado = db.execute(
+            sentencia.text, parametros or {},
+            execution_options={"stream_results": True, "yield_per": filas_por_lote}
+        )
+        for lote in resultado.partitions(filas_por_lote):
+            yield lote
+    except Exception:
+        sentencia.estadisticas.registrar(time.perf_counter() - inicio, error=True)
+        raise
+    sentencia.estadisticas.registrar(time.perf_counter() - inicio)
+
+
+def obtener_metricas_sentencias():
+    """
+    Llamadas y latencia por sentencia registrada, de la más costosa a la menos costosa.
+    """
+    metricas = {nombre: s.estadisticas.resumen() for nombre, s in REGISTRO.items()}
+    return dict(sorted(metricas.items(), key=lambda m: m[1]["tiempo_total_ms"], reverse=True))
+
+
+# ============================================================
+# AUTENTICACIÓN
+# ============================================================
+# Identidades para el login en una sola consulta: tipo, hash, nombre, correo y estado.
+# Cada rama usa la PK de su tabla. Si la cédula existe en ambas tablas retorna las dos filas,
+# primero la del fisioterapeuta: la contraseña decide cuál inicia sesión.
+IDENTIDAD_LOGIN = registrar("identidad_login", """
+    SELECT tipo, contrasena, nombre, correo, estado
+    FROM (
+        SELECT 'fisio' AS tipo, Contrasena, Nombre, Correo, Estado, 0 AS prioridad
+        FROM Fisioterapeuta
+        WHERE Cedula = :cedula
+        UNION ALL
+        SELECT 'paciente', Contrasena, Nombre, Correo, Estado, 1
+        FROM Paciente
+        WHERE Cedula = :cedula
+    ) identidad
+    ORDER BY prioridad
+""")
+
+
+# ============================================================
+# PACIENTE
+# ============================================================
+PACIENTE = registrar("paciente", """
+    SELECT p.nombre, p.correo, p.telefono, p.historiaclinica
+    FROM Paciente p
+    WHERE p.cedula = :cedula
+""")
+
+PACIENTE_FISIO = registrar("paciente_fisio", """
+    SELECT p.nombre, p.correo, p.telefono, p.historiaclinica
+    FROM Paciente p
+    INNER JOIN trata t ON p.cedula = t.cedula_paciente
+    WHERE p.cedula = :cedula
+    AND t.cedula_fisioterapeuta = :fisio_id
+""")
+
+# Detalle para el fisioterapeuta (/paciente/detalle/{cedula}): verifica Trata y trae
+# los datos del paciente con su versión (ETag) en la misma consulta
+DETALLE_PACIENTE_FISIO = registrar("detalle_paciente_fisio", """
+    SELECT p.nombre, p.correo, p.telefono, p.historiaclinica, p.version
+    FROM Paciente p
+    INNER JOIN trata t ON p.cedula = t.cedula_paciente
+    WHERE p.cedula = :cedula
+    AND t.cedula_fisioterapeuta = :fisio_id
+""")
+
+# Datos del paciente y su versión (ETag) para /paciente/dashboard
+PACIENTE_DASHBOARD = registrar("paciente_dashboard", """
+    SELECT p.nombre, p.correo, p.telefono, p.historiaclinica, p.version
+    FROM Paciente p
+    WHERE p.cedula = :cedula
+""")
+
+# Paginación por cursor (keyset): pacientes con (nombre, cédula) posterior al cursor.
+# Primera página: cursor ('', '').
+PACIENTES_FISIO = registrar("pacientes_fisio", """
+    SELECT p.cedula, p.nombre, p.correo, p.telefono, p.estado,
+           p.progreso, p.ejercicios_pendientes, p.ejercicios_completados
+    FROM Paciente p
+    INNER JOIN trata t ON p.cedula = t.cedula_paciente
+    WHERE t.cedula_fisioterapeuta = :fisio_id
+    AND (p.nombre, p.cedula) > (:cursor_nombre, :cursor_cedula)
+    ORDER BY p.nombre, p.cedula
+    LIMIT :limite
+""")
+
+CONTAR_PACIENTES_FISIO = registrar("contar_pacientes_fisio", """
+    SELECT COUNT(*)
+    FROM trata
+    WHERE cedula_fisioterapeuta = :fisio_id
+""")
+
+# Cartera del fisioterapeuta (/paciente/cartera): cada paciente con sus contadores
+# (migración 003), el grupo actual y la última actividad (Progreso_Grupo por su PK).
+# Filtros opcionales (NULL = sin filtro): :estado en minúsculas (hay datos con 'Activo')
+# y :prefijo (LIKE sobre nombre o cédula).
+# Paginación por cursor sobre (clave de orden, cédula); primera página: cursor NULL.
+# La clave puede ser NULL (Progreso de pacientes sin terapias): esos pacientes van al
+# final en ambas direcciones, después de cualquier cursor con clave y ordenados por cédula
+# después de un cursor con clave NULL.
+# Una sentencia por orden y dirección, en CARTERA_FISIO[(orden, descendente)].
+_CARTERA_FISIO = """
+    SELECT c.*, {clave} AS clave_orden
+    FROM (
+        SELECT p.cedula, p.nombre, p.correo, p.telefono, p.estado, p.progreso,
+               p.ejercicios_pendientes, p.ejercicios_completados,
+               g.grupo_actual, g.ultima_actividad
+        FROM trata t
+        INNER JOIN Paciente p ON p.cedula = t.cedula_paciente
+        LEFT JOIN LATERAL (
+            SELECT MAX(pg.Grupo_terapia) AS grupo_actual,
+                   GREATEST(MAX(pg.Fecha_inicio), MAX(pg.Fecha_fin)) AS ultima_actividad
+            FROM Progreso_Grupo pg
+            WHERE pg.Cedula_paciente = p.cedula
+        ) g ON TRUE
+        WHERE t.cedula_fisioterapeuta = :fisio_id
+        AND (LOWER(p.estado) = :estado OR :estado IS NULL)
+        AND (p.nombre ILIKE :prefijo OR p.cedula LIKE :prefijo OR :prefijo IS NULL)
+    ) c
+    WHERE ({clave}, c.cedula) {comparacion} (:cursor_valor, :cursor_cedula)
+    OR ({clave} IS NULL AND (:cursor_valor IS NOT NULL OR c.cedula {comparacion} :cursor_cedula))
+    OR :cursor_cedula IS NULL
+    ORDER BY {clave} {direccion} NULLS LAST, c.cedula {direccion}
+    LIMIT :limite
+"""
+
+CLAVES_ORDEN_CARTERA = {
+    "nombre": "c.nombre",
+    "progreso": "c.progreso",
+    "pendientes": "c.ejercicios_pendientes",
+    # Sin actividad = -infinity (asyncpg lo convierte en date.min y viceversa): la clave nunca es NULL
+    "ultima_actividad": "COALESCE(c.ultima_actividad, DATE '-infinity')",
+}
+
+CARTERA_FISIO = {
+    (orden, descendente): registrar(
+        f"cartera_fisio_{orden}_{'desc' if descendente else 'asc'}",
+        _CARTERA_FISIO.format(
+            clave=clave,
+            comparacion="<" if descendente else ">",
+            direccion="DESC" if descendente else "ASC"
+        )
+    )
+    for orden, clave in CLAVES_ORDEN_CARTERA.items()
+    for descendente in (False, True)
+}
+
+CONTAR_CARTERA_FISIO = registrar("contar_cartera_fisio", """
+    SELECT COUNT(*)
+    FROM trata t
+    INNER JOIN Paciente p ON p.cedula = t.cedula_paciente
+    WHERE t.cedula_fisioterapeuta = :fisio_id
+    AND (LOWER(p.estado) = :estado OR :estado IS NULL)
+    AND (p.nombre ILIKE :prefijo OR p.cedula LIKE :prefijo OR :prefijo IS NULL)
+""")
+
+ESTADO_PACIENTE = registrar("estado_paciente", """
+    SELECT Estado
+    FROM Paciente
+    WHERE Cedula = :cedula
+""")
+
+INACTIVAR_PACIENTE = registrar("inactivar_paciente", """
+    UPDATE Paciente
+    SET Estado = 'inactivo'
+    WHERE Cedula = :cedula
+""")
+
+# Versión de los datos de terapia del paciente (ETag de los GET de lectura, migración 006)
+VERSION_PACIENTE = registrar("version_paciente", """
+    SELECT Version
+    FROM Paciente
+    WHERE Cedula = :cedula
+""")
+
+# Los GET con ETag también devuelven nombre, correo y teléfono: cambiar el perfil
+# crea una versión nueva, en la misma transacción que el cambio.
+INCREMENTAR_VERSION_PACIENTE = registrar("incrementar_version_paciente", """
+    UPDATE Paciente
+    SET Version = Version + 1
+    WHERE Cedula = :cedula
+""")
+
+INSERTAR_TRATA = registrar("insertar_trata", """
+    INSERT INTO trata (cedula_fisioterapeuta, cedula_paciente)
+    VALUES (:cedula_fisioterapeuta, :cedula_paciente)
+""")
+
+PACIENTES_EXISTENTES = registrar("pacientes_existentes", """
+    SELECT cedula, correo
+    FROM paciente
+    WHERE cedula = ANY(:cedulas) OR correo = ANY(:correos)
+""")
+
+# ============================================================
+# EJERCICIOS
+# ============================================================
+# Catálogo completo; lo carga logic/ejercicios_service.py en memoria (una vez por worker)
+EJERCICIOS = registrar("ejercicios", """
+    SELECT e.id_ejercicio, e.nombre, e.descripcion, e.repeticion, e.url, e.id_extremidad, ext.nombre as extremidad
+    FROM Ejercicio e
+    LEFT JOIN Extremidad ext ON e.id_extremidad = ext.id_extremidad
+    ORDER BY e.id_ejercicio
+""")
+
+# Se incrementa con cada cambio en Ejercicio o Extremidad (migración 005)
+VERSION_CATALOGO = registrar("version_catalogo", """
+    SELECT Version FROM Version_Catalogo
+""")
+
+# ============================================================
+# TERAPIA ASIGNADA
+# ============================================================
+# Las búsquedas por Id_terapia agregan la Fecha_asignacion de Terapia_Ubicacion
+# (migración 008): con la columna de partición PostgreSQL solo abre la partición de la terapia.
+TERAPIA = registrar("terapia", """
+    SELECT Id_terapia, Estado, Cedula_paciente
+    FROM Terapia_Asignada
+    WHERE Id_terapia = :id_terapia
+    AND Fecha_asignacion = (SELECT Fecha_asignacion FROM Terapia_Ubicacion WHERE Id_terapia = :id_terapia)
+""")
+
+# Solo cambia terapias aún no completadas: si retorna fila, hay que sumar al progreso del grupo
+MARCAR_REALIZADO = registrar("marcar_realizado", """
+    UPDATE Terapia_Asignada
+    SET Estado = 'Completado',
+        Fecha_realizacion = :fecha
+    WHERE Id_terapia = :id_terapia
+    AND Fecha_asignacion = (SELECT Fecha_asignacion FROM Terapia_Ubicacion WHERE Id_terapia = :id_terapia)
+    AND Estado <> 'Completado'
+    RETURNING Cedula_paciente, Grupo_terapia
+""")
+
+# Guarda las calificaciones e incrementa la versión del paciente en la misma sentencia
+GUARDAR_CALIFICACIONES = registrar("guardar_calificaciones", """
+    WITH calificada AS (
+        UPDATE Terapia_Asignada
+        SET Dolor = :dolor,
+            Sensacion = :sensacion,
+            Cansancio = :cansancio,
+            Observaciones = :observaciones
+        WHERE Id_terapia = :id_terapia
+        AND Fecha_asignacion = (SELECT Fecha_asignacion FROM Terapia_Ubicacion WHERE Id_terapia = :id_terapia)
+        RETURNING Cedula_paciente
+    )
+    UPDATE Paciente
+    SET Version = Version + 1
+    WHERE Cedula IN (SELECT Cedula_paciente FROM calificada)
+""")
+
+# Completar y calificar varias terapias del paciente en una sola sentencia (/paciente/completar-lote).
+# :ids y las calificaciones van como arreglos paralelos (NULL = no cambia la calificación).
+# 1. previas: bloquea las terapias del paciente y recuerda si ya estaban completadas
+# 2. actualizadas: las marca como completadas y guarda las calificaciones
+# 3. Progreso_Grupo y Paciente suman solo las recién completadas (como SUMAR_COMPLETADO_*),
+#    y el estado del paciente se reevalúa una vez: sin pendientes pasa a inactivo.
+# Si ninguna terapia es del paciente no se modifica nada y no retorna filas.
+COMPLETAR_LOTE = registrar("completar_lote", """
+    WITH entrada AS (
+        SELECT *
+        FROM unnest(
+            CAST(:ids AS integer[]), CAST(:dolores AS integer[]), CAST(:sensaciones AS integer[]),
+            CAST(:cansancios AS integer[]), CAST(:observaciones AS text[])
+        ) AS e(id_terapia, dolor, sensacion, cansancio, observaciones)
+    ),
+    previas AS (
+        SELECT ta.Id_terapia, ta.Fecha_asignacion, ta.Grupo_terapia, ta.Estado <> 'Completado' AS nueva
+        FROM entrada e
+        INNER JOIN Terapia_Ubicacion u ON u.Id_terapia = e.id_terapia
+        INNER JOIN Terapia_Asignada ta
+            ON ta.Id_terapia = u.Id_terapia
+            AND ta.Fecha_asignacion = u.Fecha_asignacion
+        WHERE ta.Cedula_paciente = :cedula
+        FOR UPDATE OF ta
+    ),
+    actualizadas AS (
+        UPDATE Terapia_Asignada ta
+        SET Estado = 'Completado',
+            Fecha_realizacion = CASE WHEN pr.nueva THEN :fecha ELSE ta.Fecha_realizacion END,
+            Dolor = COALESCE(e.dolor, ta.Dolor),
+            Sensacion = COALESCE(e.sensacion, ta.Sensacion),
+            Cansancio = COALESCE(e.cansancio, ta.Cansancio),
+            Observaciones = COALESCE(e.observaciones, ta.Observaciones)
+        FROM previas pr
+        INNER JOIN entrada e ON e.id_terapia = pr.Id_terapia
+        WHERE ta.Id_terapia = pr.Id_terapia
+        AND ta.Fecha_asignacion = pr.Fecha_asignacion
+        RETURNING ta.Id_terapia, ta.Grupo_terapia, pr.nueva
+    ),
+    grupos AS (
+        UPDATE Progreso_Grupo pg
+        SET Completados = pg.Completados + g.cantidad,
+            Fecha_fin = GREATEST(pg.Fecha_fin, :fecha)
+        FROM (
+            SELECT Grupo_terapia, COUNT(*) AS cantidad
+            FROM actualizadas
+            WHERE nueva
+            GROUP BY Grupo_terapia
+        ) g
+        WHERE pg.Cedula_paciente = :cedula
+        AND pg.Grupo_terapia = g.Grupo_terapia
+    ),
+    paciente AS (
+        UPDATE Paciente p
+        SET Ejercicios_pendientes = GREATEST(p.Ejercicios_pendientes - n.cantidad, 0),
+            Ejercicios_completados = p.Ejercicios_completados + n.cantidad,
+            Progreso = ROUND((p.Ejercicios_completados + n.cantidad) * 100.0
+                             / GREATEST(p.Ejercicios_pendientes + p.Ejercicios_completados,
+                                        p.Ejercicios_completados + n.cantidad, 1), 2),
+            Estado = CASE WHEN GREATEST(p.Ejercicios_pendientes - n.cantidad, 0) = 0
+                          THEN 'inactivo' ELSE p.Estado END,
+            Version = p.Version + 1
+        FROM (SELECT COUNT(*) FILTER (WHERE nueva) AS cantidad FROM actualizadas) n
+        WHERE p.Cedula = :cedula
+        AND EXISTS (SELECT 1 FROM actualizadas)
+        RETURNING p.Ejercicios_pendientes, p.Estado
+    )
+    SELECT a.Id_terapia, a.nueva, pa.Ejercicios_pendientes, pa.Estado
+    FROM paciente pa
+    CROSS JOIN actualizadas a
+""")
+
+# Primer paso de la asignación: activa al paciente y bloquea su fila hasta el commit.
+# Dos asignaciones simultáneas al mismo paciente se ordenan aquí, así cada una calcula
+# su grupo (INSERTAR_TERAPIAS_GRUPO, en la sentencia siguiente) después de ver el de la otra.
+# El estado anterior se lee con la fila ya bloqueada (FOR UPDATE espera a la otra
+# asignación y ve su commit): activado indica si esta asignación cambió el estado.
+ACTIVAR_PACIENTE_ASIGNACION = registrar("activar_paciente_asignacion", """
+    UPDATE Paciente p
+    SET Estado = 'activo'
+    FROM (
+        SELECT Cedula, Estado
+        FROM Paciente
+        WHERE Cedula = :cedula
+        FOR UPDATE
+    ) anterior
+    WHERE p.Cedula = anterior.Cedula
+    RETURNING anterior.Estado IS DISTINCT FROM 'activo' AS activado
+""")
+
+# Todos los ejercicios de la asignación en un solo INSERT, en el grupo siguiente al último
+# del paciente (llamar con la fila del paciente bloqueada: ACTIVAR_PACIENTE_ASIGNACION).
+INSERTAR_TERAPIAS_GRUPO = registrar("insertar_terapias_grupo", """
+    INSERT INTO Terapia_Asignada (Grupo_terapia, Cedula_paciente, Id_ejercicio, Estado, Fecha_asignacion)
+    SELECT g.nuevo, :cedula, e.id_ejercicio, 'Pendiente', :fecha
+    FROM (
+        SELECT COALESCE(MAX(Grupo_terapia), 0) + 1 AS nuevo
+        FROM Terapia_Asignada
+        WHERE Cedula_paciente = :cedula
+    ) g
+    CROSS JOIN unnest(CAST(:ejercicios AS integer[])) WITH ORDINALITY AS e(id_ejercicio, orden)
+    ORDER BY e.orden
+    RETURNING Grupo_terapia
+""")
+
+
+# Las consultas de terapias no unen Ejercicio/Extremidad: nombre, URL y extremidad
+# se completan con el catálogo en memoria (logic/ejercicios_service.py).
+
+# Historial acotado por fecha de asignación (:desde / :hasta, NULL = sin límite):
+# el filtro sobre la columna de partición permite descartar particiones de Terapia_Asignada.
+# Historial y completados se paginan por cursor (keyset, migración 007): filas con
+# (Grupo_terapia, Fecha_realizacion, Id_terapia) anterior al cursor, en el orden del índice.
+# Fecha_realizacion puede ser NULL (datos cargados como 'Completado' sin fecha): en orden
+# DESC va primero dentro del grupo, y una comparación de filas con NULL no es verdadera,
+# por eso el grupo del cursor se compara aparte. El rango del índice es el del grupo.
+# Primera página: cursor (2147483647, 9999-12-31, 2147483647).
+HISTORIAL_COMPLETADAS = registrar("historial_completadas", """
+    SELECT
+        ta.Grupo_terapia,
+        ta.Id_ejercicio,
+        ta.Fecha_realizacion,
+        ta.Observaciones,
+        ta.Id_terapia
+    FROM Terapia_Asignada ta
+    WHERE ta.Cedula_paciente = :cedula
+    AND ta.Estado = 'Completado'
+    AND ta.Fecha_asignacion >= COALESCE(:desde, DATE '-infinity')
+    AND ta.Fecha_asignacion <= COALESCE(:hasta, DATE 'infinity')
+    AND ta.Grupo_terapia <= :cursor_grupo
+    AND (
+        ta.Grupo_terapia < :cursor_grupo
+        OR (ta.Fecha_realizacion, ta.Id_terapia) < (:cursor_fecha, :cursor_id)
+        OR (:cursor_fecha IS NULL AND (ta.Fecha_realizacion IS NOT NULL OR ta.Id_terapia < :cursor_id))
+    )
+    ORDER BY ta.Grupo_terapia DESC, ta.Fecha_realizacion DESC, ta.Id_terapia DESC
+    LIMIT :limite
+""")
+
+EJERCICIOS_COMPLETADOS = registrar("ejercicios_completados", """
+    SELECT
+        ta.Id_ejercicio,
+        ta.Fecha_realizacion,
+        ta.Observaciones,
+        ta.Grupo_terapia,
+        ta.Id_terapia
+    FROM Terapia_Asignada ta
+    WHERE ta.Cedula_paciente = :cedula
+    AND ta.Estado = 'Completado'
+    AND ta.Fecha_asignacion >= COALESCE(:desde, DATE '-infinity')
+    AND ta.Fecha_asignacion <= COALESCE(:hasta, DATE 'infinity')
+    AND ta.Grupo_terapia <= :cursor_grupo
+    AND (
+        ta.Grupo_terapia < :cursor_grupo
+        OR (ta.Fecha_realizacion, ta.Id_terapia) < (:cursor_fecha, :cursor_id)
+        OR (:cursor_fecha IS NULL AND (ta.Fecha_realizacion IS NOT NULL OR ta.Id_terapia < :cursor_id))
+    )
+    ORDER BY ta.Grupo_terapia DESC, ta.Fecha_realizacion DESC, ta.Id_terapia DESC
+    LIMIT :limite
+""")
+
+# Total de completados (solo si el cliente lo pide con incluir_total)
+CONTAR_COMPLETADAS = registrar("contar_completadas", """
+    SELECT COUNT(*)
+    FROM Terapia_Asignada ta
+    WHERE ta.Cedula_paciente = :cedula
+    AND ta.Estado = 'Completado'
+    AND ta.Fecha_asignacion >= COALESCE(:desde, DATE '-infinity')
+    AND ta.Fecha_asignacion <= COALESCE(:hasta, DATE 'infinity')
+""")
+
+EJERCICIOS_ASIGNADOS = registrar("ejercicios_asignados", """
+    SELECT
+        ta.Id_ejercicio,
+        ta.Fecha_asignacion,
+        ta.Id_terapia,
+        ta.Grupo_terapia
+    FROM Terapia_Asignada ta
+    WHERE ta.Cedula_paciente = :cedula
+    AND ta.Estado = 'Pendiente'
+    ORDER BY ta.Grupo_terapia DESC, ta.Fecha_asignacion DESC
+""")
+
+ASIGNADOS_POR_GRUPO = registrar("asignados_por_grupo", """
+    SELECT
+        ta.Grupo_terapia,
+        ta.Id_terapia,
+        ta.Id_ejercicio,
+        ta.Estado,
+        ta.Fecha_asignacion
+    FROM Terapia_Asignada ta
+    WHERE ta.Cedula_paciente = :cedula
+    AND ta.Estado IN ('Pendiente', 'En Progreso')
+    ORDER BY ta.Grupo_terapia DESC, ta.Fecha_asignacion DESC
+""")
+
+# Todas las terapias del paciente en una pasada: /paciente/dashboard arma con ellas los
+# asignados, el historial y el resumen por grupo (logic/terapia_service.py).
+TERAPIAS_PACIENTE = registrar("terapias_paciente", """
+    SELECT
+        ta.Grupo_terapia,
+        ta.Id_terapia,
+        ta.Id_ejercicio,
+        ta.Estado,
+        ta.Fecha_asignacion,
+        ta.Fecha_realizacion,
+        ta.Observaciones
+    FROM Terapia_Asignada ta
+    WHERE ta.Cedula_paciente = :cedula
+    ORDER BY ta.Grupo_terapia DESC, ta.Fecha_asignacion DESC
+""")
+
+# Paginación por cursor: (Fecha_realizacion, Id_terapia) anterior al cursor (migración 007).
+# Primera página: cursor (9999-12-31, 2147483647).
+CALIFICACIONES = registrar("calificaciones", """
+    SELECT
+        t.id_ejercicio,
+        t.dolor,
+        t.sensacion,
+        t.cansancio,
+        t.observaciones,
+        t.fecha_realizacion,
+        t.id_terapia
+    FROM terapia_asignada t
+    WHERE t.cedula_paciente = :cedula
+      AND t.fecha_realizacion IS NOT NULL   -- el paciente ya lo realizó
+      AND t.fecha_asignacion >= COALESCE(:desde, DATE '-infinity')
+      AND t.fecha_asignacion <= COALESCE(:hasta, DATE 'infinity')
+      AND (t.fecha_realizacion, t.id_terapia) < (:cursor_fecha, :cursor_id)
+    ORDER BY t.fecha_realizacion DESC, t.id_terapia DESC
+    LIMIT :limite
+""")
+
+CONTAR_CALIFICACIONES = registrar("contar_calificaciones", """
+    SELECT COUNT(*)
+    FROM terapia_asignada t
+    WHERE t.cedula_paciente = :cedula
+      AND t.fecha_realizacion IS NOT NULL
+      AND t.fecha_asignacion >= COALESCE(:desde, DATE '-infinity')
+      AND t.fecha_asignacion <= COALESCE(:hasta, DATE 'infinity')
+""")
+
+# Exportación de todas las terapias de los pacientes de un fisioterapeuta (streaming).
+# Recorre Trata por su llave primaria (un paciente tras otro) y, con LATERAL, las terapias
+# de cada paciente por índice: el orden por cédula ya viene dado y las filas salen sin
+# esperar a ordenar todo. Los pacientes sin terapias salen con los campos de terapia en NULL.
+EXPORTAR_TERAPIAS_FISIO = registrar("exportar_terapias_fisio", """
+    SELECT
+        p.cedula, p.nombre, p.correo, p.telefono, p.estado,
+        ta.id_terapia, ta.grupo_terapia, ta.id_ejercicio, ta.estado AS estado_terapia,
+        ta.fecha_asignacion, ta.fecha_realizacion,
+        ta.dolor, ta.sensacion, ta.cansancio, ta.observaciones
+    FROM trata t
+    INNER JOIN Paciente p ON p.cedula = t.cedula_paciente
+    LEFT JOIN LATERAL (
+        SELECT *
+        FROM Terapia_Asignada
+        WHERE Cedula_paciente = t.cedula_paciente
+    ) ta ON TRUE
+    WHERE t.cedula_fisioterapeuta = :fisio_id
+    ORDER BY t.cedula_paciente, ta.grupo_terapia DESC, ta.id_terapia DESC
+""")
+
+# ============================================================
+# PROGRESO POR GRUPO (tabla Progreso_Grupo, migración 002)
+# ============================================================
+# Usada por /resumen-grupos y /ejercicios-por-grupo
+RESUMEN_GRUPOS = registrar("resumen_grupos", """
+    SELECT Grupo_terapia, Total, Completados, Fecha_inicio, Fecha_fin
+    FROM Progreso_Grupo
+    WHERE Cedula_paciente = :cedula
+    ORDER BY Grupo_terapia DESC
+""")
+
+SUMAR_ASIGNACION_GRUPO = registrar("sumar_asignacion_grupo", """
+    INSERT INTO Progreso_Grupo (Cedula_paciente, Grupo_terapia, Total, Completados, Fecha_inicio)
+    VALUES (:cedula, :grupo, :cantidad, 0, :fecha)
+    ON CONFLICT (Cedula_paciente, Grupo_terapia) DO UPDATE
+    SET Total = Progreso_Grupo.Total + EXCLUDED.Total,
+        Fecha_inicio = LEAST(Progreso_Grupo.Fecha_inicio, EXCLUDED.Fecha_inicio)
+""")
+
+SUMAR_COMPLETADO_GRUPO = registrar("sumar_completado_grupo", """
+    UPDATE Progreso_Grupo
+    SET Completados = Completados + 1,
+        Fecha_fin = GREATEST(Fecha_fin, :fecha)
+    WHERE Cedula_paciente = :cedula
+    AND Grupo_terapia = :grupo
+""")
+
+# Recalcula toda la tabla desde Terapia_Asignada (cargas masivas o corrección de desvíos)
+RECONSTRUIR_PROGRESO_GRUPOS = registrar("reconstruir_progreso_grupos", """
+    INSERT INTO Progreso_Grupo (Cedula_paciente, Grupo_terapia, Total, Completados, Fecha_inicio, Fecha_fin)
+    SELECT
+        Cedula_paciente,
+        Grupo_terapia,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE Estado = 'Completado'),
+        MIN(Fecha_asignacion),
+        MAX(Fecha_realizacion)
+    FROM Terapia_Asignada
+    GROUP BY Cedula_paciente, Grupo_terapia
+    ON CONFLICT (Cedula_paciente, Grupo_terapia) DO UPDATE
+    SET Total = EXCLUDED.Total,
+        Completados = EXCLUDED.Completados,
+        Fecha_inicio = EXCLUDED.Fecha_inicio,
+        Fecha_fin = EXCLUDED.Fecha_fin
+""")
+
+# ============================================================
+# CONTADORES DEL PACIENTE (Paciente.Progreso, migración 003)
+# ============================================================
+# Las actualizaciones también incrementan Paciente.Version (ETag, migración 006)
+CONTAR_PENDIENTES = registrar("contar_pendientes", """
+    SELECT Ejercicios_pendientes
+    FROM Paciente
+    WHERE Cedula = :cedula
+""")
+
+SUMAR_ASIGNACION_PACIENTE = registrar("sumar_asignacion_paciente", """
+    UPDATE Paciente
+    SET Ejercicios_pendientes = Ejercicios_pendientes + :cantidad,
+        Progreso = ROUND(Ejercicios_completados * 100.0
+                         / GREATEST(Ejercicios_pendientes + Ejercicios_completados + :cantidad, 1), 2),
+        Version = Version + 1
+    WHERE Cedula = :cedula
+""")
+
+SUMAR_COMPLETADO_PACIENTE = registrar("sumar_completado_paciente", """
+    UPDATE Paciente
+    SET Ejercicios_pendientes = GREATEST(Ejercicios_pendientes - 1, 0),
+        Ejercicios_completados = Ejercicios_completados + 1,
+        Progreso = ROUND((Ejercicios_completados + 1) * 100.0
+                         / GREATEST(Ejercicios_pendientes + Ejercicios_completados, Ejercicios_completados + 1), 2),
+        Version = Version + 1
+    WHERE Cedula = :cedula
+""")
+
+# Recalcula los contadores desde Progreso_Grupo (después de RECONSTRUIR_PROGRESO_GRUPOS)
+RECONSTRUIR_CONTADORES_PACIENTES = registrar("reconstruir_contadores_pacientes", """
+    UPDATE Paciente p
+    SET Ejercicios_pendientes = s.total - s.completados,
+        Ejercicios_completados = s.completados,
+        Progreso = ROUND(s.completados * 100.0 / s.total, 2),
+        Version = p.Version + 1
+    FROM (
+        SELECT Cedula_paciente, SUM(Total) AS total, SUM(Completados) AS completados
+        FROM Progreso_Grupo
+        GROUP BY Cedula_paciente
+    ) s
+    WHERE p.Cedula = s.Cedula_paciente
+    AND s.total > 0
+""")
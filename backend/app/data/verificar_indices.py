@@ -0,0 +1,220 @@
+# backend/app/data/verificar_indices.py
+"""
+Verifica con EXPLAIN que las sentencias registradas en data/sentencias.py
+usan índices (y no un Seq Scan) sobre Terapia_Asignada, Trata, Paciente, Progreso_Grupo
+y Terapia_Ubicacion.
+
+Carga un conjunto de datos sintético grande dentro de una transacción, ejecuta
+EXPLAIN (FORMAT JSON) para cada consulta y al final hace ROLLBACK: la base de
+datos queda como estaba. Usar una base de datos de pruebas con las migraciones aplicadas.
+
+Uso (desde backend/app):
+    python -m data.verificar_indices --pacientes 20000 --terapias-por-paciente 50
+"""
+import argparse
+import sys
+from datetime import date
+from sqlalchemy import text
+
+from data.sentencias import REGISTRO, RECONSTRUIR_PROGRESO_GRUPOS, RECONSTRUIR_CONTADORES_PACIENTES
+
+TABLAS_VIGILADAS = ("terapia_asignada", "trata", "paciente", "progreso_grupo", "terapia_ubicacion")
+NODOS_CON_INDICE = ("Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+
+PACIENTES_POR_FISIO = 50
+FISIO_SINTETICO = "__fx__1"
+PACIENTE_MUESTRA = "__sx__1"
+
+
+def parametros_de_muestra(id_terapia: int):
+    """
+    Valores para los parámetros de las sentencias del registro.
+    """
+    return {
+        "cedula": PACIENTE_MUESTRA,
+        "fisio_id": FISIO_SINTETICO,
+        "id_terapia": id_terapia,
+        "grupo": 1,
+        "cantidad": 1,
+        "id_ejercicio": 1,
+        "fecha": date(2024, 1, 1),
+        "dolor": 1,
+        "sensacion": 1,
+        "cansancio": 1,
+        "observaciones": None,
+        "desde": date(2024, 3, 1),
+        "hasta": date(2024, 3, 31),
+        "cedula_fisioterapeuta": FISIO_SINTETICO,
+        "cedula_paciente": PACIENTE_MUESTRA,
+        "cedulas": [PACIENTE_MUESTRA],
+        "correos": ["muestra@correo.com"],
+        "cursor_grupo": 5,
+        "cursor_fecha": date(2024, 3, 15),
+        "cursor_id": id_terapia,
+        "cursor_nombre": "Paciente 1",
+        "cursor_cedula": PACIENTE_MUESTRA,
+        "limite": 50,
+        "estado": "activo",
+        "prefijo": "Paciente 1%",
+        "cursor_valor": None,
+        "ids": [id_terapia],
+        "dolores": [1],
+        "sensaciones": [1],
+        "cansancios": [1],
+    }
+
+
+def consultas_a_verificar(id_terapia: int):
+    """
+    (nombre, consulta, parámetros) de cada sentencia registrada que toca las tablas vigiladas.
+    """
+    muestra = parametros_de_muestra(id_terapia)
+    return [
+        (s.nombre, s.text, {p: muestra[p] for p in s.parametros})
+        for s in REGISTRO.values()
+        if s.parametros
+        and not s.sql.lstrip().upper().startswith("INSERT")
+        and any(tabla in s.sql.lower() for tabla in TABLAS_VIGILADAS)
+    ]
+
+
+def cargar_datos_sinteticos(conn, pacientes: int, terapias_por_paciente: int) -> int:
+    """
+    Inserta `pacientes` pacientes repartidos entre fisioterapeutas (PACIENTES_POR_FISIO cada uno)
+    y pacientes * terapias_por_paciente filas de Terapia_Asignada. Retorna un Id_terapia de muestra.
+    """
+    id_ejercicio = conn.execute(text("SELECT MIN(Id_ejercicio) FROM Ejercicio")).scalar()
+    if id_ejercicio is None:
+        id_ejercicio = conn.execute(text("""
+            INSERT INTO Ejercicio (Nombre, Url) VALUES ('Ejercicio sintético', 'https://example.invalid')
+            RETURNING Id_ejercicio
+        """)).scalar()
+
+    # Particiones mensuales (migración 004) para el rango de fechas sintético
+    if conn.execute(text("SELECT to_regproc('crear_particion_terapia')")).scalar():
+        conn.execute(text("""
+            SELECT crear_particion_terapia(mes::date)
+            FROM generate_series(DATE '2024-01-01', DATE '2024-06-01', INTERVAL '1 month') mes
+        """))
+
+    fisios = max(1, pacientes // PACIENTES_POR_FISIO)
+    conn.execute(text("""
+        INSERT INTO Fisioterapeuta (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)
+        SELECT '__fx__' || g, 'Fisio ' || g, 'fx' || g || '@sintetico.invalid', 'x', 'Activo', '0'
+        FROM generate_series(1, :fisios) g
+    """), {"fisios": fisios})
+    conn.execute(text("""
+        INSERT INTO Paciente (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)
+        SELECT '__sx__' || g, 'Paciente ' || g, 'sx' || g || '@sintetico.invalid', 'x', 'activo', '0'
+        FROM generate_series(1, :pacientes) g
+    """), {"pacientes": pacientes})
+    conn.execute(text("""
+        INSERT INTO Trata (Cedula_fisioterapeuta, Cedula_paciente)
+        SELECT '__fx__' || (1 + g % :fisios), '__sx__' || g FROM generate_series(1, :pacientes) g
+    """), {"fisios": fisios, "pacientes": pacientes})
+    # ~80% completados repartidos en 10 grupos por paciente
+    conn.execute(text("""
+        INSERT INTO Terapia_Asignada
+            (Grupo_terapia, Cedula_paciente, Id_ejercicio, Estado, Fecha_asignacion, Fecha_realizacion)
+        SELECT grupo, '__sx__' || p, :id_ejercicio,
+               CASE WHEN completado THEN 'Completado' ELSE 'Pendiente' END,
+               :inicio + grupo * 14,
+               CASE WHEN completado THEN :inicio + grupo * 14 + 3 END
+        FROM (
+            SELECT 1 + (g % :pacientes) AS p,
+                   1 + (g / :pacientes) % 10 AS grupo,
+                   random() < 0.8 AS completado
+            FROM generate_series(0, :total - 1) g
+        ) s
+    """), {
+        "pacientes": pacientes,
+        "total": pacientes * terapias_por_paciente,
+        "id_ejercicio": id_ejercicio,
+        "inicio": date(2024, 1, 1),
+    })
+    conn.execute(RECONSTRUIR_PROGRESO_GRUPOS.text)
+    conn.execute(RECONSTRUIR_CONTADORES_PACIENTES.text)
+    for tabla in ("Fisioterapeuta", "Paciente", "Trata", "Terapia_Asignada", "Progreso_Grupo", "Terapia_Ubicacion"):
+        conn.execute(text(f"ANALYZE {tabla}"))
+
+    return conn.execute(
+        text("SELECT MIN(Id_terapia) FROM Terapia_Asignada WHERE Cedula_paciente = :cedula"),
+        {"cedula": PACIENTE_MUESTRA}
+    ).scalar()
+
+
+def _nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from _nodos(hijo)
+
+
+def _tabla_vigilada(relacion: str):
+    relacion = relacion.lower()
+    for tabla in TABLAS_VIGILADAS:
+        if relacion == tabla or relacion.startswith(tabla + "_"):
+            return tabla
+    return None
+
+
+def relaciones_vacias(conn):
+    """
+    Tablas y particiones sin filas según ANALYZE: recorrerlas con Seq Scan no cuesta nada
+    (p. ej. las particiones de meses futuros).
+    """
+    return {fila[0] for fila in conn.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples = 0"
+    ))}
+
+
+def analizar_plan(plan: dict, vacias=frozenset()):
+    """
+    Retorna (usa_indice, seq_scans) para las tablas vigiladas del plan.
+    """
+    seq_scans = []
+    usa_indice = False
+    for nodo in _nodos(plan):
+        tabla = _tabla_vigilada(nodo.get("Relation Name", ""))
+        if not tabla:
+            continue
+        if nodo["Node Type"] == "Seq Scan":
+            if nodo["Relation Name"] in vacias:
+                continue
+            seq_scans.append(nodo["Relation Name"])
+        elif nodo["Node Type"] in NODOS_CON_INDICE:
+            usa_indice = True
+    return usa_indice, seq_scans
+
+
+def verificar(engine, pacientes: int, terapias_por_paciente: int) -> bool:
+    correcto = True
+    with engine.connect() as conn:
+        transaccion = conn.begin()
+        try:
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            print(f"Cargando {pacientes * terapias_por_paciente:,} terapias sintéticas...")
+            id_terapia = cargar_datos_sinteticos(conn, pacientes, terapias_por_paciente)
+
+            vacias = relaciones_vacias(conn)
+            for nombre, consulta, parametros in consultas_a_verificar(id_terapia):
+                plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + consulta.text), parametros).scalar()
+                usa_indice, seq_scans = analizar_plan(plan[0]["Plan"], vacias)
+                if seq_scans or not usa_indice:
+                    correcto = False
+                    print(f"  FALLA  {nombre}: Seq Scan sobre {', '.join(seq_scans) or '-'}")
+                else:
+                    print(f"  OK     {nombre}")
+        finally:
+            transaccion.rollback()
+    return correcto
+
+
+if __name__ == "__main__":
+    from data.db import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pacientes", type=int, default=20000)
+    parser.add_argument("--terapias-por-paciente", type=int, default=50)
+    args = parser.parse_args()
+
+    sys.exit(0 if verificar(engine, args.pacientes, args.terapias_por_paciente) else 1)
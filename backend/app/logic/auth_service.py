@@ -1,28 +1,43 @@
 from logic.email_service import send_recovery_email, send_password_change_notification
 from logic.utils import generar_contrasena_aleatoria
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import or_
+from fastapi.concurrency import run_in_threadpool
 from data.models.user import User_Fisioterapeuta, User_Paciente
-from config.security import hash_password, verify_password
+from data import sentencias
+from data.sentencias import ejecutar_async
+from config.security import hash_password_async, verify_password_async
 
 
-def crear_fisioterapeuta(db: Session, cedula: str, correo: str, nombre: str, contrasena: str, estado: str, telefono: str):
+async def crear_fisioterapeuta(db: Session, cedula: str, correo: str, nombre: str, contrasena: str, estado: str, telefono: str):
+    """
+    Registra un fisioterapeuta. El hash se espera en el pool de bcrypt sin ocupar un hilo;
+    las consultas sobre la sesión sync van al threadpool.
+    """
+    await run_in_threadpool(_verificar_fisio_disponible, db, cedula, correo)
+    contrasena_hash = await hash_password_async(contrasena)
+    return await run_in_threadpool(_insertar_fisioterapeuta, db, cedula, correo, nombre, contrasena_hash, estado, telefono)
+
+
+def _verificar_fisio_disponible(db: Session, cedula: str, correo: str):
+    fisio_existente = db.query(User_Fisioterapeuta).filter(
+        User_Fisioterapeuta.cedula == cedula
+    ).first()
+
+    if fisio_existente:
+        raise ValueError("La cédula ingresada ya se encuentra registrada")
+
+    correo_existente = db.query(User_Fisioterapeuta).filter(
+        User_Fisioterapeuta.correo == correo
+    ).first()
+
+    if correo_existente:
+        raise ValueError("El correo electrónico ingresado ya se encuentra registrado")
+
+
+def _insertar_fisioterapeuta(db: Session, cedula: str, correo: str, nombre: str, contrasena_hash: str, estado: str, telefono: str):
     try:
-        fisio_existente = db.query(User_Fisioterapeuta).filter(
-            User_Fisioterapeuta.cedula == cedula
-        ).first()
-        
-        if fisio_existente:
-            raise ValueError("La cédula ingresada ya se encuentra registrada")
-        
-        correo_existente = db.query(User_Fisioterapeuta).filter(
-            User_Fisioterapeuta.correo == correo
-        ).first()
-        
-        if correo_existente:
-            raise ValueError("El correo electrónico ingresado ya se encuentra registrado")
-        
-        contrasena_hash = hash_password(contrasena)
         fisio = User_Fisioterapeuta(
             cedula=cedula, 
             nombre=nombre, 
@@ -35,149 +50,100 @@ def crear_fisioterapeuta(db: Session, cedula: str, correo: str, nombre: str, con
         db.commit()
         db.refresh(fisio)
         return fisio
-    except ValueError:
-        db.rollback()
-        raise
     except Exception as e:
         db.rollback()
         raise e
 
 
-def authenticate_user(db: Session, cedula: str, password: str):
+async def authenticate_user(db: AsyncSession, cedula: str, password: str):
     """
-    Autentica un usuario buscando por cédula en ambas tablas (Fisioterapeuta y Paciente).
-    Retorna el tipo de usuario y sus datos si las credenciales son correctas.
+    Autentica un usuario por cédula con una sola consulta sobre Fisioterapeuta y Paciente
+    (sentencias.IDENTIDAD_LOGIN). La contraseña se verifica contra cada identidad en orden
+    (primero fisioterapeuta): una cédula registrada en ambas tablas entra con la contraseña
+    de cualquiera de las dos. En el caso normal es una sola verificación bcrypt.
+    Retorna el tipo de usuario, sus datos y su estado si las credenciales son correctas.
     """
-    # Buscar en Fisioterapeuta por cédula
-    fisio = db.query(User_Fisioterapeuta).filter(User_Fisioterapeuta.cedula == cedula).first()
-    if fisio and verify_password(password, fisio.contrasena):
-        return {"tipo": "fisio", "id": fisio.cedula, "nombre": fisio.nombre, "email": fisio.correo}
-    
-    # Buscar en Paciente por cédula
-    paciente = db.query(User_Paciente).filter(User_Paciente.cedula == cedula).first()
-    if paciente and verify_password(password, paciente.contrasena):
-       return {"tipo": "paciente", "id": paciente.cedula, "nombre": paciente.nombre, "email": paciente.correo}
-    
+    identidades = (await ejecutar_async(db, sentencias.IDENTIDAD_LOGIN, {"cedula": cedula})).fetchall()
+    for identidad in identidades:
+        if await verify_password_async(password, identidad.contrasena):
+            return {
+                "tipo": identidad.tipo,
+                "id": cedula,
+                "nombre": identidad.nombre,
+                "email": identidad.correo,
+                "estado": identidad.estado.lower() if identidad.estado else "activo"
+            }
     return None
 
 
-def recuperar_contrasena(db: Session, email: str):
+def _buscar_usuario(db: Session, **filtro):
+    """
+    Busca primero en Fisioterapeuta y luego en Paciente.
+    Retorna (tipo, usuario) o (None, None).
+    """
+    for tipo, modelo in (("fisio", User_Fisioterapeuta), ("paciente", User_Paciente)):
+        usuario = db.query(modelo).filter_by(**filtro).first()
+        if usuario:
+            return tipo, usuario
+    return None, None
+
+
+def _guardar_contrasena(db: Session, usuario, contrasena_hash: str):
+    usuario.contrasena = contrasena_hash
+    db.commit()
+
+
+async def recuperar_contrasena(db: Session, email: str):
     """
     Busca el usuario por email y envía contraseña temporal por correo.
     """
-    # Buscar en Fisioterapeuta
-    fisio = db.query(User_Fisioterapeuta).filter(
-        User_Fisioterapeuta.correo == email
-    ).first()
-    
-    if fisio:
-        # Generar nueva contraseña temporal
-        nueva_contrasena = generar_contrasena_aleatoria(10)
-        fisio.contrasena = hash_password(nueva_contrasena)
-        
-        db.commit()
-        
-        # Enviar email
-        send_recovery_email(
-            to=fisio.correo,
-            contrasena=nueva_contrasena,
-            nombre=fisio.nombre
-        )
-        
-        return {
-            "tipo": "fisio",
-            "nombre": fisio.nombre,
-            "email": fisio.correo,
-            "contrasena_temporal": nueva_contrasena
-        }
-    
-    # Buscar en Paciente
-    paciente = db.query(User_Paciente).filter(
-        User_Paciente.correo == email
-    ).first()
-    
-    if paciente:
-        # Generar nueva contraseña temporal
-        nueva_contrasena = generar_contrasena_aleatoria(10)
-        paciente.contrasena = hash_password(nueva_contrasena)
-        
-        db.commit()
-        
-        # Enviar email
-        send_recovery_email(
-            to=paciente.correo,
-            contrasena=nueva_contrasena,
-            nombre=paciente.nombre
-        )
-        
-        return {
-            "tipo": "paciente",
-            "nombre": paciente.nombre,
-            "email": paciente.correo,
-            "contrasena_temporal": nueva_contrasena
-        }
-    
-    # No se encontró el usuario
-    raise ValueError("No existe una cuenta registrada con ese correo electrónico")
+    tipo, usuario = await run_in_threadpool(_buscar_usuario, db, correo=email)
+    if usuario is None:
+        # No se encontró el usuario
+        raise ValueError("No existe una cuenta registrada con ese correo electrónico")
+    # Se leen antes del commit, que expira los atributos del objeto
+    correo, nombre = usuario.correo, usuario.nombre
+
+    # Generar nueva contraseña temporal
+    nueva_contrasena = generar_contrasena_aleatoria(10)
+    contrasena_hash = await hash_password_async(nueva_contrasena)
+    await run_in_threadpool(_guardar_contrasena, db, usuario, contrasena_hash)
 
+    # Enviar email
+    await run_in_threadpool(send_recovery_email, to=correo, contrasena=nueva_contrasena, nombre=nombre)
 
-def cambiar_contrasena(db: Session, cedula: str, contrasena_actual: str, nueva_contrasena: str):
+    return {
+        "tipo": tipo,
+        "nombre": nombre,
+        "email": correo,
+        "contrasena_temporal": nueva_contrasena
+    }
+
+
+async def cambiar_contrasena(db: Session, cedula: str, contrasena_actual: str, nueva_contrasena: str):
     # Cambia la contraseña del usuario (fisioterapeuta o paciente) verificando la contraseña actual.
+    tipo, usuario = await run_in_threadpool(_buscar_usuario, db, cedula=cedula)
+    if usuario is None:
+        # No se encontró el usuario en ninguna tabla
+        raise ValueError("Usuario no encontrado")
+    correo, nombre = usuario.correo, usuario.nombre
 
-    # Primero buscar en Fisioterapeuta
-    fisio = db.query(User_Fisioterapeuta).filter(
-        User_Fisioterapeuta.cedula == cedula
-    ).first()
-    
-    if fisio:
-        # Verificar contraseña actual
-        if not verify_password(contrasena_actual, fisio.contrasena):
-            raise ValueError("La contraseña actual es incorrecta")
-        
-        # Actualizar contraseña
-        fisio.contrasena = hash_password(nueva_contrasena)
-        db.commit()
-        
-        # Enviar notificación por email
-        send_password_change_notification(
-            to=fisio.correo,
-            nombre=fisio.nombre
-        )
-        
-        return {
-            "mensaje": "Contraseña actualizada exitosamente",
-            "email": fisio.correo,
-            "tipo": "fisioterapeuta"
-        }
-    
-    # Si no se encuentra, buscar en Paciente
-    paciente = db.query(User_Paciente).filter(
-        User_Paciente.cedula == cedula
-    ).first()
-    
-    if paciente:
-        # Verificar contraseña actual
-        if not verify_password(contrasena_actual, paciente.contrasena):
-            raise ValueError("La contraseña actual es incorrecta")
-        
-        # Actualizar contraseña
-        paciente.contrasena = hash_password(nueva_contrasena)
-        db.commit()
-        
-        # Enviar notificación por email
-        send_password_change_notification(
-            to=paciente.correo,
-            nombre=paciente.nombre
-        )
-        
-        return {
-            "mensaje": "Contraseña actualizada exitosamente",
-            "email": paciente.correo,
-            "tipo": "paciente"
-        }
-    
-    # No se encontró el usuario en ninguna tabla
-    raise ValueError("Usuario no encontrado")
+    # Verificar contraseña actual
+    if not await verify_password_async(contrasena_actual, usuario.contrasena):
+        raise ValueError("La contraseña actual es incorrecta")
+
+    # Actualizar contraseña
+    contrasena_hash = await hash_password_async(nueva_contrasena)
+    await run_in_threadpool(_guardar_contrasena, db, usuario, contrasena_hash)
+
+    # Enviar notificación por email
+    await run_in_threadpool(send_password_change_notification, to=correo, nombre=nombre)
+
+    return {
+        "mensaje": "Contraseña actualizada exitosamente",
+        "email": correo,
+        "tipo": "fisioterapeuta" if tipo == "fisio" else "paciente"
+    }
 
 
 def obtener_info_fisioterapeuta(db: Session, cedula: str):
@@ -0,0 +1,422 @@
+# backend/app/logic/cache_service.py
+"""
+Caché compartida de los resúmenes del paciente (historial, resumen de grupos, perfil).
+
+Backend según CACHE_URL:
+    memoria                  diccionario del proceso (por defecto; desarrollo con un solo worker)
+    redis://host:6379/0      servidor con protocolo Redis (Redis, Valkey, KeyDB...), compartido
+                             por todos los workers; requiere el paquete `redis`
+
+Cada paciente tiene un hash con un campo por consulta ("resumen", "historial:..." ,
+"info") y un contador de generación. Una entrada es fresca durante CACHE_TTL_SEGUNDOS;
+después, y hasta CACHE_STALE_SEGUNDOS más, se sirve la copia vieja y se recarga en
+segundo plano (stale-while-revalidate; una sola recarga por campo a la vez).
+
+Las escrituras llaman a `invalidar_paciente` después del commit: incrementa la
+generación y borra los campos. Una carga que empezó antes de la invalidación no
+puede guardar su resultado (se escribe solo si la generación no cambió).
+
+El mismo backend guarda las marcas de escritura reciente del paciente (read-your-writes,
+ver data/db.py), para que cualquier worker las vea.
+
+Si el backend falla, las consultas van directo a la base de datos.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import CACHE_URL, CACHE_TTL_SEGUNDOS, CACHE_STALE_SEGUNDOS, CACHE_PREFIJO, CACHE_MEMORIA_MAX_PACIENTES
+
+# Un paciente sin lecturas desaparece de la caché después de esto
+_EXPIRACION = int(CACHE_TTL_SEGUNDOS + CACHE_STALE_SEGUNDOS) + 60
+# Tiempo máximo de una recarga en segundo plano antes de permitir otra
+_CANDADO_SEGUNDOS = 30
+
+
+def _clave(cedula: str) -> str:
+    return f"{CACHE_PREFIJO}:paciente:{cedula}"
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+class CacheMemoria:
+    """
+    Sustituto local: mismo comportamiento que el backend Redis, dentro del proceso.
+    """
+
+    def __init__(self, max_pacientes: int):
+        self._datos = {}      # clave -> {"_gen": int, "_expira": float, campo: json}
+        self._candados = {}   # nombre -> expira
+        self._marcas = {}     # nombre -> expira
+        self._max = max_pacientes
+        self._lock = threading.Lock()
+
+    def leer(self, clave, campo):
+        with self._lock:
+            h = self._datos.get(clave)
+            if h is None or h["_expira"] < time.monotonic():
+                return None, 0
+            return h.get(campo), h["_gen"]
+
+    def escribir(self, clave, campo, valor_json, generacion):
+        with self._lock:
+            h = self._datos.get(clave)
+            if h is None or h["_expira"] < time.monotonic():
+                h = {"_gen": 0}
+            if h["_gen"] != generacion:
+                return False
+            h[campo] = valor_json
+            h["_expira"] = time.monotonic() + _EXPIRACION
+            self._datos.pop(clave, None)
+            self._datos[clave] = h
+            if len(self._datos) > self._max:
+                # El dict conserva el orden de escritura: se descarta el más antiguo
+                self._datos.pop(next(iter(self._datos)))
+            return True
+
+    def invalidar(self, clave):
+        with self._lock:
+            h = self._datos.get(clave)
+            generacion = h["_gen"] + 1 if h is not None else 1
+            self._datos.pop(clave, None)
+            self._datos[clave] = {"_gen": generacion, "_expira": time.monotonic() + _EXPIRACION}
+            if len(self._datos) > self._max:
+                self._datos.pop(next(iter(self._datos)))
+
+    def tomar_candado(self, nombre, segundos):
+        with self._lock:
+            ahora = time.monotonic()
+            if self._candados.get(nombre, 0) > ahora:
+                return False
+            self._candados = {n: e for n, e in self._candados.items() if e > ahora}
+            self._candados[nombre] = ahora + segundos
+            return True
+
+    def marcar(self, nombre, segundos):
+        with self._lock:
+            ahora = time.monotonic()
+            self._marcas[nombre] = ahora + segundos
+            if len(self._marcas) > self._max:
+                self._marcas = {n: e for n, e in self._marcas.items() if e > ahora}
+
+    def marcado(self, nombre):
+        with self._lock:
+            return self._marcas.get(nombre, 0) > time.monotonic()
+
+    # Sin E/S: las variantes async son las mismas operaciones
+    async def aleer(self, clave, campo):
+        return self.leer(clave, campo)
+
+    async def aescribir(self, clave, campo, valor_json, generacion):
+        return self.escribir(clave, campo, valor_json, generacion)
+
+    async def ainvalidar(self, clave):
+        self.invalidar(clave)
+
+    async def atomar_candado(self, nombre, segundos):
+        return self.tomar_candado(nombre, segundos)
+
+    async def amarcado(self, nombre):
+        return self.marcado(nombre)
+
+
+# Escribe el campo solo si la generación no cambió desde que se leyó
+_LUA_ESCRIBIR = """
+if (redis.call('HGET', KEYS[1], '_gen') or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Incrementa la generación y borra los demás campos
+_LUA_INVALIDAR = """
+local generacion = redis.call('HINCRBY', KEYS[1], '_gen', 1)
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], '_gen', generacion)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return generacion
+"""
+
+
+class CacheRedis:
+    """
+    Backend compartido sobre un servidor con protocolo Redis (un cliente sync y uno async).
+    """
+
+    def __init__(self, url: str):
+        import redis
+        import redis.asyncio as redis_async
+
+        self._r = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._ar = redis_async.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._escribir = self._r.register_script(_LUA_ESCRIBIR)
+        self._invalidar = self._r.register_script(_LUA_INVALIDAR)
+        self._aescribir = self._ar.register_script(_LUA_ESCRIBIR)
+        self._ainvalidar = self._ar.register_script(_LUA_INVALIDAR)
+
+    @staticmethod
+    def _decodificar(respuesta):
+        valor, generacion = respuesta
+        return (valor.decode("utf-8") if valor is not None else None), int(generacion or 0)
+
+    def leer(self, clave, campo):
+        return self._decodificar(self._r.hmget(clave, campo, "_gen"))
+
+    def escribir(self, clave, campo, valor_json, generacion):
+        return bool(self._escribir(keys=[clave], args=[generacion, campo, valor_json, _EXPIRACION]))
+
+    def invalidar(self, clave):
+        self._invalidar(keys=[clave], args=[_EXPIRACION])
+
+    def tomar_candado(self, nombre, segundos):
+        return bool(self._r.set(nombre, 1, nx=True, ex=segundos))
+
+    def marcar(self, nombre, segundos):
+        self._r.set(nombre, 1, px=max(int(segundos * 1000), 1))
+
+    def marcado(self, nombre):
+        return bool(self._r.exists(nombre))
+
+    async def aleer(self, clave, campo):
+        return self._decodificar(await self._ar.hmget(clave, campo, "_gen"))
+
+    async def aescribir(self, clave, campo, valor_json, generacion):
+        return bool(await self._aescribir(keys=[clave], args=[generacion, campo, valor_json, _EXPIRACION]))
+
+    async def ainvalidar(self, clave):
+        await self._ainvalidar(keys=[clave], args=[_EXPIRACION])
+
+    async def atomar_candado(self, nombre, segundos):
+        return bool(await self._ar.set(nombre, 1, nx=True, ex=segundos))
+
+    async def amarcado(self, nombre):
+        return bool(await self._ar.exists(nombre))
+
+
+def _crear_backend():
+    if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return CacheRedis(CACHE_URL)
+        except ImportError:
+            print("CACHE_URL apunta a Redis pero el paquete `redis` no está instalado; se usa caché en memoria")
+    return CacheMemoria(CACHE_MEMORIA_MAX_PACIENTES)
+
+
+backend = _crear_backend()
+
+
+# ============================================================
+# MÉTRICAS
+# ============================================================
+_metricas = {"aciertos": 0, "obsoletos": 0, "fallos": 0, "recargas": 0, "descartadas": 0, "errores": 0}
+_metricas_lock = threading.Lock()
+
+
+def _contar(nombre: str):
+    with _metricas_lock:
+        _metricas[nombre] += 1
+
+
+def obtener_metricas_cache():
+    with _metricas_lock:
+        metricas = dict(_metricas)
+    consultas = metricas["aciertos"] + metricas["obsoletos"] + metricas["fallos"]
+    metricas["backend"] = type(backend).__name__
+    metricas["tasa_aciertos"] = round((metricas["aciertos"] + metricas["obsoletos"]) / consultas, 4) if consultas else 0
+    return metricas
+
+
+# ============================================================
+# LECTURA CON RECARGA
+# ============================================================
+def _empaquetar(valor):
+    return json.dumps({"v": valor, "t": time.time()}, default=str)
+
+
+def _evaluar(valor_json):
+    """
+    Retorna (valor, estado) con estado "fresco", "obsoleto" o None (sin entrada o vencida).
+    """
+    if valor_json is None:
+        return None, None
+    entrada = json.loads(valor_json)
+    edad = time.time() - entrada["t"]
+    if edad < CACHE_TTL_SEGUNDOS:
+        return entrada["v"], "fresco"
+    if edad < CACHE_TTL_SEGUNDOS + CACHE_STALE_SEGUNDOS:
+        return entrada["v"], "obsoleto"
+    return None, None
+
+
+_recargas_sync = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-recarga")
+_tareas_async = set()
+
+
+def _recargar(clave, campo, recargar, generacion):
+    try:
+        guardado = backend.escribir(clave, campo, _empaquetar(recargar()), generacion)
+        _contar("recargas" if guardado else "descartadas")
+    except Exception as e:
+        _contar("errores")
+        print(f"Error recargando caché {clave} {campo}: {e}")
+
+
+def obtener(cedula: str, campo: str, cargar, recargar=None):
+    """
+    Valor en caché del campo del paciente. `cargar()` se usa si no hay entrada (con la
+    sesión de la petición); `recargar()` abre su propia sesión y se usa en segundo plano
+    cuando la entrada está obsoleta.
+    """
+    clave = _clave(cedula)
+    try:
+        valor_json, generacion = backend.leer(clave, campo)
+    except Exception as e:
+        _contar("errores")
+        print(f"Caché no disponible: {e}")
+        return cargar()
+
+    valor, estado = _evaluar(valor_json)
+    if estado == "fresco":
+        _contar("aciertos")
+        return valor
+    if estado == "obsoleto" and recargar is not None:
+        _contar("obsoletos")
+        try:
+            if backend.tomar_candado(f"{clave}:recarga:{campo}", _CANDADO_SEGUNDOS):
+                _recargas_sync.submit(_recargar, clave, campo, recargar, generacion)
+        except Exception as e:
+            _contar("errores")
+            print(f"Caché no disponible: {e}")
+        return valor
+
+    _contar("fallos")
+    valor = cargar()
+    try:
+        backend.escribir(clave, campo, _empaquetar(valor), generacion)
+    except Exception as e:
+        _contar("errores")
+        print(f"Caché no disponible: {e}")
+    return valor
+
+
+async def _recargar_async(clave, campo, recargar, generacion):
+    try:
+        guardado = await backend.aescribir(clave, campo, _empaquetar(await recargar()), generacion)
+        _contar("recargas" if guardado else "descartadas")
+    except Exception as e:
+        _contar("errores")
+        print(f"Error recargando caché {clave} {campo}: {e}")
+
+
+async def obtener_async(cedula: str, campo: str, cargar, recargar=None):
+    """
+    Variante async de obtener: `cargar` y `recargar` son funciones async sin argumentos.
+    """
+    clave = _clave(cedula)
+    try:
+        valor_json, generacion = await backend.aleer(clave, campo)
+    except Exception as e:
+        _contar("errores")
+        print(f"Caché no disponible: {e}")
+        return await cargar()
+
+    valor, estado = _evaluar(valor_json)
+    if estado == "fresco":
+        _contar("aciertos")
+        return valor
+    if estado == "obsoleto" and recargar is not None:
+        _contar("obsoletos")
+        try:
+            if await backend.atomar_candado(f"{clave}:recarga:{campo}", _CANDADO_SEGUNDOS):
+                tarea = asyncio.create_task(_recargar_async(clave, campo, recargar, generacion))
+                _tareas_async.add(tarea)
+                tarea.add_done_callback(_tareas_async.discard)
+        except Exception as e:
+            _contar("errores")
+            print(f"Caché no disponible: {e}")
+        return valor
+
+    _contar("fallos")
+    valor = await cargar()
+    try:
+        await backend.aescribir(clave, campo, _empaquetar(valor), generacion)
+    except Exception as e:
+        _contar("errores")
+        print(f"Caché no disponible: {e}")
+    return valor
+
+
+def recargar_con(fabrica, funcion, *args):
+    """
+    Función `recargar` para obtener(): ejecuta funcion(db, *args) en una sesión nueva de `fabrica`.
+    """
+    def recargar():
+        with fabrica() as db:
+            return funcion(db, *args)
+    return recargar
+
+
+def recargar_con_async(fabrica, funcion, *args):
+    """
+    Función `recargar` para obtener_async(): await funcion(db, *args) en una sesión nueva de `fabrica`.
+    """
+    async def recargar():
+        async with fabrica() as db:
+            return await funcion(db, *args)
+    return recargar
+
+
+def invalidar_paciente(cedula: str):
+    """
+    Descarta todo lo guardado del paciente. Llamar después del commit de cada escritura.
+    """
+    try:
+        backend.invalidar(_clave(cedula))
+    except Exception as e:
+        _contar("errores")
+        print(f"No se pudo invalidar la caché del paciente {cedula}: {e}")
+
+
+# ============================================================
+# ESCRITURAS RECIENTES (READ-YOUR-WRITES)
+# ============================================================
+def _clave_escritura(cedula: str) -> str:
+    return f"{CACHE_PREFIJO}:escritura:{cedula}"
+
+
+def marcar_escritura(cedula: str, segundos: float):
+    """
+    Deja constancia, visible para todos los workers, de que el paciente escribió.
+    La marca expira sola después de `segundos`.
+    """
+    try:
+        backend.marcar(_clave_escritura(cedula), segundos)
+    except Exception as e:
+        _contar("errores")
+        print(f"No se pudo marcar la escritura del paciente {cedula}: {e}")
+
+
+def escritura_reciente(cedula: str) -> bool:
+    """
+    True si el paciente tiene una marca de escritura vigente. Si el backend falla se
+    responde True: ante la duda se lee del primario.
+    """
+    try:
+        return backend.marcado(_clave_escritura(cedula))
+    except Exception as e:
+        _contar("errores")
+        print(f"Caché no disponible: {e}")
+        return True
+
+
+async def escritura_reciente_async(cedula: str) -> bool:
+    try:
+        return await backend.amarcado(_clave_escritura(cedula))
+    except Exception as e:
+        _contar("errores")
+        print(f"Caché no disponible: {e}")
+        return True
@@ -0,0 +1,143 @@
+# backend/app/logic/ejercicios_service.py
+"""
+Catálogo de ejercicios en memoria.
+
+El catálogo (Ejercicio + Extremidad) casi no cambia: cada worker lo carga una vez,
+indexado por id y por extremidad, y lo recarga solo cuando cambia Version_Catalogo
+(migración 005: los triggers la incrementan con cualquier cambio en Ejercicio o
+Extremidad). La versión se consulta como máximo cada CATALOGO_REVISION_SEGUNDOS.
+
+Las consultas de terapias traen solo Id_ejercicio y completan nombre, URL y
+extremidad con `datos(id_ejercicio)`.
+"""
+import time
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import CATALOGO_REVISION_SEGUNDOS
+from data import sentencias
+from data.sentencias import ejecutar, ejecutar_async
+
+EXTREMIDAD_GENERAL = "General"
+
+
+class EjercicioCatalogo:
+    __slots__ = ("id_ejercicio", "nombre", "descripcion", "repeticiones", "url_video", "id_extremidad", "extremidad")
+
+    def __init__(self, id_ejercicio, nombre, descripcion, repeticiones, url_video, id_extremidad, extremidad):
+        self.id_ejercicio = id_ejercicio
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.repeticiones = repeticiones
+        self.url_video = url_video
+        self.id_extremidad = id_extremidad
+        self.extremidad = extremidad or EXTREMIDAD_GENERAL
+
+    def a_dict(self):
+        return {
+            "id_ejercicio": self.id_ejercicio,
+            "nombre": self.nombre,
+            "descripcion": self.descripcion,
+            "repeticiones": self.repeticiones,
+            "url_video": self.url_video,
+            "extremidad": self.extremidad
+        }
+
+
+class Catalogo:
+    """
+    Una versión del catálogo. Inmutable: al recargar se reemplaza el objeto completo.
+    """
+    __slots__ = ("version", "por_id", "por_extremidad", "lista", "_dicts")
+
+    def __init__(self, version, filas):
+        ejercicios = [EjercicioCatalogo(*f) for f in filas]
+        self.version = version
+        self.por_id = {e.id_ejercicio: e for e in ejercicios}
+        por_extremidad = {}
+        for e in ejercicios:
+            por_extremidad.setdefault(e.extremidad.lower(), []).append(e)
+        self.por_extremidad = {k: tuple(v) for k, v in por_extremidad.items()}
+        self._dicts = {e.id_ejercicio: e.a_dict() for e in ejercicios}
+        # Respuesta de GET /ejercicios ya armada
+        self.lista = list(self._dicts.values())
+
+    def datos(self, id_ejercicio):
+        """
+        Campos del ejercicio para las respuestas (id, nombre, descripción, repeticiones, URL, extremidad).
+        Retorna una copia: quien llama puede agregarle campos.
+        """
+        datos = self._dicts.get(id_ejercicio)
+        if datos is None:
+            return {"id_ejercicio": id_ejercicio, "nombre": None, "descripcion": None,
+                    "repeticiones": None, "url_video": None, "extremidad": EXTREMIDAD_GENERAL}
+        return dict(datos)
+
+    def de_extremidad(self, extremidad: str):
+        return self.por_extremidad.get(extremidad.lower(), ())
+
+    def faltantes(self, ids):
+        return any(i not in self.por_id for i in ids)
+
+
+# Reemplazar la referencia es atómico: los lectores ven la versión anterior o la nueva,
+# nunca una a medio cargar. Dos recargas simultáneas solo repiten trabajo.
+_catalogo = None
+_ultima_revision = 0.0
+
+
+def _vigente(ids):
+    """
+    Retorna el catálogo actual si no toca revisar la versión y tiene todos los ids pedidos.
+    """
+    catalogo = _catalogo
+    if catalogo is None or catalogo.faltantes(ids):
+        return None
+    if time.monotonic() - _ultima_revision >= CATALOGO_REVISION_SEGUNDOS:
+        return None
+    return catalogo
+
+
+def _actualizar(version, filas_o_none):
+    global _catalogo, _ultima_revision
+    if filas_o_none is not None:
+        _catalogo = Catalogo(version, filas_o_none)
+        print(f"Catálogo de ejercicios cargado (versión {version}, {len(_catalogo.por_id)} ejercicios)")
+    _ultima_revision = time.monotonic()
+    return _catalogo
+
+
+def obtener_catalogo(db: Session, ids=()):
+    """
+    Catálogo vigente. Revisa la versión si pasó el intervalo o si falta alguno de `ids`
+    (un ejercicio recién creado), y recarga si cambió.
+    """
+    catalogo = _vigente(ids)
+    if catalogo is not None:
+        return catalogo
+    version = ejecutar(db, sentencias.VERSION_CATALOGO).scalar()
+    filas = None
+    if _catalogo is None or _catalogo.version != version:
+        filas = ejecutar(db, sentencias.EJERCICIOS).fetchall()
+    return _actualizar(version, filas)
+
+
+async def obtener_catalogo_async(db: AsyncSession, ids=()):
+    """
+    Variante async de obtener_catalogo (motor asyncpg)
+    """
+    catalogo = _vigente(ids)
+    if catalogo is not None:
+        return catalogo
+    version = (await ejecutar_async(db, sentencias.VERSION_CATALOGO)).scalar()
+    filas = None
+    if _catalogo is None or _catalogo.version != version:
+        filas = (await ejecutar_async(db, sentencias.EJERCICIOS)).fetchall()
+    return _actualizar(version, filas)
+
+
+def invalidar_catalogo():
+    """
+    Fuerza la revisión de la versión en la próxima consulta.
+    """
+    global _ultima_revision
+    _ultima_revision = 0.0
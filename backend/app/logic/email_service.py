@@ -212,71 +212,79 @@ def send_email(to: str, subject: str, body: str):
         print(f"Error al enviar correo: {e}")
         raise
 
-def send_patient_credentials(to: str, nombre: str, correo:str,cedula: str, contrasena: str):
+def _mensaje_credenciales(to: str, nombre: str, cedula: str, contrasena: str):
     """
-    Envía al paciente sus credenciales iniciales de acceso cuando el fisioterapeuta lo registra.
+    Arma el correo con las credenciales iniciales del paciente.
     """
-    try:
-        if not EMAIL_ORIGEN or not EMAIL_PASSWORD:
-            raise Exception("Configuración de email incompleta. Verifica EMAIL_ORIGEN y EMAIL_PASSWORD en .env")
+    msg = MIMEMultipart('alternative')
+    msg["Subject"] = "Tus credenciales de acceso - TerapiaFisica+"
+    msg["From"] = EMAIL_ORIGEN
+    msg["To"] = to
+
+    # ----------- HTML bonito -----------
+    html_content = f"""
+    <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6;">
+            <div style="max-width: 600px; margin: auto; padding: 20px;">
+                <div style="background: #138d75; padding: 25px; text-align:center; border-radius: 10px 10px 0 0;">
+                    <h2 style="color:white; margin:0;">Bienvenido a TerapiaFisica+</h2>
+                    <p style="color:white; margin-top:5px;">Tus credenciales de acceso</p>
+                </div>
 
-        msg = MIMEMultipart('alternative')
-        msg["Subject"] = "Tus credenciales de acceso - TerapiaFisica+"
-        msg["From"] = EMAIL_ORIGEN
-        msg["To"] = to
+                <div style="background:#f9f9f9; padding:30px; border-radius:0 0 10px 10px;">
+                    <p>Hola <strong>{nombre}</strong>,</p>
+                    <p>Has sido registrado en el sistema por tu fisioterapeuta. Aquí están tus datos de ingreso:</p>
 
-        # ----------- HTML bonito -----------
-        html_content = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6;">
-                <div style="max-width: 600px; margin: auto; padding: 20px;">
-                    <div style="background: #138d75; padding: 25px; text-align:center; border-radius: 10px 10px 0 0;">
-                        <h2 style="color:white; margin:0;">Bienvenido a TerapiaFisica+</h2>
-                        <p style="color:white; margin-top:5px;">Tus credenciales de acceso</p>
+                    <div style="background:white; border-left:4px solid #138d75; padding:15px; margin:20px 0;">
+                        <p><strong>Cedula:</strong> {cedula}</p>
+                        <p><strong>Contraseña temporal:</strong> {contrasena}</p>
                     </div>
 
-                    <div style="background:#f9f9f9; padding:30px; border-radius:0 0 10px 10px;">
-                        <p>Hola <strong>{nombre}</strong>,</p>
-                        <p>Has sido registrado en el sistema por tu fisioterapeuta. Aquí están tus datos de ingreso:</p>
+                    <p style="background:#fff3cd; padding:15px; border-radius:5px;">
+                        <strong>⚠️ Recomendación:</strong> Cambia tu contraseña al iniciar sesión.
+                    </p>
 
-                        <div style="background:white; border-left:4px solid #138d75; padding:15px; margin:20px 0;">
-                            <p><strong>Cedula:</strong> {cedula}</p>
-                            <p><strong>Contraseña temporal:</strong> {contrasena}</p>
-                        </div>
+                  
 
-                        <p style="background:#fff3cd; padding:15px; border-radius:5px;">
-                            <strong>⚠️ Recomendación:</strong> Cambia tu contraseña al iniciar sesión.
-                        </p>
+                    <p style="font-size:12px; color:#999; margin-top:30px; text-align:center;">
+                        © 2025 TerapiaFisica+ — Tu bienestar es nuestra prioridad.
+                    </p>
+                </div>
+            </div>
+        </body>
+    </html>
+    """
 
-                      
+    # ----------- Texto alternativo -----------
+    text_content = f"""
+    Hola {nombre},
 
-                        <p style="font-size:12px; color:#999; margin-top:30px; text-align:center;">
-                            © 2025 TerapiaFisica+ — Tu bienestar es nuestra prioridad.
-                        </p>
-                    </div>
-                </div>
-            </body>
-        </html>
-        """
+    Has sido registrado en TerapiaFisica+.
 
-        # ----------- Texto alternativo -----------
-        text_content = f"""
-        Hola {nombre},
+    Aquí están tus credenciales de ingreso:
+    Cedula: {cedula}
+    Contraseña: {contrasena}
 
-        Has sido registrado en TerapiaFisica+.
+    
+    Cambia tu contraseña después del primer ingreso.
 
-        Aquí están tus credenciales de ingreso:
-        Cedula: {cedula}
-        Contraseña: {contrasena}
+    ¡Bienvenido!
+    """
 
-        
-        Cambia tu contraseña después del primer ingreso.
+    msg.attach(MIMEText(text_content, 'plain'))
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
 
-        ¡Bienvenido!
-        """
 
-        msg.attach(MIMEText(text_content, 'plain'))
-        msg.attach(MIMEText(html_content, 'html'))
+def send_patient_credentials(to: str, nombre: str, correo:str,cedula: str, contrasena: str):
+    """
+    Envía al paciente sus credenciales iniciales de acceso cuando el fisioterapeuta lo registra.
+    """
+    try:
+        if not EMAIL_ORIGEN or not EMAIL_PASSWORD:
+            raise Exception("Configuración de email incompleta. Verifica EMAIL_ORIGEN y EMAIL_PASSWORD en .env")
+
+        msg = _mensaje_credenciales(to, nombre, cedula, contrasena)
 
         with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(EMAIL_ORIGEN, EMAIL_PASSWORD)
@@ -288,3 +296,34 @@ def send_patient_credentials(to: str, nombre: str, correo:str,cedula: str, contr
     except Exception as e:
         print(f"Error al enviar correo: {e}")
         raise Exception(f"Error al enviar correo: {str(e)}")
+
+
+def send_patient_credentials_batch(credenciales: list):
+    """
+    Envía las credenciales de varios pacientes usando una sola sesión SMTP.
+    `credenciales` es una lista de dicts con correo, nombre, cedula y contrasena.
+    Un fallo con un destinatario no detiene el resto; retorna las cédulas que fallaron.
+    """
+    fallidos = []
+    if not EMAIL_ORIGEN or not EMAIL_PASSWORD:
+        print("Configuración de email incompleta: no se enviaron las credenciales del lote")
+        return [c["cedula"] for c in credenciales]
+
+    procesados = 0
+    try:
+        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+            server.login(EMAIL_ORIGEN, EMAIL_PASSWORD)
+            for c in credenciales:
+                try:
+                    server.send_message(_mensaje_credenciales(c["correo"], c["nombre"], c["cedula"], c["contrasena"]))
+                except smtplib.SMTPRecipientsRefused as e:
+                    print(f"Error al enviar credenciales a {c['correo']}: {e}")
+                    fallidos.append(c["cedula"])
+                procesados += 1
+    except Exception as e:
+        # Se cayó la sesión SMTP: lo que faltaba por enviar queda como fallido
+        print(f"Error en el envío del lote de credenciales: {e}")
+        return fallidos + [c["cedula"] for c in credenciales[procesados:]]
+
+    print(f"Credenciales enviadas: {len(credenciales) - len(fallidos)} de {len(credenciales)}")
+    return fallidos
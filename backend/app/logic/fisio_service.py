@@ -1,5 +1,13 @@
+import csv
+import io
+import orjson
 from sqlalchemy.orm import Session
 from data.models.user import User_Fisioterapeuta
+from data import sentencias
+from data.sentencias import ejecutar_por_lotes
+from data.db import ReplicaSessionLocal
+from logic.ejercicios_service import obtener_catalogo
+from config.config import EXPORTACION_FILAS_POR_LOTE
 
 
 def actualizar_estado_fisioterapeuta(db: Session, cedula: str, nuevo_estado: str):
@@ -33,4 +41,48 @@ def actualizar_estado_fisioterapeuta(db: Session, cedula: str, nuevo_estado: str
     except Exception as e:
         print(f"Error en actualizar_estado_fisioterapeuta: {e}")
         db.rollback()
-        raise e
\ No newline at end of file
+        raise e
+
+# ----------------------------------------------------------
+#  Exportación de las terapias de todos los pacientes (streaming)
+# ----------------------------------------------------------
+COLUMNAS_EXPORTACION = (
+    "cedula", "nombre", "correo", "telefono", "estado",
+    "id_terapia", "grupo_terapia", "id_ejercicio", "ejercicio", "estado_terapia",
+    "fecha_asignacion", "fecha_realizacion", "dolor", "sensacion", "cansancio", "observaciones"
+)
+
+
+def _filas_exportacion(lote, catalogo):
+    for f in lote:
+        nombre_ejercicio = catalogo.datos(f.id_ejercicio)["nombre"] if f.id_ejercicio is not None else None
+        yield (f.cedula, f.nombre, f.correo, f.telefono, f.estado,
+               f.id_terapia, f.grupo_terapia, f.id_ejercicio, nombre_ejercicio, f.estado_terapia,
+               f.fecha_asignacion, f.fecha_realizacion, f.dolor, f.sensacion, f.cansancio, f.observaciones)
+
+
+def exportar_terapias_fisio(cedula_fisio: str, formato: str = "ndjson"):
+    """
+    Generador con las terapias de todos los pacientes del fisioterapeuta, en NDJSON o CSV.
+    Usa su propia sesión (la de la solicitud ya se cerró cuando se envía el cuerpo) y un
+    cursor del lado del servidor: entrega un trozo por cada lote de filas que llega,
+    con memoria constante sin importar el total.
+    """
+    if formato == "csv":
+        # Encabezado de inmediato: el cliente recibe bytes antes de la primera consulta
+        yield (",".join(COLUMNAS_EXPORTACION) + "\r\n").encode("utf-8")
+
+    with ReplicaSessionLocal() as db:
+        catalogo = obtener_catalogo(db)
+        lotes = ejecutar_por_lotes(db, sentencias.EXPORTAR_TERAPIAS_FISIO, {"fisio_id": cedula_fisio},
+                                   EXPORTACION_FILAS_POR_LOTE)
+        for lote in lotes:
+            if formato == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(_filas_exportacion(lote, catalogo))
+                yield buffer.getvalue().encode("utf-8")
+            else:
+                yield b"".join(
+                    orjson.dumps(dict(zip(COLUMNAS_EXPORTACION, f))) + b"\n"
+                    for f in _filas_exportacion(lote, catalogo)
+                )
@@ -1,6 +1,12 @@
 from sqlalchemy.orm import Session
 from data.models.user import User_Paciente
-from config.security import hash_password
+from fastapi.concurrency import run_in_threadpool
+from config.security import hash_password_async, hash_passwords_async
+from data import sentencias
+from data.copia import copiar, fila
+from data.sentencias import ejecutar
+from data.db import SessionLocal
+from logic import cache_service
 import secrets
 import string
 # import smtplib
@@ -67,18 +73,34 @@ def enviar_correo(destinatario: str, contrasena: str, nombre: str):
 # ----------------------------------------------------------
 #  Función principal: Crear un nuevo paciente
 # ----------------------------------------------------------
-def crear(db: Session, cedula: str, correo: str, nombre: str, telefono: str,historiaclinica: str = None):
+async def crear(db: Session, cedula: str, correo: str, nombre: str, telefono: str,historiaclinica: str = None):
     """
     Crea un nuevo paciente con una contraseña aleatoria generada automáticamente.
+    El hash se espera en el pool de bcrypt sin ocupar un hilo; el INSERT va al threadpool.
     """
     print(" [DEBUG] usando la versión ACTUAL de paciente_service.py")
-    try:
-        # 1️ Generar contraseña aleatoria
-        contrasena_generada = generar_contrasena()
+    # 1️ Generar contraseña aleatoria
+    contrasena_generada = generar_contrasena()
+
+    # 2️ Hashear la contraseña
+    contrasena_hash = await hash_password_async(contrasena_generada)
+
+    paciente = await run_in_threadpool(
+        _insertar_paciente, db, cedula, correo, nombre, telefono, historiaclinica, contrasena_hash
+    )
+
+    # 5️ Mostrar datos por consola (modo pruebas)
+    print(" [DEBUG] Paciente registrado correctamente:")
+    print(f"    Nombre: {nombre}")
+    print(f"    Correo: {correo}")
+    print(f"    Contraseña generada: {contrasena_generada}")
 
-        # 2️ Hashear la contraseña
-        contrasena_hash = hash_password(contrasena_generada)
+    return paciente, contrasena_generada
 
+
+def _insertar_paciente(db: Session, cedula: str, correo: str, nombre: str, telefono: str,
+                       historiaclinica: str, contrasena_hash: str):
+    try:
         # 3️ Crear el objeto Paciente
         paciente = User_Paciente(
             cedula=cedula,
@@ -94,25 +116,97 @@ def crear(db: Session, cedula: str, correo: str, nombre: str, telefono: str,hist
         db.add(paciente)
         db.commit()
         db.refresh(paciente)
+        return paciente
+
+    except Exception as e:
+        db.rollback()
+        print(f" Error al crear paciente: {e}")
+        raise e
+
+
+# ----------------------------------------------------------
+#  Función: Importación masiva de pacientes (CSV)
+# ----------------------------------------------------------
+async def importar_pacientes(db: Session, pacientes: list, cedula_fisio: str):
+    """
+    Registra en bloque pacientes ya validados y los asocia al fisioterapeuta.
+    `pacientes` es una lista de dicts con linea, cedula, email, nombre, telefono e historiaclinica.
+
+    Descarta los que ya existen (cédula o correo), hashea las contraseñas generadas
+    en paralelo y carga Paciente y Trata con COPY en una sola transacción.
+    Las consultas van al threadpool; mientras bcrypt calcula no se ocupa ningún hilo.
+    Retorna (credenciales de los importados, rechazados).
+    """
+    if not pacientes:
+        return [], []
+
+    nuevos, rechazados = await run_in_threadpool(_separar_existentes, db, pacientes)
+    if not nuevos:
+        return [], rechazados
 
-        # 5️ Mostrar datos por consola (modo pruebas)
-        print(" [DEBUG] Paciente registrado correctamente:")
-        print(f"    Nombre: {nombre}")
-        print(f"    Correo: {correo}")
-        print(f"    Contraseña generada: {contrasena_generada}")
+    contrasenas = [generar_contrasena() for _ in nuevos]
+    hashes = await hash_passwords_async(contrasenas)
+    await run_in_threadpool(_cargar_pacientes, db, nuevos, hashes, cedula_fisio)
 
-        return paciente, contrasena_generada
+    credenciales = [
+        {"correo": p["email"], "nombre": p["nombre"], "cedula": p["cedula"], "contrasena": c}
+        for p, c in zip(nuevos, contrasenas)
+    ]
+    return credenciales, rechazados
+
+
+def _separar_existentes(db: Session, pacientes: list):
+    """
+    Retorna (nuevos, rechazados por cédula o correo ya registrados).
+    """
+    existentes = ejecutar(db, sentencias.PACIENTES_EXISTENTES, {
+        "cedulas": [p["cedula"] for p in pacientes],
+        "correos": [p["email"] for p in pacientes],
+    }).fetchall()
+    cedulas_existentes = {e[0] for e in existentes}
+    correos_existentes = {e[1] for e in existentes}
 
+    nuevos, rechazados = [], []
+    for p in pacientes:
+        if p["cedula"] in cedulas_existentes:
+            rechazados.append({"linea": p["linea"], "cedula": p["cedula"], "error": "La cédula ya está registrada"})
+        elif p["email"] in correos_existentes:
+            rechazados.append({"linea": p["linea"], "cedula": p["cedula"], "error": "El correo ya está registrado"})
+        else:
+            nuevos.append(p)
+    return nuevos, rechazados
+
+
+def _cargar_pacientes(db: Session, nuevos: list, hashes: list, cedula_fisio: str):
+    try:
+        cursor = db.connection().connection.cursor()
+        copiar(cursor, "Paciente (Cedula, Nombre, Correo, Contrasena, Estado, Telefono, HistoriaClinica)", (
+            fila(p["cedula"], p["nombre"], p["email"], h, "activo", p["telefono"], p["historiaclinica"])
+            for p, h in zip(nuevos, hashes)
+        ))
+        copiar(cursor, "Trata (Cedula_fisioterapeuta, Cedula_paciente)", (
+            fila(cedula_fisio, p["cedula"]) for p in nuevos
+        ))
+        cursor.close()
+        db.commit()
     except Exception as e:
         db.rollback()
-        print(f" Error al crear paciente: {e}")
+        print(f" Error en la importación masiva de pacientes: {e}")
         raise e
 
 
 def obtener_info_paciente(db: Session, cedula: str):
     """
-    Obtiene la información completa del paciente por cédula.
+    Obtiene la información completa del paciente por cédula (caché compartida).
     """
+    return cache_service.obtener(
+        cedula, "info",
+        lambda: _cargar_info_paciente(db, cedula),
+        cache_service.recargar_con(SessionLocal, _cargar_info_paciente, cedula)
+    )
+
+
+def _cargar_info_paciente(db: Session, cedula: str):
     paciente = db.query(User_Paciente).filter(
         User_Paciente.cedula == cedula
     ).first()
@@ -156,6 +250,8 @@ def actualizar_perfil_paciente(db: Session, cedula: str, nombre: str, correo: st
     paciente.nombre = nombre
     paciente.correo = correo
     paciente.telefono = telefono
+    # Nueva versión para que /dashboard y /detalle no respondan 304 con el perfil anterior
+    ejecutar(db, sentencias.INCREMENTAR_VERSION_PACIENTE, {"cedula": cedula})
     
     db.commit()
     db.refresh(paciente)
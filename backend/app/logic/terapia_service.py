@@ -2,127 +2,325 @@
 Servicio para gestionar terapias, historial de ejercicios y cambio de estado del paciente
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
+from data import sentencias
+from data.sentencias import ejecutar, ejecutar_async
+from data.db import ReplicaSessionLocal, AsyncReplicaSessionLocal
+from logic.ejercicios_service import obtener_catalogo_async
+from logic import cache_service
 
 
-def obtener_historial_terapias_completadas(db: Session, cedula_paciente: str):
+def _formatear_historial(ejercicios, catalogo):
+    return [
+        {
+            "id_terapia": e[4],
+            "grupo_terapia": e[0],
+            **catalogo.datos(e[1]),
+            "fecha_realizacion": e[2].isoformat() if e[2] else None,
+            "observaciones": e[3]
+        }
+        for e in ejercicios
+    ]
+
+
+def _formatear_resumen_grupos(grupos):
+    return [
+        {
+            "grupo_terapia": g[0],
+            "total_ejercicios": g[1],
+            "completados": g[2],
+            "pendientes": g[1] - (g[2] if g[2] else 0),
+            "progreso_porcentaje": round((g[2] / g[1]) * 100, 2) if g[1] > 0 else 0,
+            "fecha_inicio": g[3].isoformat() if g[3] else None,
+            "fecha_fin": g[4].isoformat() if g[4] else None,
+            "estado": "Completado" if g[2] == g[1] else "En Progreso"
+        }
+        for g in grupos
+    ]
+
+
+async def _cargar_historial_async(db: AsyncSession, cedula_paciente: str, desde: date, hasta: date, pagina: dict):
+    resultado = await ejecutar_async(db, sentencias.HISTORIAL_COMPLETADAS, {
+        "cedula": cedula_paciente, "desde": desde, "hasta": hasta, **pagina
+    })
+    ejercicios = resultado.fetchall()
+    catalogo = await obtener_catalogo_async(db, {e[1] for e in ejercicios})
+    return _formatear_historial(ejercicios, catalogo)
+
+
+def _cargar_resumen_grupos(db: Session, cedula_paciente: str):
+    grupos = ejecutar(db, sentencias.RESUMEN_GRUPOS, {"cedula": cedula_paciente}).fetchall()
+    return _formatear_resumen_grupos(grupos)
+
+
+async def _cargar_resumen_grupos_async(db: AsyncSession, cedula_paciente: str):
+    resultado = await ejecutar_async(db, sentencias.RESUMEN_GRUPOS, {"cedula": cedula_paciente})
+    return _formatear_resumen_grupos(resultado.fetchall())
+
+
+# Campos de la caché compartida (logic/cache_service.py). `version` es Paciente.Version
+# cuando el endpoint ya la leyó para el ETag: una entrada armada con una versión anterior
+# nunca se sirve con el ETag de la nueva.
+# Sin paginar: desde el inicio del orden y sin límite (LIMIT NULL)
+HISTORIAL_COMPLETO = {"cursor_grupo": 2147483647, "cursor_fecha": date.max, "cursor_id": 2147483647, "limite": None}
+
+
+def _campo_historial(desde, hasta, version, version_catalogo, pagina):
+    return (f"historial:{version}:{desde}:{hasta}:{version_catalogo}:"
+            f"{pagina['cursor_grupo']}:{pagina['cursor_fecha']}:{pagina['cursor_id']}:{pagina['limite']}")
+
+
+async def obtener_historial_terapias_completadas_async(db: AsyncSession, cedula_paciente: str, desde: date = None,
+                                                       hasta: date = None, version: int = None, pagina: dict = None):
     """
-    Obtiene todo el historial de terapias completadas de un paciente,
-    organizadas por grupo de terapia en orden descendente
+    Obtiene el historial de terapias completadas de un paciente,
+    organizadas por grupo de terapia en orden descendente.
+    desde/hasta (opcionales) acotan por fecha de asignación.
+    pagina: parámetros :cursor_grupo, :cursor_fecha, :cursor_id y :limite (presentation/paginacion.py).
     """
+    pagina = pagina or HISTORIAL_COMPLETO
     try:
-        query = text("""
-            SELECT 
-                ta.Grupo_terapia,
-                e.Id_ejercicio,
-                e.Nombre,
-                e.Descripcion,
-                e.Repeticion,
-                e.Url,
-                ext.Nombre as Extremidad,
-                ta.Fecha_realizacion,
-                ta.Observaciones,
-                ta.Id_terapia
-            FROM Terapia_Asignada ta
-            INNER JOIN Ejercicio e ON ta.Id_ejercicio = e.Id_ejercicio
-            LEFT JOIN Extremidad ext ON e.Id_extremidad = ext.Id_extremidad
-            WHERE ta.Cedula_paciente = :cedula 
-            AND ta.Estado = 'Completado'
-            ORDER BY ta.Grupo_terapia DESC, ta.Fecha_realizacion DESC
-        """)
-        
-        ejercicios = db.execute(query, {"cedula": cedula_paciente}).fetchall()
-        
-        if not ejercicios:
-            return []
-        
-        return [
-            {
-                "id_terapia": e[9],
-                "grupo_terapia": e[0],
-                "id_ejercicio": e[1],
-                "nombre": e[2],
-                "descripcion": e[3],
-                "repeticiones": e[4],
-                "url_video": e[5],
-                "extremidad": e[6] if e[6] else "General",
-                "fecha_realizacion": e[7].isoformat() if e[7] else None,
-                "observaciones": e[8]
-            }
-            for e in ejercicios
-        ]
+        campo = _campo_historial(desde, hasta, version, (await obtener_catalogo_async(db)).version, pagina)
+        return await cache_service.obtener_async(
+            cedula_paciente, campo,
+            lambda: _cargar_historial_async(db, cedula_paciente, desde, hasta, pagina),
+            cache_service.recargar_con_async(AsyncReplicaSessionLocal, _cargar_historial_async, cedula_paciente, desde,
+                                             hasta, pagina)
+        )
     except Exception as e:
-        print(f"Error en obtener_historial_terapias_completadas: {e}")
+        print(f"Error en obtener_historial_terapias_completadas_async: {e}")
         raise e
 
 
-def obtener_resumen_grupos_terapia(db: Session, cedula_paciente: str):
+def obtener_resumen_grupos_terapia(db: Session, cedula_paciente: str, version: int = None):
     """
     Obtiene un resumen de cada grupo de terapia (total, completados, pendientes, progreso)
     """
     try:
-        query = text("""
-            SELECT 
-                ta.Grupo_terapia,
-                COUNT(*) as total_ejercicios,
-                SUM(CASE WHEN ta.Estado = 'Completado' THEN 1 ELSE 0 END) as completados,
-                MIN(ta.Fecha_asignacion) as fecha_inicio,
-                MAX(ta.Fecha_realizacion) as fecha_fin
-            FROM Terapia_Asignada ta
-            WHERE ta.Cedula_paciente = :cedula
-            GROUP BY ta.Grupo_terapia
-            ORDER BY ta.Grupo_terapia DESC
-        """)
-        
-        grupos = db.execute(query, {"cedula": cedula_paciente}).fetchall()
-        
-        if not grupos:
-            return []
-        
-        return [
-            {
-                "grupo_terapia": g[0],
-                "total_ejercicios": g[1],
-                "completados": g[2],
-                "pendientes": g[1] - (g[2] if g[2] else 0),
-                "progreso_porcentaje": round((g[2] / g[1]) * 100, 2) if g[1] > 0 else 0,
-                "fecha_inicio": g[3].isoformat() if g[3] else None,
-                "fecha_fin": g[4].isoformat() if g[4] else None,
-                "estado": "Completado" if g[2] == g[1] else "En Progreso"
-            }
-            for g in grupos
-        ]
+        return cache_service.obtener(
+            cedula_paciente, f"resumen:{version}",
+            lambda: _cargar_resumen_grupos(db, cedula_paciente),
+            cache_service.recargar_con(ReplicaSessionLocal, _cargar_resumen_grupos, cedula_paciente)
+        )
     except Exception as e:
         print(f"Error en obtener_resumen_grupos_terapia: {e}")
         raise e
 
 
+async def obtener_resumen_grupos_terapia_async(db: AsyncSession, cedula_paciente: str, version: int = None):
+    """
+    Variante async de obtener_resumen_grupos_terapia (motor asyncpg)
+    """
+    try:
+        return await cache_service.obtener_async(
+            cedula_paciente, f"resumen:{version}",
+            lambda: _cargar_resumen_grupos_async(db, cedula_paciente),
+            cache_service.recargar_con_async(AsyncReplicaSessionLocal, _cargar_resumen_grupos_async, cedula_paciente)
+        )
+    except Exception as e:
+        print(f"Error en obtener_resumen_grupos_terapia_async: {e}")
+        raise e
+
+
+# ============================================================
+# DASHBOARD DEL PACIENTE
+# ============================================================
+def _formatear_dashboard(terapias, catalogo):
+    """
+    Arma en una pasada las secciones de /paciente/dashboard a partir de TERAPIAS_PACIENTE
+    (ordenadas por grupo y fecha de asignación descendentes). El resumen por grupo se
+    calcula como RECONSTRUIR_PROGRESO_GRUPOS, sin leer Progreso_Grupo.
+    """
+    asignados = []
+    grupos_asignados = {}
+    completadas = []
+    grupos = {}
+    for grupo, id_terapia, id_ejercicio, estado, fecha_asignacion, fecha_realizacion, observaciones in terapias:
+        datos = catalogo.datos(id_ejercicio)
+        asignacion = fecha_asignacion.isoformat() if fecha_asignacion else None
+
+        if estado == "Completado":
+            completadas.append((grupo, fecha_realizacion or date.max, id_terapia, {
+                "id_terapia": id_terapia,
+                "grupo_terapia": grupo,
+                **datos,
+                "fecha_realizacion": fecha_realizacion.isoformat() if fecha_realizacion else None,
+                "observaciones": observaciones
+            }))
+        elif estado in ("Pendiente", "En Progreso"):
+            grupos_asignados.setdefault(grupo, []).append({
+                "id_terapia": id_terapia,
+                **datos,
+                "estado": estado,
+                "fecha_asignacion": asignacion
+            })
+            if estado == "Pendiente":
+                asignados.append({
+                    **datos,
+                    "fecha_asignacion": asignacion,
+                    "id_terapia": id_terapia,
+                    "grupo_terapia": grupo
+                })
+
+        # [total, completados, fecha_inicio, fecha_fin]
+        resumen = grupos.setdefault(grupo, [0, 0, fecha_asignacion, None])
+        resumen[0] += 1
+        if estado == "Completado":
+            resumen[1] += 1
+        if fecha_asignacion and (resumen[2] is None or fecha_asignacion < resumen[2]):
+            resumen[2] = fecha_asignacion
+        if fecha_realizacion and (resumen[3] is None or fecha_realizacion > resumen[3]):
+            resumen[3] = fecha_realizacion
+
+    # Mismo orden que HISTORIAL_COMPLETADAS (sin fecha de realización primero, como NULL en DESC)
+    completadas.sort(key=lambda c: c[:3], reverse=True)
+    historial = [c[3] for c in completadas]
+    resumen_grupos = _formatear_resumen_grupos([(g, *r) for g, r in grupos.items()])
+    return {
+        "asignados_por_grupo": {
+            "grupos": [{"grupo_terapia": g, "ejercicios": e} for g, e in grupos_asignados.items()]
+        },
+        "ejercicios_asignados": asignados,
+        "historial": {"total_terapias_completadas": len(historial), "historial": historial},
+        "resumen_grupos": {"total_grupos": len(resumen_grupos), "grupos": resumen_grupos}
+    }
+
+
+async def _cargar_dashboard_async(db: AsyncSession, cedula_paciente: str):
+    resultado = await ejecutar_async(db, sentencias.TERAPIAS_PACIENTE, {"cedula": cedula_paciente})
+    terapias = resultado.fetchall()
+    catalogo = await obtener_catalogo_async(db, {t[2] for t in terapias})
+    return _formatear_dashboard(terapias, catalogo)
+
+
+async def obtener_dashboard_paciente_async(db: AsyncSession, cedula_paciente: str, version: int = None):
+    """
+    Ejercicios asignados (también por grupo), historial de completados y resumen por grupo
+    del paciente, con una sola consulta sobre Terapia_Asignada.
+    """
+    try:
+        campo = f"dashboard:{version}:{(await obtener_catalogo_async(db)).version}"
+        return await cache_service.obtener_async(
+            cedula_paciente, campo,
+            lambda: _cargar_dashboard_async(db, cedula_paciente),
+            cache_service.recargar_con_async(AsyncReplicaSessionLocal, _cargar_dashboard_async, cedula_paciente)
+        )
+    except Exception as e:
+        print(f"Error en obtener_dashboard_paciente_async: {e}")
+        raise e
+
+
+def registrar_asignacion_grupo(db: Session, cedula_paciente: str, grupo_terapia: int, cantidad: int, fecha: date):
+    """
+    Suma `cantidad` ejercicios asignados al progreso del grupo (Progreso_Grupo)
+    y a los contadores del paciente (Ejercicios_pendientes, Progreso).
+    No hace commit: se llama dentro de la transacción que inserta en Terapia_Asignada.
+    """
+    ejecutar(db, sentencias.SUMAR_ASIGNACION_GRUPO, {
+        "cedula": cedula_paciente,
+        "grupo": grupo_terapia,
+        "cantidad": cantidad,
+        "fecha": fecha
+    })
+    ejecutar(db, sentencias.SUMAR_ASIGNACION_PACIENTE, {"cedula": cedula_paciente, "cantidad": cantidad})
+
+
+def asignar_ejercicios(db: Session, cedula_paciente: str, ejercicios: list, fecha: date):
+    """
+    Asigna los ejercicios al paciente en un grupo de terapia nuevo y lo activa, todo en una
+    transacción: bloquea y activa al paciente, inserta las terapias en un solo INSERT y
+    actualiza el progreso (registrar_asignacion_grupo). La fila bloqueada del paciente
+    serializa las asignaciones simultáneas: nunca comparten número de grupo.
+    Retorna (número del grupo, si el paciente pasó a activo), o None si el paciente no existe.
+    """
+    try:
+        paciente = ejecutar(db, sentencias.ACTIVAR_PACIENTE_ASIGNACION, {"cedula": cedula_paciente}).fetchone()
+        if paciente is None:
+            db.rollback()
+            return None
+
+        filas = ejecutar(db, sentencias.INSERTAR_TERAPIAS_GRUPO, {
+            "cedula": cedula_paciente,
+            "ejercicios": list(ejercicios),
+            "fecha": fecha
+        }).fetchall()
+        grupo = filas[0][0]
+        registrar_asignacion_grupo(db, cedula_paciente, grupo, len(filas), fecha)
+        db.commit()
+        return grupo, paciente.activado
+    except Exception as e:
+        print(f"Error en asignar_ejercicios: {e}")
+        db.rollback()
+        raise e
+
+
+def registrar_completado_grupo(db: Session, cedula_paciente: str, grupo_terapia: int, fecha: date):
+    """
+    Suma un ejercicio completado al progreso del grupo (Progreso_Grupo)
+    y a los contadores del paciente (Ejercicios_completados, Progreso).
+    No hace commit: se llama dentro de la transacción que marca la terapia como completada.
+    """
+    ejecutar(db, sentencias.SUMAR_COMPLETADO_GRUPO, {
+        "cedula": cedula_paciente,
+        "grupo": grupo_terapia,
+        "fecha": fecha
+    })
+    ejecutar(db, sentencias.SUMAR_COMPLETADO_PACIENTE, {"cedula": cedula_paciente})
+
+
+def completar_terapias_lote(db: Session, cedula_paciente: str, terapias: list, fecha: date):
+    """
+    Completa y califica varias terapias del paciente en una transacción (una sentencia,
+    COMPLETAR_LOTE): actualiza Terapia_Asignada, Progreso_Grupo y los contadores del
+    paciente, y reevalúa su estado una sola vez.
+    `terapias`: objetos con id_terapia, dolor, sensacion, cansancio y observaciones.
+    Retorna None si ninguna terapia pertenece al paciente.
+    """
+    try:
+        filas = ejecutar(db, sentencias.COMPLETAR_LOTE, {
+            "ids": [t.id_terapia for t in terapias],
+            "dolores": [t.dolor for t in terapias],
+            "sensaciones": [t.sensacion for t in terapias],
+            "cansancios": [t.cansancio for t in terapias],
+            "observaciones": [t.observaciones for t in terapias],
+            "cedula": cedula_paciente,
+            "fecha": fecha
+        }).fetchall()
+        db.commit()
+
+        if not filas:
+            return None
+        encontradas = {f[0] for f in filas}
+        return {
+            "completadas": sorted(f[0] for f in filas if f[1]),
+            "ya_completadas": sorted(f[0] for f in filas if not f[1]),
+            "no_encontradas": [t.id_terapia for t in terapias if t.id_terapia not in encontradas],
+            "pendientes": filas[0][2],
+            "estado_paciente": filas[0][3]
+        }
+    except Exception as e:
+        print(f"Error en completar_terapias_lote: {e}")
+        db.rollback()
+        raise e
+
+
 def verificar_y_actualizar_estado_paciente(db: Session, cedula_paciente: str):
     """
     Lógica mejorada: Solo cambia a inactivo si NO hay más terapias pendientes en NINGÚN grupo.
     Si hay cualquier ejercicio pendiente, el paciente permanece activo.
     """
     try:
-        # Contar terapias pendientes (Pendiente) o en progreso (Asignadas sin realizar)
-        query_pendientes = text("""
-            SELECT COUNT(*) as pendientes
-            FROM Terapia_Asignada
-            WHERE Cedula_paciente = :cedula 
-            AND Estado IN ('Pendiente', 'En Progreso')
-        """)
-        resultado = db.execute(query_pendientes, {"cedula": cedula_paciente}).fetchone()
+        # Terapias pendientes del paciente (contador mantenido al asignar y completar)
+        query_pendientes = sentencias.CONTAR_PENDIENTES
+        resultado = ejecutar(db, query_pendientes, {"cedula": cedula_paciente}).fetchone()
         
         pendientes_count = resultado[0] if resultado and resultado[0] else 0
         
         if pendientes_count == 0:
             # Solo cambiar a inactivo si NO hay pendientes
-            query_update = text("""
-                UPDATE Paciente
-                SET Estado = 'inactivo'
-                WHERE Cedula = :cedula
-            """)
-            db.execute(query_update, {"cedula": cedula_paciente})
+            query_update = sentencias.INACTIVAR_PACIENTE
+            ejecutar(db, query_update, {"cedula": cedula_paciente})
             db.commit()
             
             return {
@@ -142,42 +340,14 @@ def verificar_y_actualizar_estado_paciente(db: Session, cedula_paciente: str):
         raise e
 
 
-def activar_paciente(db: Session, cedula_paciente: str):
-    """
-    Nueva función: Cambia el estado del paciente a 'activo' cuando se le asignan nuevos ejercicios
-    """
-    try:
-        query_update = text("""
-            UPDATE Paciente
-            SET Estado = 'activo'
-            WHERE Cedula = :cedula
-        """)
-        db.execute(query_update, {"cedula": cedula_paciente})
-        db.commit()
-        
-        return {
-            "cambio_realizado": True,
-            "nuevo_estado": "activo",
-            "razon": "Se han asignado nuevos ejercicios al paciente"
-        }
-    except Exception as e:
-        print(f"Error en activar_paciente: {e}")
-        db.rollback()
-        raise e
-
-
 def obtener_estado_paciente(db: Session, cedula_paciente: str):
     """
     Obtiene el estado actual del paciente (activo/inactivo)
     """
     try:
-        query = text("""
-            SELECT Estado
-            FROM Paciente
-            WHERE Cedula = :cedula
-        """)
+        query = sentencias.ESTADO_PACIENTE
         
-        resultado = db.execute(query, {"cedula": cedula_paciente}).fetchone()
+        resultado = ejecutar(db, query, {"cedula": cedula_paciente}).fetchone()
         
         if not resultado:
             raise ValueError("Paciente no encontrado")
@@ -194,16 +364,9 @@ def guardar_calificaciones_ejercicio(db: Session, id_terapia: int, dolor: int, s
     Actualiza los campos de dolor, sensación, cansancio y observaciones en Terapia_Asignada
     """
     try:
-        query_update = text("""
-            UPDATE Terapia_Asignada
-            SET Dolor = :dolor,
-                Sensacion = :sensacion,
-                Cansancio = :cansancio,
-                Observaciones = :observaciones
-            WHERE Id_terapia = :id_terapia
-        """)
+        query_update = sentencias.GUARDAR_CALIFICACIONES
         
-        db.execute(query_update, {
+        ejecutar(db, query_update, {
             "dolor": dolor,
             "sensacion": sensacion,
             "cansancio": cansancio,
@@ -1,14 +1,24 @@
 # main.py
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from presentation.routers.auth_router import router as auth_router  
 from presentation.routers.payment_router import router as payment_router
 from presentation.routers.paciente_router import router as paciente_router
 from presentation.routers.terapia_router import router as terapia_router
+from presentation.routers.metricas_router import router as metricas_router
+from presentation.routers.ejercicios_router import router as ejercicios_router
+from presentation.compresion import CompresionMiddleware
 from config import jwt_config  # Asegura que la configuración JWT se cargue
+from config.config import PARTICIONES_MESES_ADELANTE, METRICAS_HABILITADAS
+from data.db import engine, async_engine, async_replica_engine, SessionLocal
+from data.particiones import asegurar_particiones_futuras
+from logic.ejercicios_service import obtener_catalogo
+from config.security import iniciar_pool_bcrypt, cerrar_pool_bcrypt
 
 
-app = FastAPI()
+# orjson serializa las respuestas; con response_model FastAPI ya no pasa por jsonable_encoder
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS SETTINGS - Asegúrate de que esto esté antes de include_router
 app.add_middleware(
@@ -17,13 +27,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginación por cursor (presentation/paginacion.py) y GET condicional
+    expose_headers=["X-Siguiente-Cursor", "X-Total", "ETag"],
 )
 
+# Compresión gzip/brotli de respuestas JSON grandes (presentation/compresion.py)
+app.add_middleware(CompresionMiddleware)
+
 # Registra routers
 app.include_router(auth_router)
 app.include_router(payment_router)
 app.include_router(paciente_router)
 app.include_router(terapia_router)
+if METRICAS_HABILITADAS:
+    app.include_router(metricas_router)
+app.include_router(ejercicios_router)
+
+@app.on_event("startup")
+def crear_particiones():
+    # Particiones de Terapia_Asignada para los próximos meses (migración 004)
+    try:
+        creadas = asegurar_particiones_futuras(engine, PARTICIONES_MESES_ADELANTE)
+        if creadas:
+            print(f"Particiones de Terapia_Asignada creadas: {creadas}")
+    except Exception as e:
+        print(f"No se pudieron crear las particiones de Terapia_Asignada: {e}")
+
+@app.on_event("startup")
+def cargar_catalogo_ejercicios():
+    # Catálogo de ejercicios en memoria (logic/ejercicios_service.py)
+    try:
+        with SessionLocal() as db:
+            obtener_catalogo(db)
+    except Exception as e:
+        print(f"No se pudo cargar el catálogo de ejercicios: {e}")
+
+@app.on_event("startup")
+def iniciar_bcrypt():
+    # Procesos de bcrypt listos antes del primer login (config/security.py)
+    try:
+        iniciar_pool_bcrypt()
+    except Exception as e:
+        print(f"No se pudo iniciar el pool de bcrypt: {e}")
+
+@app.on_event("shutdown")
+def detener_bcrypt():
+    cerrar_pool_bcrypt()
+
+@app.on_event("shutdown")
+async def cerrar_conexiones():
+    await async_engine.dispose()
+    if async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,180 @@
+# backend/app/presentation/compresion.py
+"""
+Compresión de respuestas (gzip y brotli).
+
+CompresionMiddleware comprime las respuestas cuyo Content-Type está en la lista
+permitida y que superan COMPRESION_MINIMO_BYTES, con la mejor codificación que
+acepte el cliente (Accept-Encoding). Las respuestas que ya traen Content-Encoding
+(p. ej. las precomprimidas con `respuesta_precomprimida`) pasan sin tocar.
+
+Un ETag fuerte identifica bytes exactos: al comprimir se vuelve débil (W/"...").
+presentation/etag.py ya compara If-None-Match de forma débil.
+
+brotli es opcional: sin el paquete solo se ofrece gzip.
+"""
+import gzip
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from fastapi import Request, Response
+from config.config import COMPRESION_MINIMO_BYTES, COMPRESION_NIVEL_GZIP, COMPRESION_NIVEL_BROTLI
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "text/")
+
+# En orden de preferencia cuando el cliente acepta varias con el mismo q
+CODIFICACIONES = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def elegir_codificacion(accept_encoding: str):
+    """
+    Codificación a usar según Accept-Encoding (respeta q=0), o None.
+    """
+    if not accept_encoding:
+        return None
+    aceptadas = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        aceptadas[nombre.strip()] = q
+    comodin = aceptadas.get("*", 0.0)
+    candidatas = [(aceptadas.get(c, comodin), -i, c) for i, c in enumerate(CODIFICACIONES)]
+    q, _, codificacion = max(candidatas)
+    return codificacion if q > 0 else None
+
+
+def comprimir(datos: bytes, codificacion: str, nivel: int = None) -> bytes:
+    if codificacion == "br":
+        return brotli.compress(datos, quality=COMPRESION_NIVEL_BROTLI if nivel is None else nivel)
+    return gzip.compress(datos, compresslevel=COMPRESION_NIVEL_GZIP if nivel is None else nivel, mtime=0)
+
+
+def _compresor(codificacion: str):
+    """
+    Compresor incremental para respuestas en streaming: (comprimir_trozo, terminar).
+    """
+    if codificacion == "br":
+        c = brotli.Compressor(quality=COMPRESION_NIVEL_BROTLI)
+        return (lambda trozo: c.process(trozo) + c.flush()), c.finish
+    c = zlib.compressobj(COMPRESION_NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (lambda trozo: c.compress(trozo) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+def _comprimible(cabeceras: MutableHeaders) -> bool:
+    if "content-encoding" in cabeceras:
+        return False
+    tipo = cabeceras.get("content-type", "")
+    return tipo.startswith(TIPOS_COMPRIMIBLES)
+
+
+def _ajustar_cabeceras(cabeceras: MutableHeaders, codificacion: str):
+    cabeceras["Content-Encoding"] = codificacion
+    cabeceras.add_vary_header("Accept-Encoding")
+    etag = cabeceras.get("etag")
+    if etag and not etag.startswith("W/"):
+        cabeceras["ETag"] = "W/" + etag
+
+
+class CompresionMiddleware:
+    """
+    Middleware ASGI. Las respuestas completas por debajo del umbral se envían sin comprimir;
+    las respuestas en streaming se comprimen trozo a trozo.
+    """
+
+    def __init__(self, app, minimo: int = COMPRESION_MINIMO_BYTES):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding"))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compresor = None
+
+        async def enviar(mensaje):
+            nonlocal inicio, compresor
+            if mensaje["type"] == "http.response.start":
+                # Se retiene hasta ver el primer trozo del cuerpo
+                inicio = mensaje
+                return
+            if mensaje["type"] != "http.response.body":
+                await send(mensaje)
+                return
+
+            cuerpo = mensaje.get("body", b"")
+            mas = mensaje.get("more_body", False)
+
+            if inicio is not None:
+                mensaje_inicio, inicio = inicio, None
+                cabeceras = MutableHeaders(raw=mensaje_inicio["headers"])
+                if not _comprimible(cabeceras) or (not mas and len(cuerpo) < self.minimo):
+                    await send(mensaje_inicio)
+                    await send(mensaje)
+                    return
+                _ajustar_cabeceras(cabeceras, codificacion)
+                if not mas:
+                    cuerpo = comprimir(cuerpo, codificacion)
+                    cabeceras["Content-Length"] = str(len(cuerpo))
+                    await send(mensaje_inicio)
+                    await send({"type": "http.response.body", "body": cuerpo})
+                    return
+                del cabeceras["Content-Length"]
+                compresor = _compresor(codificacion)
+                await send(mensaje_inicio)
+
+            if compresor is None:
+                await send(mensaje)
+                return
+            comprimir_trozo, terminar = compresor
+            datos = comprimir_trozo(cuerpo) if cuerpo else b""
+            if not mas:
+                datos += terminar()
+            await send({"type": "http.response.body", "body": datos, "more_body": mas})
+
+        await self.app(scope, receive, enviar)
+
+
+class VariantesPrecomprimidas:
+    """
+    Un cuerpo JSON y sus versiones comprimidas, calculadas una sola vez (nivel máximo).
+    """
+    __slots__ = ("clave", "identidad", "codificadas")
+
+    def __init__(self, clave, cuerpo: bytes):
+        self.clave = clave
+        self.identidad = cuerpo
+        self.codificadas = {
+            "gzip": comprimir(cuerpo, "gzip", nivel=9),
+        }
+        if brotli is not None:
+            self.codificadas["br"] = comprimir(cuerpo, "br", nivel=11)
+
+
+def respuesta_precomprimida(request: Request, variantes: VariantesPrecomprimidas,
+                            media_type: str = "application/json") -> Response:
+    """
+    Responde con la variante que acepte el cliente; el middleware no la vuelve a comprimir.
+    """
+    codificacion = elegir_codificacion(request.headers.get("accept-encoding"))
+    if codificacion is None or len(variantes.identidad) < COMPRESION_MINIMO_BYTES:
+        return Response(variantes.identidad, media_type=media_type, headers={"Vary": "Accept-Encoding"})
+    return Response(
+        variantes.codificadas[codificacion],
+        media_type=media_type,
+        headers={"Content-Encoding": codificacion, "Vary": "Accept-Encoding"}
+    )
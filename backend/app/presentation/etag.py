@@ -0,0 +1,77 @@
+# backend/app/presentation/etag.py
+"""
+ETag y GET condicional para las lecturas de terapias de un paciente.
+
+El ETag combina Paciente.Version (se incrementa al asignar, completar o calificar
+ejercicios, migración 006, y al actualizar el perfil), la versión del catálogo de ejercicios y una huella de
+la URL con sus parámetros. Si el cliente envía If-None-Match con ese valor se
+responde 304 sin ejecutar las consultas del endpoint: solo se lee la versión por PK.
+
+Uso: @router.get("/.../{cedula}", dependencies=[Depends(etag_paciente)])
+o como parámetro, `version = Depends(etag_paciente)`, para recibir Paciente.Version.
+Los endpoints sin la cédula en la ruta (p. ej. /paciente/dashboard, que la toma del
+token) leen la versión en su propia consulta y llaman a responder_condicional.
+"""
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from data.db import get_read_db, get_async_read_db
+from data import sentencias
+from data.sentencias import ejecutar, ejecutar_async
+from logic.ejercicios_service import obtener_catalogo, obtener_catalogo_async
+
+
+def calcular_etag(request: Request, version_paciente: int, version_catalogo: int, identidad: str = "") -> str:
+    url = f"{identidad}{request.url.path}?{request.url.query}"
+    huella = hashlib.blake2b(url.encode("utf-8"), digest_size=6).hexdigest()
+    return f'"{version_paciente}.{version_catalogo}.{huella}"'
+
+
+def coincide(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match usa comparación débil: se ignora el prefijo W/.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(e.strip().removeprefix("W/") == etag for e in if_none_match.split(","))
+
+
+def responder_condicional(request: Request, response: Response, version_paciente, version_catalogo,
+                          identidad: str = "", extra: dict = None):
+    """
+    Pone el ETag en la respuesta o lanza 304 si el cliente ya lo tiene.
+    `identidad` entra en el ETag cuando la URL no identifica al paciente (misma URL para todos).
+    `extra`: cabeceras que deben ir igual en el 200 y en el 304 (p. ej. Vary).
+    """
+    if version_paciente is None:
+        # Paciente inexistente: el endpoint responde como siempre
+        return None
+    etag = calcular_etag(request, version_paciente, version_catalogo, identidad)
+    cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache", **(extra or {})}
+    if coincide(request.headers.get("if-none-match"), etag):
+        # FastAPI responde 304 sin cuerpo, con estas cabeceras
+        raise HTTPException(status_code=304, headers=cabeceras)
+    response.headers.update(cabeceras)
+    return version_paciente
+
+
+def etag_paciente(cedula: str, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    """
+    Dependencia para endpoints sync; comparte la sesión de lectura del endpoint.
+    """
+    version = ejecutar(db, sentencias.VERSION_PACIENTE, {"cedula": cedula}).scalar()
+    catalogo = obtener_catalogo(db)
+    return responder_condicional(request, response, version, catalogo.version)
+
+
+async def etag_paciente_async(cedula: str, request: Request, response: Response,
+                              db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Dependencia para endpoints async; comparte la sesión de lectura del endpoint.
+    """
+    version = (await ejecutar_async(db, sentencias.VERSION_PACIENTE, {"cedula": cedula})).scalar()
+    catalogo = await obtener_catalogo_async(db)
+    return responder_condicional(request, response, version, catalogo.version)
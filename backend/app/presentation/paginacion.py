@@ -0,0 +1,107 @@
+# backend/app/presentation/paginacion.py
+"""
+Paginación por cursor (keyset) para las listas que crecen sin límite.
+
+Cada página pide las filas "después de la última vista" en el orden de un índice
+(migración 007), así la página 1000 cuesta lo mismo que la primera. El cliente
+recibe el cursor de la página siguiente en la cabecera X-Siguiente-Cursor (no se
+envía en la última página) y lo devuelve tal cual en `?cursor=`. El cursor es
+opaco: base64 de la clave de la última fila y del tipo de lista. Una clave NULL
+viaja como null y las sentencias la comparan aparte (sentencias.py).
+
+El cuerpo de la respuesta no cambia de forma. El total solo se calcula con
+`?incluir_total=true` y va en la cabecera X-Total.
+"""
+import base64
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+from config.config import PAGINA_TAMANO_DEFECTO, PAGINA_TAMANO_MAX
+
+CABECERA_CURSOR = "X-Siguiente-Cursor"
+CABECERA_TOTAL = "X-Total"
+
+_ENTERO_MAX = 2147483647
+
+# tipo de lista -> (tipos de la clave, clave de la primera página)
+CLAVES = {
+    # (Grupo_terapia, Fecha_realizacion, Id_terapia) descendente
+    "terapias": ((int, date, int), (_ENTERO_MAX, date.max, _ENTERO_MAX)),
+    # (Fecha_realizacion, Id_terapia) descendente
+    "calificaciones": ((date, int), (date.max, _ENTERO_MAX)),
+    # (Nombre, Cedula) ascendente
+    "pacientes": ((str, str), ("", "")),
+    # Cartera del fisioterapeuta: (clave de orden, Cedula); NULL = primera página en ambas direcciones
+    "cartera_nombre": ((str, str), (None, None)),
+    "cartera_progreso": ((Decimal, str), (None, None)),
+    "cartera_pendientes": ((int, str), (None, None)),
+    "cartera_ultima_actividad": ((date, str), (None, None)),
+}
+
+
+def codificar_cursor(tipo: str, clave) -> str:
+    datos = json.dumps([tipo, *clave], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(tipo: str, cursor: str) -> tuple:
+    tipos, _ = CLAVES[tipo]
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if datos[0] != tipo or len(datos) != len(tipos) + 1:
+            raise ValueError
+        clave = tuple(
+            None if v is None else date.fromisoformat(v) if t is date else t(v)
+            for t, v in zip(tipos, datos[1:])
+        )
+        if any(isinstance(v, Decimal) and not v.is_finite() for v in clave):
+            raise ValueError
+        return clave
+    except (ValueError, TypeError, IndexError, KeyError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+class Pagina:
+    """
+    Parámetros de paginación de la solicitud (se usa como dependencia: `pagina: Pagina = Depends()`).
+    """
+
+    def __init__(
+        self,
+        limite: int = Query(PAGINA_TAMANO_DEFECTO, ge=1, le=PAGINA_TAMANO_MAX,
+                            description="Filas por página"),
+        cursor: Optional[str] = Query(None, description="Valor de X-Siguiente-Cursor de la página anterior"),
+        incluir_total: bool = Query(False, description="Calcular el total de filas (cabecera X-Total)")
+    ):
+        self.limite = limite
+        self.cursor = cursor
+        self.incluir_total = incluir_total
+
+    def clave(self, tipo: str) -> tuple:
+        """
+        Clave desde la que empieza la página (la de la primera página si no hay cursor).
+        """
+        if self.cursor is None:
+            return CLAVES[tipo][1]
+        return decodificar_cursor(tipo, self.cursor)
+
+    def parametros(self, tipo: str, nombres) -> dict:
+        """
+        Parámetros :cursor_* y :limite de la sentencia. Se pide una fila de más para
+        saber si hay otra página sin contar.
+        """
+        return {**dict(zip(nombres, self.clave(tipo))), "limite": self.limite + 1}
+
+    def cerrar(self, response: Response, tipo: str, filas: list, clave_de, total: int = None) -> list:
+        """
+        Recorta la fila de más, pone las cabeceras de paginación y retorna las filas de la página.
+        `clave_de(fila)` retorna la clave de orden de una fila.
+        """
+        if len(filas) > self.limite:
+            filas = filas[:self.limite]
+            response.headers[CABECERA_CURSOR] = codificar_cursor(tipo, clave_de(filas[-1]))
+        if total is not None:
+            response.headers[CABECERA_TOTAL] = str(total)
+        return filas
@@ -1,39 +1,48 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from presentation.schemas.usuario_schema import (
     FisioCreate, LoginCreate, LoginResponse, 
     RecuperarContrasenaRequest, RecuperarContrasenaResponse,
     CambiarContrasenaRequest, InfoFisioterapeutaResponse,
     ActualizarPerfilFisioterapeuta  # Import new schema
 )
-from data.db import get_db 
+from data.db import get_db, get_async_db
 from logic.auth_service import (
     crear_fisioterapeuta, authenticate_user, 
     recuperar_contrasena, cambiar_contrasena, 
     obtener_info_fisioterapeuta,
     actualizar_perfil_fisioterapeuta  # Import new service function
 )
-from config.jwt_config import create_access_token, verify_token
+from config.jwt_config import create_access_token, verify_token, cache_tokens
+from config.security import BcryptOcupado
 from datetime import timedelta
 import traceback 
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from config.jwt_config import SECRET_KEY, ALGORITHM
-from data.models.user import User_Fisioterapeuta, User_Paciente
-from sqlalchemy import text
+from jose import JWTError
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 router = APIRouter(prefix="/auth", tags=["Autenticación"])
 
+
+def servicio_ocupado() -> HTTPException:
+    """
+    Respuesta cuando la cola de bcrypt está llena (config/security.py)
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Hay demasiadas solicitudes de autenticación en curso. Intenta de nuevo en unos segundos.",
+        headers={"Retry-After": "1"}
+    )
+
 def get_current_user_cedula(token: str = Depends(oauth2_scheme)):
     """
     Obtiene la cédula del usuario actual desde el token JWT
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        cedula = payload.get("cedula")
+        cedula = cache_tokens.principal(token).cedula
         if cedula is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,12 +57,12 @@ def get_current_user_cedula(token: str = Depends(oauth2_scheme)):
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def registrar_fisioterapeuta(datos: FisioCreate, db: Session = Depends(get_db)):
+async def registrar_fisioterapeuta(datos: FisioCreate, db: Session = Depends(get_db)):
     """
     Registra un nuevo fisioterapeuta en el sistema
     """
     try:
-        usuario = crear_fisioterapeuta(
+        usuario = await crear_fisioterapeuta(
             db=db,
             cedula=datos.cedula,
             correo=datos.email,
@@ -77,6 +86,8 @@ def registrar_fisioterapeuta(datos: FisioCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except BcryptOcupado:
+        raise servicio_ocupado()
     except Exception as e:
         print("ERROR COMPLETO:")
         print(traceback.format_exc())
@@ -88,32 +99,20 @@ def registrar_fisioterapeuta(datos: FisioCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=LoginResponse)
-def login_user(datos: LoginCreate, db: Session = Depends(get_db)):
+async def login_user(datos: LoginCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Inicia sesión verificando la cédula en las tablas Fisioterapeuta y Paciente.
     Permite el acceso a fisioterapeutas inactivos para que puedan realizar el pago.
     """
     try:
-        user_data = authenticate_user(db, datos.cedula, datos.contrasena)
+        user_data = await authenticate_user(db, datos.cedula, datos.contrasena)
         if not user_data:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Cédula o contraseña incorrecta",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        
-        estado = "activo"  # Por defecto
-        if user_data["tipo"] == "fisio":
-            fisio = db.query(User_Fisioterapeuta).filter(
-                User_Fisioterapeuta.cedula == user_data["id"]
-            ).first()
-            estado = fisio.estado.lower() if fisio else "activo"
-        else:
-            query = text("""
-                SELECT Estado FROM Paciente WHERE Cedula = :cedula
-            """)
-            resultado = db.execute(query, {"cedula": user_data["id"]}).fetchone()
-            estado = resultado[0].lower() if resultado else "activo"
+        estado = user_data["estado"]
         
         # Crear token JWT con tipo de usuario y estado
         access_token_expires = timedelta(minutes=30)
@@ -138,6 +137,8 @@ def login_user(datos: LoginCreate, db: Session = Depends(get_db)):
     
     except HTTPException:
         raise
+    except BcryptOcupado:
+        raise servicio_ocupado()
     except Exception as e:
         print("ERROR EN LOGIN:", traceback.format_exc())
         raise HTTPException(
@@ -148,23 +149,16 @@ def login_user(datos: LoginCreate, db: Session = Depends(get_db)):
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        tipo_usuario = payload.get("tipo")
-        cedula = payload.get("cedula")
+        principal = cache_tokens.principal(token)
 
-        if tipo_usuario is None or cedula is None:
+        if principal.tipo_usuario is None or principal.cedula is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token inválido: datos incompletos",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        
-        class User:
-            def __init__(self, tipo_usuario, cedula):
-                self.tipo_usuario = tipo_usuario
-                self.cedula = cedula
 
-        return User(tipo_usuario, cedula)
+        return principal
     
     except JWTError:
         raise HTTPException(
@@ -181,7 +175,7 @@ async def verify_token_endpoint(token: str = Depends(oauth2_scheme)):
 
 
 @router.post("/recuperar-contrasena", response_model=RecuperarContrasenaResponse)
-def recuperar_contrasena_endpoint(
+async def recuperar_contrasena_endpoint(
     datos: RecuperarContrasenaRequest, 
     db: Session = Depends(get_db)
 ):
@@ -190,7 +184,7 @@ def recuperar_contrasena_endpoint(
     Genera una nueva contraseña temporal y la envía al correo registrado.
     """
     try:
-        resultado = recuperar_contrasena(db, datos.email)
+        resultado = await recuperar_contrasena(db, datos.email)
         
         return {
             "mensaje": f"Se ha enviado una nueva contraseña temporal a {datos.email}",
@@ -202,7 +196,8 @@ def recuperar_contrasena_endpoint(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
-    
+    except BcryptOcupado:
+        raise servicio_ocupado()
     except Exception as e:
         print("ERROR EN RECUPERAR CONTRASEÑA:", traceback.format_exc())
         raise HTTPException(
@@ -212,7 +207,7 @@ def recuperar_contrasena_endpoint(
 
 
 @router.post("/cambiar-contrasena")
-def cambiar_contrasena_endpoint(
+async def cambiar_contrasena_endpoint(
     datos: CambiarContrasenaRequest,
     cedula: str = Depends(get_current_user_cedula),
     db: Session = Depends(get_db)
@@ -221,7 +216,7 @@ def cambiar_contrasena_endpoint(
     Cambia la contraseña del fisioterapeuta autenticado
     """
     try:
-        resultado = cambiar_contrasena(
+        resultado = await cambiar_contrasena(
             db=db,
             cedula=cedula,
             contrasena_actual=datos.contrasena_actual,
@@ -238,6 +233,8 @@ def cambiar_contrasena_endpoint(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except BcryptOcupado:
+        raise servicio_ocupado()
     except Exception as e:
         print("ERROR EN CAMBIAR CONTRASEÑA:", traceback.format_exc())
         raise HTTPException(
@@ -1 +1,65 @@
-# Manejo de ejercicios
\ No newline at end of file
+# Manejo de ejercicios
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from data.db import get_read_db
+from logic.ejercicios_service import obtener_catalogo
+from presentation.compresion import VariantesPrecomprimidas, respuesta_precomprimida
+import json
+import traceback
+
+router = APIRouter(prefix="/ejercicios", tags=["Ejercicios"])
+
+# JSON del catálogo completo y sus versiones comprimidas, para la versión vigente
+_lista_precomprimida = None
+
+
+def _variantes_lista(catalogo) -> VariantesPrecomprimidas:
+    global _lista_precomprimida
+    variantes = _lista_precomprimida
+    if variantes is None or variantes.clave != catalogo.version:
+        # Mismo formato que JSONResponse
+        cuerpo = json.dumps(jsonable_encoder(catalogo.lista), ensure_ascii=False,
+                            allow_nan=False, separators=(",", ":")).encode("utf-8")
+        variantes = VariantesPrecomprimidas(catalogo.version, cuerpo)
+        _lista_precomprimida = variantes
+    return variantes
+
+
+@router.get("")
+def listar_ejercicios(request: Request, db: Session = Depends(get_read_db)):
+    """
+    Catálogo completo de ejercicios (en memoria, se recarga cuando cambia su versión).
+    Se serializa y comprime una vez por versión del catálogo.
+    """
+    try:
+        return respuesta_precomprimida(request, _variantes_lista(obtener_catalogo(db)))
+    except Exception as e:
+        print("ERROR EN /ejercicios:")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error al obtener ejercicios: {str(e)}")
+
+
+@router.get("/extremidad/{extremidad}")
+def listar_ejercicios_por_extremidad(extremidad: str, db: Session = Depends(get_read_db)):
+    """
+    Ejercicios de una extremidad (sin distinguir mayúsculas). "General" agrupa los que no tienen extremidad.
+    """
+    try:
+        catalogo = obtener_catalogo(db)
+        return [catalogo.datos(e.id_ejercicio) for e in catalogo.de_extremidad(extremidad)]
+    except Exception as e:
+        print("ERROR EN /ejercicios/extremidad:")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error al obtener ejercicios: {str(e)}")
+
+
+@router.get("/{id_ejercicio}")
+def obtener_ejercicio(id_ejercicio: int, db: Session = Depends(get_read_db)):
+    """
+    Un ejercicio del catálogo por id
+    """
+    catalogo = obtener_catalogo(db, {id_ejercicio})
+    if id_ejercicio not in catalogo.por_id:
+        raise HTTPException(status_code=404, detail="Ejercicio no encontrado")
+    return catalogo.datos(id_ejercicio)
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from data.db import obtener_metricas_pool
+from data.sentencias import obtener_metricas_sentencias
+from logic.cache_service import obtener_metricas_cache
+from config.jwt_config import cache_tokens
+from config.security import obtener_metricas_bcrypt
+from presentation.routers.auth_router import get_current_user
+
+
+def solo_fisioterapeuta(current_user = Depends(get_current_user)):
+    """
+    Las métricas exponen detalles internos del worker: solo con token de fisioterapeuta.
+    """
+    if current_user.tipo_usuario != "fisio":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo un fisioterapeuta puede consultar las métricas")
+    return current_user
+
+
+# main.py solo monta este router si METRICAS_HABILITADAS está activo
+router = APIRouter(prefix="/metricas", tags=["Métricas"], dependencies=[Depends(solo_fisioterapeuta)])
+
+
+@router.get("/db-pool")
+def metricas_pool():
+    """
+    Indicadores del pool de conexiones de este worker:
+    conexiones en uso, sesiones esperando y tiempos de espera por checkout.
+    """
+    return obtener_metricas_pool()
+
+
+@router.get("/sentencias")
+def metricas_sentencias():
+    """
+    Llamadas, errores y latencia de cada sentencia del registro (data/sentencias.py)
+    en este worker, ordenadas por tiempo total.
+    """
+    return obtener_metricas_sentencias()
+
+
+@router.get("/cache")
+def metricas_cache():
+    """
+    Aciertos, entradas obsoletas servidas, fallos y recargas de la caché de
+    resúmenes del paciente en este worker.
+    """
+    return obtener_metricas_cache()
+
+
+@router.get("/tokens")
+def metricas_tokens():
+    """
+    Tamaño, aciertos y fallos de la caché de tokens verificados de este worker.
+    """
+    return cache_tokens.metricas()
+
+
+@router.get("/bcrypt")
+def metricas_bcrypt():
+    """
+    Cola del pool de procesos de bcrypt de este worker: solicitudes en curso o
+    esperando, rechazadas por cola llena y tiempo de espera hasta el resultado.
+    """
+    return obtener_metricas_bcrypt()
@@ -1,31 +1,68 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, BackgroundTasks, Query, Request, Response
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from presentation.routers.auth_router import get_current_user
-from logic.email_service import send_patient_credentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from presentation.routers.auth_router import get_current_user, servicio_ocupado
+from config.security import BcryptOcupado
+from logic.email_service import send_patient_credentials, send_patient_credentials_batch
+from config.config import CSV_IMPORTACION_MAX_FILAS
 
 
 
 from presentation.schemas.usuario_schema import (
     PacienteCreate, 
     ActualizarPerfilPaciente,
-    InfoPacienteResponse
+    InfoPacienteResponse,
+    PacienteResumenResponse,
+    CarteraPacienteResponse
 )
-from data.db import get_db
-from sqlalchemy import text
+from presentation.schemas.ejercicio_schema import (
+    EjercicioCompletadoResponse,
+    EjercicioAsignadoResponse,
+    AsignarEjercicios
+)
+from presentation.schemas.progreso_schema import (
+    HistorialTerapiasResponse,
+    ResumenGruposResponse,
+    AsignadosPorGrupoResponse,
+    DashboardPacienteResponse,
+    DetallePacienteResponse
+)
+from presentation.schemas.calificacion_schema import CalificacionRegistroResponse
+from data.db import (
+    get_db, get_async_db, get_read_db, get_async_read_db, fabrica_lectura_async, en_sesion_lectura,
+    registrar_escritura
+)
+from data import sentencias
+from data.sentencias import ejecutar, ejecutar_async
 from logic.paciente_service import (
     crear,
+    importar_pacientes,
     obtener_info_paciente,
     actualizar_perfil_paciente
 )
+from logic.ejercicios_service import obtener_catalogo, obtener_catalogo_async
+from logic.cache_service import invalidar_paciente
+from presentation.etag import etag_paciente, etag_paciente_async, responder_condicional
+from presentation.paginacion import Pagina
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from logic.fisio_service import exportar_terapias_fisio
 from logic.terapia_service import (
-    obtener_historial_terapias_completadas,
-    obtener_resumen_grupos_terapia,
+    obtener_historial_terapias_completadas_async,
+    obtener_resumen_grupos_terapia_async,
+    obtener_dashboard_paciente_async,
     verificar_y_actualizar_estado_paciente,
     obtener_estado_paciente,
-    activar_paciente  # Importar la nueva función activar_paciente
+    asignar_ejercicios
 )
-from datetime import datetime
+from datetime import date
+from typing import List, Literal, Optional
+import asyncio
+import csv
+import io
 import traceback
+import psycopg2
 from presentation.routers.auth_router import get_current_user_cedula
 
 router = APIRouter(prefix="/paciente", tags=["Paciente"])
@@ -36,7 +73,7 @@ router = APIRouter(prefix="/paciente", tags=["Paciente"])
 from fastapi import Depends
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def registrar(
+async def registrar(
     datos: PacienteCreate,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)   # ← AQUI SE AGREGA
@@ -48,7 +85,7 @@ def registrar(
         # Obtener la cédula del fisioterapeuta que está logueado
         cedula_fisio = current_user.cedula
 
-        usuario, contrasena_generada = crear(
+        usuario, contrasena_generada = await crear(
             db=db,
             cedula=datos.cedula,
             correo=datos.email,
@@ -57,7 +94,8 @@ def registrar(
             historiaclinica=datos.historiaclinica
         )
          # 🔥 ENVIAR CORREO AQUÍ 🔥
-        send_patient_credentials(
+        await run_in_threadpool(
+            send_patient_credentials,
             to=usuario.correo,
             nombre=usuario.nombre,
             cedula=usuario.cedula,
@@ -65,17 +103,7 @@ def registrar(
             contrasena=contrasena_generada
         )
 
-
-        # Crear relación en TRATA (unión fisio – paciente)
-        query = text("""
-            INSERT INTO trata (cedula_fisioterapeuta, cedula_paciente)
-            VALUES (:cedula_fisioterapeuta, :cedula_paciente)
-        """)
-        db.execute(query, {
-            "cedula_fisioterapeuta": cedula_fisio,
-            "cedula_paciente": datos.cedula
-        })
-        db.commit()
+        await run_in_threadpool(_vincular_fisio, db, cedula_fisio, datos.cedula)
 
         return {
             "mensaje": f"Paciente {usuario.nombre} registrado correctamente",
@@ -93,6 +121,8 @@ def registrar(
     
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except BcryptOcupado:
+        raise servicio_ocupado()
     except Exception as e:
         print("ERROR COMPLETO:")
         print(traceback.format_exc())
@@ -101,6 +131,107 @@ def registrar(
             detail=f"Error al registrar usuario: {str(e)}"
         )
 
+def _vincular_fisio(db: Session, cedula_fisio: str, cedula_paciente: str):
+    # Crear relación en TRATA (unión fisio – paciente)
+    ejecutar(db, sentencias.INSERTAR_TRATA, {
+        "cedula_fisioterapeuta": cedula_fisio,
+        "cedula_paciente": cedula_paciente
+    })
+    db.commit()
+
+# ============================================================
+# 1.1 IMPORTACIÓN MASIVA DE PACIENTES (CSV)
+# ============================================================
+COLUMNAS_CSV = ("cedula", "email", "nombre", "telefono", "historiaclinica")
+
+
+def _leer_csv_pacientes(archivo):
+    """
+    Lee el CSV fila a fila y valida cada una con PacienteCreate.
+    Retorna (válidos, rechazados); los rechazados llevan la línea del archivo y el motivo.
+    """
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    try:
+        lector = csv.DictReader(texto)
+        faltantes = [c for c in COLUMNAS_CSV if c not in (lector.fieldnames or [])]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+
+        validos, rechazados = [], []
+        cedulas, correos = set(), set()
+        for registro in lector:
+            if len(validos) + len(rechazados) >= CSV_IMPORTACION_MAX_FILAS:
+                raise ValueError(f"El archivo supera el máximo de {CSV_IMPORTACION_MAX_FILAS} filas")
+            linea = lector.line_num
+            try:
+                datos = PacienteCreate(**{c: (registro.get(c) or "").strip() for c in COLUMNAS_CSV})
+            except ValidationError as e:
+                rechazados.append({
+                    "linea": linea,
+                    "cedula": registro.get("cedula"),
+                    "error": "; ".join(f"{err['loc'][-1]}: {err['msg']}" for err in e.errors())
+                })
+                continue
+
+            if datos.cedula in cedulas or datos.email in correos:
+                rechazados.append({"linea": linea, "cedula": datos.cedula, "error": "Cédula o correo repetido en el archivo"})
+                continue
+            cedulas.add(datos.cedula)
+            correos.add(datos.email)
+            validos.append({"linea": linea, **datos.model_dump()})
+
+        return validos, rechazados
+    except UnicodeDecodeError:
+        raise ValueError("El archivo debe estar codificado en UTF-8")
+    finally:
+        texto.detach()
+
+
+@router.post("/importar-csv", status_code=status.HTTP_201_CREATED)
+async def importar_pacientes_csv(
+    background_tasks: BackgroundTasks,
+    archivo: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Registra varios pacientes desde un CSV (columnas: cedula, email, nombre, telefono,
+    historiaclinica) y los asocia al fisioterapeuta logueado.
+    Las filas inválidas o ya registradas se reportan sin detener la importación.
+    Los correos con las credenciales se envían después de responder.
+    """
+    try:
+        cedula_fisio = current_user.cedula
+        validos, rechazados = await run_in_threadpool(_leer_csv_pacientes, archivo.file)
+        credenciales, ya_registrados = await importar_pacientes(db, validos, cedula_fisio)
+        rechazados = sorted(rechazados + ya_registrados, key=lambda r: r["linea"])
+
+        if credenciales:
+            background_tasks.add_task(send_patient_credentials_batch, credenciales)
+
+        return {
+            "mensaje": f"{len(credenciales)} pacientes importados correctamente",
+            "cedula_fisio": cedula_fisio,
+            "importados": [c["cedula"] for c in credenciales],
+            "rechazados": rechazados
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except psycopg2.IntegrityError:
+        # Otro registro entró con la misma cédula o correo mientras se importaba
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Algunos pacientes se registraron mientras se importaba el archivo. Intenta de nuevo."
+        )
+    except Exception as e:
+        print("ERROR COMPLETO:")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al importar pacientes: {str(e)}"
+        )
+
 # ============================================================
 # 2 OBTENER LISTA DE EJERCICIOS
 # ============================================================
@@ -109,31 +240,15 @@ def registrar(
 @router.get("/ejercicios")
 def obtener_ejercicios(db: Session = Depends(get_db)):
     """
-    Devuelve todos los ejercicios disponibles con sus videos
+    Devuelve todos los ejercicios disponibles con sus videos (catálogo en memoria)
     """
     try:
-        query = text("""
-            SELECT e.id_ejercicio, e.nombre, e.descripcion, e.repeticion, e.url, ext.nombre as extremidad
-            FROM Ejercicio e
-            LEFT JOIN Extremidad ext ON e.id_extremidad = ext.id_extremidad
-        """)
-        ejercicios = db.execute(query).fetchall()
+        catalogo = obtener_catalogo(db)
 
-        if not ejercicios:
+        if not catalogo.lista:
             print(" No hay ejercicios en la base de datos.")
-            return []
 
-        return [
-            {
-                "id_ejercicio": e[0],
-                "nombre": e[1],
-                "descripcion": e[2],
-                "repeticiones": e[3],
-                "url_video": e[4],
-                "extremidad": e[5] if e[5] else "General"
-            }
-            for e in ejercicios
-        ]
+        return catalogo.lista
     except Exception as e:
         import traceback, sys
         print(" ERROR EN /paciente/ejercicios:")
@@ -145,21 +260,27 @@ def obtener_ejercicios(db: Session = Depends(get_db)):
 # ============================================================
 # 3 OBTENER TODOS LOS PACIENTES
 # ============================================================
-@router.get("/todos")
-def obtener_todos_pacientes(
+@router.get("/todos", response_model=List[PacienteResumenResponse])
+async def obtener_todos_pacientes(
     fisio_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    pagina: Pagina = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    Pacientes del fisioterapeuta en orden de nombre, paginados por cursor
+    (presentation/paginacion.py)
+    """
     try:
-        query = text("""
-            SELECT p.cedula, p.nombre, p.correo, p.telefono, p.estado
-            FROM Paciente p
-            INNER JOIN trata t ON p.cedula = t.cedula_paciente
-            WHERE t.cedula_fisioterapeuta = :fisio_id
-            ORDER BY p.nombre
-        """)
+        query = sentencias.PACIENTES_FISIO
 
-        pacientes = db.execute(query, {"fisio_id": fisio_id}).fetchall()
+        resultado = await ejecutar_async(db, query, {
+            "fisio_id": fisio_id, **pagina.parametros("pacientes", ("cursor_nombre", "cursor_cedula"))
+        })
+        total = None
+        if pagina.incluir_total:
+            total = (await ejecutar_async(db, sentencias.CONTAR_PACIENTES_FISIO, {"fisio_id": fisio_id})).scalar()
+        pacientes = pagina.cerrar(response, "pacientes", resultado.fetchall(), lambda p: (p[1], p[0]), total)
 
         return [
             {
@@ -167,11 +288,16 @@ def obtener_todos_pacientes(
                 "nombre": p[1],
                 "correo": p[2],
                 "telefono": p[3],
-                "estado": p[4]
+                "estado": p[4],
+                "progreso": float(p[5]) if p[5] is not None else 0,
+                "ejercicios_pendientes": p[6],
+                "ejercicios_completados": p[7]
             }
             for p in pacientes
         ]
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Error: {str(e)}")
 
@@ -185,13 +311,9 @@ def obtener_paciente(
     db: Session = Depends(get_db)
 ):
     try:
-        query = text("""
-            SELECT p.nombre, p.correo, p.telefono, p.historiaclinica
-            FROM Paciente p
-            WHERE p.cedula = :cedula
-        """)
+        query = sentencias.PACIENTE
 
-        paciente = db.execute(query, {"cedula": cedula}).fetchone()
+        paciente = ejecutar(db, query, {"cedula": cedula}).fetchone()
 
         if not paciente:
             raise HTTPException(404, "Paciente no encontrado")
@@ -206,46 +328,6 @@ def obtener_paciente(
     except Exception as e:
         raise HTTPException(500, str(e))
 
-# ============================================================
-# 4 BUSCAR PACIENTE POR CÉDULA Y FISIO
-# ============================================================
-@router.get("/{cedula}")
-def obtener_paciente(
-    cedula: str,
-    fisio_id: str,
-    db: Session = Depends(get_db)
-):
-    try:
-        query = text("""
-            SELECT p.nombre, p.correo, p.telefono, p.historiaclinica
-            FROM Paciente p
-            INNER JOIN trata t ON p.cedula = t.cedula_paciente
-            WHERE p.cedula = :cedula
-            AND t.cedula_fisioterapeuta = :fisio_id
-        """)
-
-        paciente = db.execute(query, {
-            "cedula": cedula,
-            "fisio_id": fisio_id
-        }).fetchone()
-
-        if not paciente:
-            raise HTTPException(404, "Paciente no encontrado o no pertenece a este fisioterapeuta")
-
-        return {
-            "nombre": paciente[0],
-            "correo": paciente[1],
-            "telefono": paciente[2],
-            "historiaclinica": paciente[3]
-        }
-
-    except Exception as e:
-        raise HTTPException(500, str(e))
-
-
-    
-
-    
 @router.get("/info-paciente", response_model=InfoPacienteResponse)
 def obtener_info_paciente_endpoint(
     cedula: str = Depends(get_current_user_cedula),
@@ -286,6 +368,7 @@ def actualizar_perfil_paciente_endpoint(
             correo=datos.correo,
             telefono=datos.telefono
         )
+        invalidar_paciente(cedula)
         
         return info_actualizada
     
@@ -305,53 +388,39 @@ def actualizar_perfil_paciente_endpoint(
 # 5 ASIGNAR EJERCICIOS A PACIENTE
 # ============================================================
 @router.post("/asignar-ejercicio")
-def asignar_ejercicio(payload: dict, db: Session = Depends(get_db)):
+def asignar_ejercicio(payload: AsignarEjercicios, db: Session = Depends(get_db)):
     """
     Asigna uno o varios ejercicios a un paciente con número de grupo de terapia automático
-    y activa al paciente si estaba inactivo
+    y activa al paciente si estaba inactivo (una transacción, logic/terapia_service.asignar_ejercicios)
     """
-    cedula = payload.get("cedula_paciente")
-    ejercicios = payload.get("ejercicios", [])
-
-    if not cedula:
-        raise HTTPException(status_code=400, detail="Debe proporcionar una cédula de paciente.")
-    if not ejercicios:
-        raise HTTPException(status_code=400, detail="Debe seleccionar al menos un ejercicio.")
+    cedula = payload.cedula_paciente
+    ejercicios = payload.ejercicios
 
     try:
-        query_ultimo_grupo = text("""
-            SELECT COALESCE(MAX(Grupo_terapia), 0) as ultimo_grupo
-            FROM Terapia_Asignada
-            WHERE Cedula_paciente = :cedula
-        """)
-        resultado = db.execute(query_ultimo_grupo, {"cedula": cedula}).fetchone()
-        ultimo_grupo = resultado[0] if resultado else 0
-        
-        nuevo_grupo = ultimo_grupo + 1
-        
-        print(f"[DEBUG] Paciente {cedula}: Último grupo = {ultimo_grupo}, Nuevo grupo = {nuevo_grupo}")
-
-        for id_ejercicio in ejercicios:
-            query = text("""
-                INSERT INTO Terapia_Asignada (Grupo_terapia, Cedula_paciente, Id_ejercicio, Estado, Fecha_asignacion)
-                VALUES (:grupo, :cedula, :id_ejercicio, 'Pendiente', :fecha)
-            """)
-            db.execute(query, {
-                "grupo": nuevo_grupo,
-                "cedula": cedula,
-                "id_ejercicio": id_ejercicio,
-                "fecha": datetime.now().date()
-            })
-        db.commit()
+        if obtener_catalogo(db, ejercicios).faltantes(ejercicios):
+            raise HTTPException(status_code=400, detail="Alguno de los ejercicios no existe.")
+
+        asignacion = asignar_ejercicios(db, cedula, ejercicios, date.today())
+        if asignacion is None:
+            raise HTTPException(status_code=404, detail="Paciente no encontrado")
+        grupo, activado = asignacion
 
-        estado_resultado = activar_paciente(db, cedula)
+        registrar_escritura(cedula)
+        invalidar_paciente(cedula)
 
         return {
             "mensaje": "Ejercicios asignados correctamente",
-            "grupo_terapia": nuevo_grupo,
+            "grupo_terapia": grupo,
             "total_ejercicios": len(ejercicios),
-            "estado_paciente": estado_resultado
+            "estado_paciente": {
+                "cambio_realizado": activado,
+                "nuevo_estado": "activo",
+                "razon": ("Se han asignado nuevos ejercicios al paciente" if activado
+                          else "El paciente ya estaba activo")
+            }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         print(traceback.format_exc())
@@ -360,52 +429,48 @@ def asignar_ejercicio(payload: dict, db: Session = Depends(get_db)):
 # ============================================================
 # 6 OBTENER EJERCICIOS COMPLETADOS DE UN PACIENTE
 # ============================================================
-@router.get("/ejercicios-completados/{cedula}")
-def obtener_ejercicios_completados(cedula: str, db: Session = Depends(get_db)):
+@router.get("/ejercicios-completados/{cedula}", response_model=List[EjercicioCompletadoResponse],
+            dependencies=[Depends(etag_paciente)])
+def obtener_ejercicios_completados(
+    cedula: str,
+    response: Response,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    pagina: Pagina = Depends(),
+    db: Session = Depends(get_read_db)
+):
     """
-    Obtiene todos los ejercicios completados de un paciente específico
-    incluyendo la URL del video de Cloudinary y el grupo de terapia
+    Obtiene los ejercicios completados de un paciente específico
+    incluyendo la URL del video de Cloudinary y el grupo de terapia.
+    desde/hasta (opcionales) acotan por fecha de asignación.
+    Paginado por cursor (presentation/paginacion.py).
     """
     try:
-        query = text("""
-            SELECT 
-                e.Id_ejercicio,
-                e.Nombre,
-                e.Descripcion,
-                e.Repeticion,
-                e.Url,
-                ext.Nombre as Extremidad,
-                ta.Fecha_realizacion,
-                ta.Observaciones,
-                ta.Grupo_terapia
-            FROM Terapia_Asignada ta
-            INNER JOIN Ejercicio e ON ta.Id_ejercicio = e.Id_ejercicio
-            LEFT JOIN Extremidad ext ON e.Id_extremidad = ext.Id_extremidad
-            WHERE ta.Cedula_paciente = :cedula 
-            AND ta.Estado = 'Completado'
-            ORDER BY ta.Grupo_terapia DESC, ta.Fecha_realizacion DESC
-        """)
+        query = sentencias.EJERCICIOS_COMPLETADOS
+        filtros = {"cedula": cedula, "desde": desde, "hasta": hasta}
         
-        ejercicios = db.execute(query, {"cedula": cedula}).fetchall()
+        ejercicios = ejecutar(db, query, {
+            **filtros, **pagina.parametros("terapias", ("cursor_grupo", "cursor_fecha", "cursor_id"))
+        }).fetchall()
+        total = ejecutar(db, sentencias.CONTAR_COMPLETADAS, filtros).scalar() if pagina.incluir_total else None
+        ejercicios = pagina.cerrar(response, "terapias", ejercicios, lambda e: (e[3], e[1], e[4]), total)
         
         if not ejercicios:
             return []
         
+        catalogo = obtener_catalogo(db, {e[0] for e in ejercicios})
         return [
             {
-                "id_ejercicio": e[0],
-                "nombre": e[1],
-                "descripcion": e[2],
-                "repeticiones": e[3],
-                "url_video": e[4],
-                "extremidad": e[5] if e[5] else "General",
-                "fecha_realizacion": e[6].isoformat() if e[6] else None,
-                "observaciones": e[7],
-                "grupo_terapia": e[8]
+                **catalogo.datos(e[0]),
+                "fecha_realizacion": e[1].isoformat() if e[1] else None,
+                "observaciones": e[2],
+                "grupo_terapia": e[3]
             }
             for e in ejercicios
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         print("ERROR EN /paciente/ejercicios-completados:")
         print(traceback.format_exc())
@@ -417,48 +482,28 @@ def obtener_ejercicios_completados(cedula: str, db: Session = Depends(get_db)):
 # ============================================================
 # 7 OBTENER EJERCICIOS ASIGNADOS DE UN PACIENTE
 # ============================================================
-@router.get("/ejercicios-asignados/{cedula}")
-def obtener_ejercicios_asignados(cedula: str, db: Session = Depends(get_db)):
+@router.get("/ejercicios-asignados/{cedula}", response_model=List[EjercicioAsignadoResponse],
+            dependencies=[Depends(etag_paciente)])
+def obtener_ejercicios_asignados(cedula: str, db: Session = Depends(get_read_db)):
     """
     Obtiene todos los ejercicios asignados (estado Pendiente) de un paciente específico
     incluyendo la URL del video de Cloudinary y el grupo de terapia
     """
     try:
-        query = text("""
-            SELECT 
-                e.Id_ejercicio,
-                e.Nombre,
-                e.Descripcion,
-                e.Repeticion,
-                e.Url,
-                ext.Nombre as Extremidad,
-                ta.Fecha_asignacion,
-                ta.Id_terapia,
-                ta.Grupo_terapia
-            FROM Terapia_Asignada ta
-            INNER JOIN Ejercicio e ON ta.Id_ejercicio = e.Id_ejercicio
-            LEFT JOIN Extremidad ext ON e.Id_extremidad = ext.Id_extremidad
-            WHERE ta.Cedula_paciente = :cedula 
-            AND ta.Estado = 'Pendiente'
-            ORDER BY ta.Grupo_terapia DESC, ta.Fecha_asignacion DESC
-        """)
+        query = sentencias.EJERCICIOS_ASIGNADOS
         
-        ejercicios = db.execute(query, {"cedula": cedula}).fetchall()
+        ejercicios = ejecutar(db, query, {"cedula": cedula}).fetchall()
         
         if not ejercicios:
             return []
         
+        catalogo = obtener_catalogo(db, {e[0] for e in ejercicios})
         return [
             {
-                "id_ejercicio": e[0],
-                "nombre": e[1],
-                "descripcion": e[2],
-                "repeticiones": e[3],
-                "url_video": e[4],
-                "extremidad": e[5] if e[5] else "General",
-                "fecha_asignacion": e[6].isoformat() if e[6] else None,
-                "id_terapia": e[7],
-                "grupo_terapia": e[8]
+                **catalogo.datos(e[0]),
+                "fecha_asignacion": e[1].isoformat() if e[1] else None,
+                "id_terapia": e[2],
+                "grupo_terapia": e[3]
             }
             for e in ejercicios
         ]
@@ -474,19 +519,45 @@ def obtener_ejercicios_asignados(cedula: str, db: Session = Depends(get_db)):
 # ============================================================
 # 8 OBTENER HISTORIAL DE TERAPIAS
 # ============================================================
-@router.get("/historial-terapias/{cedula}")
-def obtener_historial_terapias(cedula: str, db: Session = Depends(get_db)):
+@router.get("/historial-terapias/{cedula}", response_model=HistorialTerapiasResponse)
+async def obtener_historial_terapias(
+    cedula: str,
+    response: Response,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    pagina: Pagina = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    version: Optional[int] = Depends(etag_paciente_async)
+):
     """
-    Obtiene el historial completo de terapias completadas de un paciente
-    organizadas por grupo de terapia
+    Obtiene el historial de terapias completadas de un paciente
+    organizadas por grupo de terapia.
+    desde/hasta (opcionales) acotan por fecha de asignación.
+    Paginado por cursor (presentation/paginacion.py). total_terapias_completadas es el total
+    del paciente (con los mismos filtros de fecha) y solo se calcula con ?incluir_total=true;
+    si no, es null.
     """
     try:
-        historial = obtener_historial_terapias_completadas(db, cedula)
+        historial = await obtener_historial_terapias_completadas_async(
+            db, cedula, desde, hasta, version,
+            pagina.parametros("terapias", ("cursor_grupo", "cursor_fecha", "cursor_id"))
+        )
+        total = None
+        if pagina.incluir_total:
+            total = (await ejecutar_async(db, sentencias.CONTAR_COMPLETADAS, {
+                "cedula": cedula, "desde": desde, "hasta": hasta
+            })).scalar()
+        historial = pagina.cerrar(
+            response, "terapias", historial,
+            lambda t: (t["grupo_terapia"], t["fecha_realizacion"], t["id_terapia"]), total
+        )
         return {
             "cedula": cedula,
-            "total_terapias_completadas": len(historial),
+            "total_terapias_completadas": total,
             "historial": historial
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print("ERROR EN /paciente/historial-terapias:")
         print(traceback.format_exc())
@@ -498,14 +569,18 @@ def obtener_historial_terapias(cedula: str, db: Session = Depends(get_db)):
 # ============================================================
 # 9 OBTENER RESUMEN DE GRUPOS DE TERAPIA
 # ============================================================
-@router.get("/resumen-grupos/{cedula}")
-def obtener_resumen_grupos(cedula: str, db: Session = Depends(get_db)):
+@router.get("/resumen-grupos/{cedula}", response_model=ResumenGruposResponse)
+async def obtener_resumen_grupos(
+    cedula: str,
+    db: AsyncSession = Depends(get_async_read_db),
+    version: Optional[int] = Depends(etag_paciente_async)
+):
     """
     Obtiene un resumen de los grupos de terapia de un paciente
     con información de progreso y estado
     """
     try:
-        resumen = obtener_resumen_grupos_terapia(db, cedula)
+        resumen = await obtener_resumen_grupos_terapia_async(db, cedula, version)
         return {
             "cedula": cedula,
             "total_grupos": len(resumen),
@@ -554,6 +629,8 @@ def verificar_estado(cedula: str, db: Session = Depends(get_db)):
     """
     try:
         resultado = verificar_y_actualizar_estado_paciente(db, cedula)
+        registrar_escritura(cedula)
+        invalidar_paciente(cedula)
         return resultado
     except Exception as e:
         print("ERROR EN /paciente/verificar-estado:")
@@ -563,38 +640,24 @@ def verificar_estado(cedula: str, db: Session = Depends(get_db)):
             detail=f"Error al verificar estado: {str(e)}"
         )
 
-@router.get("/ejercicios-asignados-por-grupo/{cedula}")
-def obtener_ejercicios_asignados_por_grupo(cedula: str, db: Session = Depends(get_db)):
+@router.get("/ejercicios-asignados-por-grupo/{cedula}", response_model=AsignadosPorGrupoResponse,
+            dependencies=[Depends(etag_paciente_async)])
+async def obtener_ejercicios_asignados_por_grupo(cedula: str, db: AsyncSession = Depends(get_async_read_db)):
     """
     Obtiene todos los ejercicios asignados de un paciente organizados por grupo de terapia
     Incluye solo ejercicios en estado 'Pendiente' o 'En Progreso'
     """
     try:
-        query = text("""
-            SELECT 
-                ta.Grupo_terapia,
-                ta.Id_terapia,
-                e.Id_ejercicio,
-                e.Nombre,
-                e.Descripcion,
-                e.Repeticion,
-                e.Url,
-                ext.Nombre as Extremidad,
-                ta.Estado,
-                ta.Fecha_asignacion
-            FROM Terapia_Asignada ta
-            INNER JOIN Ejercicio e ON ta.Id_ejercicio = e.Id_ejercicio
-            LEFT JOIN Extremidad ext ON e.Id_extremidad = ext.Id_extremidad
-            WHERE ta.Cedula_paciente = :cedula 
-            AND ta.Estado IN ('Pendiente', 'En Progreso')
-            ORDER BY ta.Grupo_terapia DESC, ta.Fecha_asignacion DESC
-        """)
+        query = sentencias.ASIGNADOS_POR_GRUPO
         
-        ejercicios = db.execute(query, {"cedula": cedula}).fetchall()
+        resultado = await ejecutar_async(db, query, {"cedula": cedula})
+        ejercicios = resultado.fetchall()
         
         if not ejercicios:
             return {"grupos": []}
         
+        catalogo = await obtener_catalogo_async(db, {e[2] for e in ejercicios})
+
         # Agrupar por Grupo_terapia
         grupos_dict = {}
         for e in ejercicios:
@@ -607,14 +670,9 @@ def obtener_ejercicios_asignados_por_grupo(cedula: str, db: Session = Depends(ge
             
             grupos_dict[grupo_num]["ejercicios"].append({
                 "id_terapia": e[1],
-                "id_ejercicio": e[2],
-                "nombre": e[3],
-                "descripcion": e[4],
-                "repeticiones": e[5],
-                "url_video": e[6],
-                "extremidad": e[7] if e[7] else "General",
-                "estado": e[8],
-                "fecha_asignacion": e[9].isoformat() if e[9] else None
+                **catalogo.datos(e[2]),
+                "estado": e[3],
+                "fecha_asignacion": e[4].isoformat() if e[4] else None
             })
         
         # Convertir a lista ordenada por grupo descendente
@@ -630,46 +688,284 @@ def obtener_ejercicios_asignados_por_grupo(cedula: str, db: Session = Depends(ge
 # ============================================================
 # 12 OBTENER CALIFICACIONES DE UN PACIENTE (SOLO LECTURA)
 # ============================================================
-@router.get("/calificaciones/{cedula}")
-def obtener_calificaciones(
+async def _leer_calificaciones(db: AsyncSession, response: Response, cedula: str,
+                              desde: Optional[date], hasta: Optional[date], pagina: Pagina):
+    """
+    Página de calificaciones (también la usa /detalle/{cedula}); pone las cabeceras de paginación.
+    """
+    query = sentencias.CALIFICACIONES
+    filtros = {"cedula": cedula, "desde": desde, "hasta": hasta}
+
+    resultado = await ejecutar_async(db, query, {
+        **filtros, **pagina.parametros("calificaciones", ("cursor_fecha", "cursor_id"))
+    })
+    total = None
+    if pagina.incluir_total:
+        total = (await ejecutar_async(db, sentencias.CONTAR_CALIFICACIONES, filtros)).scalar()
+    resultados = pagina.cerrar(
+        response, "calificaciones", resultado.fetchall(), lambda r: (r.fecha_realizacion, r.id_terapia), total
+    )
+    catalogo = await obtener_catalogo_async(db, {r.id_ejercicio for r in resultados})
+
+    return [
+        {
+            "ejercicio": catalogo.datos(r.id_ejercicio)["nombre"],
+            "dolor": r.dolor,
+            "sensacion": r.sensacion,
+            "cansancio": r.cansancio,
+            "observaciones": r.observaciones,
+            "fecha_realizado": r.fecha_realizacion
+        }
+        for r in resultados
+    ]
+
+
+@router.get("/calificaciones/{cedula}", response_model=List[CalificacionRegistroResponse],
+            dependencies=[Depends(etag_paciente_async)])
+async def obtener_calificaciones(
     cedula: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    pagina: Pagina = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Calificaciones de los ejercicios realizados, de la más reciente a la más antigua.
+    Paginado por cursor (presentation/paginacion.py).
+    """
+    try:
+        return await _leer_calificaciones(db, response, cedula, desde, hasta, pagina)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("ERROR EN /paciente/calificaciones:", e)
+        raise HTTPException(status_code=500, detail="Error obteniendo calificaciones")
+
+
+# ============================================================
+# 13 EXPORTAR TERAPIAS DE TODOS LOS PACIENTES DEL FISIO
+# ============================================================
+@router.get("/exportar")
+def exportar_terapias(
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    current_user = Depends(get_current_user)
+):
+    """
+    Descarga en streaming todas las terapias de los pacientes del fisioterapeuta logueado
+    (una fila por terapia; los pacientes sin terapias aparecen con los campos de terapia vacíos).
+    """
+    if current_user.tipo_usuario != "fisio":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo un fisioterapeuta puede exportar")
+
+    nombre = f"terapias_{current_user.cedula}_{date.today().isoformat()}.{formato}"
+    return StreamingResponse(
+        exportar_terapias_fisio(current_user.cedula, formato),
+        media_type="text/csv" if formato == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
+
+
+# ============================================================
+# 14 DASHBOARD DEL PACIENTE (TODO EN UNA SOLICITUD)
+# ============================================================
+@router.get("/dashboard", response_model=DashboardPacienteResponse)
+async def obtener_dashboard(
+    request: Request,
+    response: Response,
+    cedula: str = Depends(get_current_user_cedula)
 ):
+    """
+    Datos del paciente logueado, ejercicios asignados (también por grupo), historial de
+    terapias completadas y resumen por grupo en una sola respuesta. Dos consultas: el
+    paciente con su versión (ETag; 304 sin más consultas si no cambió) y sus terapias.
+    """
     try:
-        query = text("""
-            SELECT 
-                e.nombre AS ejercicio,
-                t.dolor,
-                t.sensacion,
-                t.cansancio,
-                t.observaciones,
-                t.fecha_realizacion
-            FROM terapia_asignada t
-            INNER JOIN ejercicio e 
-                ON t.id_ejercicio = e.id_ejercicio
-            WHERE t.cedula_paciente = :cedula
-              AND t.fecha_realizacion IS NOT NULL   -- el paciente ya lo realizó
-            ORDER BY t.fecha_realizacion DESC
-        """)
-
-        resultados = db.execute(query, {"cedula": cedula}).fetchall()
-
-        lista = [
+        async with (await fabrica_lectura_async(cedula))() as db:
+            paciente = (await ejecutar_async(db, sentencias.PACIENTE_DASHBOARD, {"cedula": cedula})).fetchone()
+            if not paciente:
+                raise HTTPException(status_code=404, detail="Paciente no encontrado")
+
+            catalogo = await obtener_catalogo_async(db)
+            # Misma URL para todos los pacientes: el 200 y el 304 varían según el token
+            responder_condicional(request, response, paciente.version, catalogo.version, identidad=cedula,
+                                  extra={"Vary": "Authorization"})
+
+            secciones = await obtener_dashboard_paciente_async(db, cedula, paciente.version)
+
+        return {
+            "cedula": cedula,
+            "paciente": {
+                "nombre": paciente.nombre,
+                "correo": paciente.correo,
+                "telefono": paciente.telefono,
+                "historiaclinica": paciente.historiaclinica
+            },
+            **secciones
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("ERROR EN /paciente/dashboard:")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener el dashboard: {str(e)}"
+        )
+
+
+# ============================================================
+# 15 CARTERA DE PACIENTES DEL FISIO (FILTROS, ORDEN Y PAGINACIÓN)
+# ============================================================
+def _prefijo_like(buscar: Optional[str]):
+    if not buscar:
+        return None
+    escapado = buscar.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escapado + "%"
+
+
+@router.get("/cartera", response_model=List[CarteraPacienteResponse])
+async def obtener_cartera(
+    response: Response,
+    estado: Optional[Literal["activo", "inactivo"]] = None,
+    buscar: Optional[str] = Query(None, max_length=100, description="Prefijo del nombre o de la cédula"),
+    orden: Literal["nombre", "progreso", "pendientes", "ultima_actividad"] = "nombre",
+    descendente: bool = False,
+    pagina: Pagina = Depends(),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Pacientes del fisioterapeuta logueado con ejercicios pendientes/completados, progreso,
+    grupo actual y última actividad, en una sola consulta. Filtra por estado y por prefijo
+    de nombre o cédula; paginado por cursor (presentation/paginacion.py).
+    """
+    if current_user.tipo_usuario != "fisio":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo un fisioterapeuta puede ver su cartera")
+
+    try:
+        tipo = f"cartera_{orden}"
+        filtros = {"fisio_id": current_user.cedula, "estado": estado, "prefijo": _prefijo_like(buscar)}
+
+        resultado = await ejecutar_async(db, sentencias.CARTERA_FISIO[(orden, descendente)], {
+            **filtros, **pagina.parametros(tipo, ("cursor_valor", "cursor_cedula"))
+        })
+        total = None
+        if pagina.incluir_total:
+            total = (await ejecutar_async(db, sentencias.CONTAR_CARTERA_FISIO, filtros)).scalar()
+        pacientes = pagina.cerrar(response, tipo, resultado.fetchall(), lambda p: (p.clave_orden, p.cedula), total)
+
+        return [
             {
-                "ejercicio": r.ejercicio,
-                "dolor": r.dolor,
-                "sensacion": r.sensacion,
-                "cansancio": r.cansancio,
-                "observaciones": r.observaciones,
-                "fecha_realizado": r.fecha_realizacion
+                "cedula": p.cedula,
+                "nombre": p.nombre,
+                "correo": p.correo,
+                "telefono": p.telefono,
+                "estado": p.estado,
+                "progreso": float(p.progreso) if p.progreso is not None else 0,
+                "ejercicios_pendientes": p.ejercicios_pendientes,
+                "ejercicios_completados": p.ejercicios_completados,
+                "grupo_actual": p.grupo_actual,
+                "ultima_actividad": p.ultima_actividad.isoformat() if p.ultima_actividad else None
             }
-            for r in resultados
+            for p in pacientes
         ]
 
-        return lista
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("ERROR EN /paciente/cartera:")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error al obtener la cartera: {str(e)}")
+
 
+# ============================================================
+# 16 DETALLE DE UN PACIENTE PARA EL FISIO (TODO EN UNA SOLICITUD)
+# ============================================================
+@router.get("/detalle/{cedula}", response_model=DetallePacienteResponse)
+async def obtener_detalle_paciente(
+    cedula: str,
+    request: Request,
+    response: Response,
+    pagina: Pagina = Depends(),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Datos del paciente, progreso por grupo y calificaciones (paginadas por cursor, como
+    /calificaciones) para el fisioterapeuta logueado. La relación en Trata se verifica una
+    vez, junto con los datos y la versión (ETag); después el progreso y las calificaciones
+    se consultan a la vez, cada una en su propia sesión.
+    """
+    if current_user.tipo_usuario != "fisio":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo un fisioterapeuta puede ver el detalle")
+
+    try:
+        paciente = (await ejecutar_async(db, sentencias.DETALLE_PACIENTE_FISIO, {
+            "cedula": cedula, "fisio_id": current_user.cedula
+        })).fetchone()
+        if not paciente:
+            raise HTTPException(404, "Paciente no encontrado o no pertenece a este fisioterapeuta")
+
+        catalogo = await obtener_catalogo_async(db)
+        responder_condicional(request, response, paciente.version, catalogo.version)
+
+        grupos, calificaciones = await asyncio.gather(
+            en_sesion_lectura(cedula, obtener_resumen_grupos_terapia_async, cedula, paciente.version),
+            en_sesion_lectura(cedula, _leer_calificaciones, response, cedula, None, None, pagina)
+        )
+
+        return {
+            "cedula": cedula,
+            "paciente": {
+                "nombre": paciente.nombre,
+                "correo": paciente.correo,
+                "telefono": paciente.telefono,
+                "historiaclinica": paciente.historiaclinica
+            },
+            "grupos": grupos,
+            "calificaciones": calificaciones
+        }
+    except HTTPException:
+        raise
     except Exception as e:
-        print("ERROR EN /paciente/calificaciones:", e)
-        raise HTTPException(status_code=500, detail="Error obteniendo calificaciones")
+        print("ERROR EN /paciente/detalle:")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener el detalle del paciente: {str(e)}"
+        )
+
+
+# ============================================================
+# 4 BUSCAR PACIENTE POR CÉDULA Y FISIO
+# ============================================================
+# Va al final: /{cedula} captura cualquier GET de un solo segmento
+# (/info-paciente, ...) declarado después de él.
+@router.get("/{cedula}")
+def obtener_paciente(
+    cedula: str,
+    fisio_id: str,
+    db: Session = Depends(get_db)
+):
+    try:
+        query = sentencias.PACIENTE_FISIO
 
+        paciente = ejecutar(db, query, {
+            "cedula": cedula,
+            "fisio_id": fisio_id
+        }).fetchone()
 
+        if not paciente:
+            raise HTTPException(404, "Paciente no encontrado o no pertenece a este fisioterapeuta")
+
+        return {
+            "nombre": paciente[0],
+            "correo": paciente[1],
+            "telefono": paciente[2],
+            "historiaclinica": paciente[3]
+        }
+
+    except Exception as e:
+        raise HTTPException(500, str(e))
@@ -1,10 +1,26 @@
 from datetime import date
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from data.db import get_db
-from logic.terapia_service import verificar_y_actualizar_estado_paciente, guardar_calificaciones_ejercicio
-from presentation.schemas.calificacion_schema import CalificacionEjercicio, CalificacionResponse
+from data.db import get_db, get_read_db, registrar_escritura
+from data import sentencias
+from data.sentencias import ejecutar
+from logic.terapia_service import (
+    verificar_y_actualizar_estado_paciente,
+    guardar_calificaciones_ejercicio,
+    registrar_completado_grupo,
+    completar_terapias_lote,
+    obtener_resumen_grupos_terapia
+)
+from logic.cache_service import invalidar_paciente
+from presentation.schemas.calificacion_schema import (
+    CalificacionEjercicio,
+    CalificacionResponse,
+    CompletarLote,
+    CompletarLoteResponse
+)
+from presentation.routers.auth_router import get_current_user_cedula
+from presentation.schemas.progreso_schema import ResumenGrupoResponse
+from typing import List
 
 router = APIRouter(prefix="/paciente", tags=["Paciente"])
 
@@ -16,32 +32,26 @@ def marcar_ejercicio_realizado(id_terapia: int, db: Session = Depends(get_db)):
     """
     try:
         # Verificamos si la terapia existe y obtenemos la cédula del paciente
-        query_select = text("""
-            SELECT Estado, Cedula_paciente
-            FROM Terapia_Asignada 
-            WHERE Id_terapia = :id_terapia
-        """)
-        terapia = db.execute(query_select, {"id_terapia": id_terapia}).fetchone()
+        terapia = ejecutar(db, sentencias.TERAPIA, {"id_terapia": id_terapia}).fetchone()
 
         if not terapia:
             raise HTTPException(status_code=404, detail="Terapia no encontrada")
 
-        cedula_paciente = terapia[1]
-
-        # Actualizamos estado y fecha
-        query_update = text("""
-            UPDATE Terapia_Asignada
-            SET Estado = 'Completado',
-                Fecha_realizacion = :fecha
-            WHERE Id_terapia = :id_terapia
-        """)
-        db.execute(query_update, {
-            "fecha": date.today(),
+        cedula_paciente = terapia[2]
+
+        # Actualizamos estado y fecha (solo si aún no estaba completada)
+        fecha = date.today()
+        completada = ejecutar(db, sentencias.MARCAR_REALIZADO, {
+            "fecha": fecha,
             "id_terapia": id_terapia
-        })
+        }).fetchone()
+        if completada:
+            registrar_completado_grupo(db, completada[0], completada[1], fecha)
         db.commit()
 
         estado_resultado = verificar_y_actualizar_estado_paciente(db, cedula_paciente)
+        registrar_escritura(cedula_paciente)
+        invalidar_paciente(cedula_paciente)
 
         return {
             "message": "Terapia marcada como completada",
@@ -56,44 +66,13 @@ def marcar_ejercicio_realizado(id_terapia: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/ejercicios-por-grupo/{cedula}")
-def obtener_ejercicios_por_grupo(cedula: str, db: Session = Depends(get_db)):
+@router.get("/ejercicios-por-grupo/{cedula}", response_model=List[ResumenGrupoResponse])
+def obtener_ejercicios_por_grupo(cedula: str, db: Session = Depends(get_read_db)):
     """
     Obtiene todos los ejercicios de un paciente agrupados por número de grupo de terapia
     """
     try:
-        query = text("""
-            SELECT 
-                ta.Grupo_terapia,
-                COUNT(*) as total_ejercicios,
-                SUM(CASE WHEN ta.Estado = 'Completado' THEN 1 ELSE 0 END) as completados,
-                MIN(ta.Fecha_asignacion) as fecha_inicio,
-                MAX(ta.Fecha_realizacion) as fecha_fin
-            FROM Terapia_Asignada ta
-            WHERE ta.Cedula_paciente = :cedula
-            GROUP BY ta.Grupo_terapia
-            ORDER BY ta.Grupo_terapia DESC
-        """)
-        
-        grupos = db.execute(query, {"cedula": cedula}).fetchall()
-        
-        if not grupos:
-            return []
-        
-        return [
-            {
-                "grupo_terapia": g[0],
-                "total_ejercicios": g[1],
-                "completados": g[2],
-                "pendientes": g[1] - g[2],
-                "progreso_porcentaje": round((g[2] / g[1]) * 100, 2) if g[1] > 0 else 0,
-                "fecha_inicio": g[3].isoformat() if g[3] else None,
-                "fecha_fin": g[4].isoformat() if g[4] else None,
-                "estado": "Completado" if g[2] == g[1] else "En Progreso"
-            }
-            for g in grupos
-        ]
-        
+        return obtener_resumen_grupos_terapia(db, cedula)
     except Exception as e:
         print("ERROR en /paciente/ejercicios-por-grupo:")
         import traceback; traceback.print_exc()
@@ -108,12 +87,7 @@ def calificar_ejercicio(calificacion: CalificacionEjercicio, db: Session = Depen
     """
     try:
         # Verificar que la terapia existe
-        query_check = text("""
-            SELECT Id_terapia, Estado
-            FROM Terapia_Asignada
-            WHERE Id_terapia = :id_terapia
-        """)
-        terapia = db.execute(query_check, {"id_terapia": calificacion.id_terapia}).fetchone()
+        terapia = ejecutar(db, sentencias.TERAPIA, {"id_terapia": calificacion.id_terapia}).fetchone()
         
         if not terapia:
             raise HTTPException(status_code=404, detail="Terapia no encontrada")
@@ -127,6 +101,8 @@ def calificar_ejercicio(calificacion: CalificacionEjercicio, db: Session = Depen
             calificacion.cansancio,
             calificacion.observaciones
         )
+        registrar_escritura(terapia[2])
+        invalidar_paciente(terapia[2])
         
         return CalificacionResponse(
             message=resultado["message"],
@@ -139,3 +115,35 @@ def calificar_ejercicio(calificacion: CalificacionEjercicio, db: Session = Depen
         print("ERROR en /paciente/calificar-ejercicio:")
         import traceback; traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/completar-lote", response_model=CompletarLoteResponse)
+def completar_lote(
+    lote: CompletarLote,
+    cedula: str = Depends(get_current_user_cedula),
+    db: Session = Depends(get_db)
+):
+    """
+    Marca como realizadas varias terapias del paciente logueado y guarda sus calificaciones
+    en una sola transacción (equivale a marcar-realizado + calificar-ejercicio por cada una).
+    Las terapias que no son del paciente se reportan en no_encontradas.
+    """
+    ids = [t.id_terapia for t in lote.terapias]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Hay terapias repetidas en el lote")
+
+    try:
+        resultado = completar_terapias_lote(db, cedula, lote.terapias, date.today())
+        if resultado is None:
+            raise HTTPException(status_code=404, detail="Ninguna terapia del lote pertenece al paciente")
+
+        registrar_escritura(cedula)
+        invalidar_paciente(cedula)
+        return resultado
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("ERROR en /paciente/completar-lote:")
+        import traceback; traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
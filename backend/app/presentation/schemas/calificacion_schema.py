@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
+from datetime import date
 
 class CalificacionEjercicio(BaseModel):
     """
@@ -24,6 +25,30 @@ class CalificacionEjercicio(BaseModel):
         }
 
 
+class CompletarTerapia(BaseModel):
+    """
+    Terapia a completar en /completar-lote, con calificaciones opcionales
+    (si la terapia ya estaba completada solo se guardan las calificaciones)
+    """
+    id_terapia: int = Field(..., description="ID de la terapia asignada")
+    dolor: Optional[int] = Field(None, ge=1, le=5, description="Nivel de dolor (1-5)")
+    sensacion: Optional[int] = Field(None, ge=1, le=5, description="Nivel de sensación (1-5)")
+    cansancio: Optional[int] = Field(None, ge=1, le=5, description="Nivel de cansancio (1-5)")
+    observaciones: Optional[str] = Field(None, max_length=500, description="Observaciones adicionales")
+
+
+class CompletarLote(BaseModel):
+    terapias: List[CompletarTerapia] = Field(..., min_length=1, max_length=200)
+
+
+class CompletarLoteResponse(BaseModel):
+    completadas: List[int]
+    ya_completadas: List[int]
+    no_encontradas: List[int]
+    pendientes: int
+    estado_paciente: str
+
+
 class CalificacionResponse(BaseModel):
     """
     Respuesta después de guardar las calificaciones
@@ -34,3 +59,15 @@ class CalificacionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CalificacionRegistroResponse(BaseModel):
+    """
+    Calificación registrada de un ejercicio (solo lectura)
+    """
+    ejercicio: Optional[str] = None
+    dolor: Optional[int] = None
+    sensacion: Optional[int] = None
+    cansancio: Optional[int] = None
+    observaciones: Optional[str] = None
+    fecha_realizado: Optional[date] = None
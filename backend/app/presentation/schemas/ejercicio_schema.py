@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class EjercicioResponse(BaseModel):
+    """
+    Ejercicio del catálogo (Catalogo.datos en logic/ejercicios_service.py)
+    """
+    id_ejercicio: int
+    nombre: Optional[str] = None
+    descripcion: Optional[str] = None
+    repeticiones: Optional[int] = None
+    url_video: Optional[str] = None
+    extremidad: str
+
+
+class EjercicioCompletadoResponse(EjercicioResponse):
+    fecha_realizacion: Optional[str] = None
+    observaciones: Optional[str] = None
+    grupo_terapia: int
+
+
+class EjercicioAsignadoResponse(EjercicioResponse):
+    fecha_asignacion: Optional[str] = None
+    id_terapia: int
+    grupo_terapia: int
+
+
+class AsignarEjercicios(BaseModel):
+    """
+    Ejercicios a asignar a un paciente (/paciente/asignar-ejercicio): forman un grupo de terapia nuevo
+    """
+    cedula_paciente: str = Field(..., min_length=1, max_length=20)
+    ejercicios: List[int] = Field(..., min_length=1, max_length=100)
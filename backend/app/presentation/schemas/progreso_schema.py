@@ -0,0 +1,91 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from presentation.schemas.ejercicio_schema import EjercicioResponse, EjercicioAsignadoResponse
+from presentation.schemas.calificacion_schema import CalificacionRegistroResponse
+
+
+class TerapiaHistorialResponse(EjercicioResponse):
+    id_terapia: int
+    grupo_terapia: int
+    fecha_realizacion: Optional[str] = None
+    observaciones: Optional[str] = None
+
+
+class HistorialTerapiasResponse(BaseModel):
+    cedula: str
+    # Total del paciente (no de la página); solo con ?incluir_total=true
+    total_terapias_completadas: Optional[int] = None
+    historial: List[TerapiaHistorialResponse]
+
+
+class ResumenGrupoResponse(BaseModel):
+    grupo_terapia: int
+    total_ejercicios: int
+    completados: Optional[int] = None
+    pendientes: int
+    progreso_porcentaje: float
+    fecha_inicio: Optional[str] = None
+    fecha_fin: Optional[str] = None
+    estado: str
+
+
+class ResumenGruposResponse(BaseModel):
+    cedula: str
+    total_grupos: int
+    grupos: List[ResumenGrupoResponse]
+
+
+class EjercicioDeGrupoResponse(EjercicioResponse):
+    id_terapia: int
+    estado: Optional[str] = None
+    fecha_asignacion: Optional[str] = None
+
+
+class GrupoAsignadoResponse(BaseModel):
+    grupo_terapia: int
+    ejercicios: List[EjercicioDeGrupoResponse]
+
+
+class AsignadosPorGrupoResponse(BaseModel):
+    grupos: List[GrupoAsignadoResponse]
+
+
+class TerapiasCompletadasResponse(BaseModel):
+    total_terapias_completadas: int
+    historial: List[TerapiaHistorialResponse]
+
+
+class GruposResumenResponse(BaseModel):
+    total_grupos: int
+    grupos: List[ResumenGrupoResponse]
+
+
+class DatosPacienteResponse(BaseModel):
+    nombre: str
+    correo: str
+    telefono: Optional[str] = None
+    historiaclinica: Optional[str] = None
+
+
+class DashboardPacienteResponse(BaseModel):
+    """
+    /paciente/dashboard: las secciones de /solo, /ejercicios-asignados,
+    /ejercicios-asignados-por-grupo, /historial-terapias y /resumen-grupos
+    """
+    cedula: str
+    paciente: DatosPacienteResponse
+    asignados_por_grupo: AsignadosPorGrupoResponse
+    ejercicios_asignados: List[EjercicioAsignadoResponse]
+    historial: TerapiasCompletadasResponse
+    resumen_grupos: GruposResumenResponse
+
+
+class DetallePacienteResponse(BaseModel):
+    """
+    /paciente/detalle/{cedula}: las secciones de /{cedula}?fisio_id=,
+    /ejercicios-por-grupo y /calificaciones
+    """
+    cedula: str
+    paciente: DatosPacienteResponse
+    grupos: List[ResumenGrupoResponse]
+    calificaciones: List[CalificacionRegistroResponse]
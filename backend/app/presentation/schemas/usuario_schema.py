@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
+from typing import Optional
 
 class FisioCreate(BaseModel):
     cedula: str = Field(..., min_length=6, max_length=20, description="Cédula del fisioterapeuta")
@@ -144,3 +145,25 @@ class InfoPacienteResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class PacienteResumenResponse(BaseModel):
+    """
+    Paciente en la lista del fisioterapeuta (/paciente/todos)
+    """
+    cedula: str
+    nombre: str
+    correo: str
+    telefono: Optional[str] = None
+    estado: str
+    progreso: float
+    ejercicios_pendientes: int
+    ejercicios_completados: int
+
+
+class CarteraPacienteResponse(PacienteResumenResponse):
+    """
+    Paciente en la cartera del fisioterapeuta (/paciente/cartera)
+    """
+    grupo_actual: Optional[int] = None
+    ultima_actividad: Optional[str] = None
@@ -0,0 +1,97 @@
+# backend/scripts/benchmark_serializacion.py
+"""
+Benchmark de serialización de /paciente/historial-terapias (sin base de datos).
+
+Compara el camino anterior (dicts sin response_model -> jsonable_encoder -> JSONResponse)
+con el actual (response_model tipado, validado y serializado por pydantic-core -> ORJSONResponse),
+usando las mismas funciones de FastAPI que ejecuta cada endpoint.
+
+Uso (desde backend):
+    python scripts/benchmark_serializacion.py --filas 3000 --repeticiones 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Fuera del paquete de la app: se importa desde backend/app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from presentation.schemas.progreso_schema import HistorialTerapiasResponse
+
+DESCRIPCION = (
+    "Acostado boca arriba, flexionar la rodilla llevando el talón hacia el glúteo "
+    "sin despegar el pie de la camilla. Mantener cinco segundos y volver despacio."
+)
+
+
+def historial_de_muestra(filas: int):
+    """
+    Misma forma que arma logic/terapia_service._formatear_historial.
+    """
+    inicio = date(2024, 1, 1)
+    historial = [
+        {
+            "id_terapia": i,
+            "grupo_terapia": i // 10 + 1,
+            "id_ejercicio": i % 35 + 1,
+            "nombre": f"Ejercicio {i % 35 + 1}",
+            "descripcion": DESCRIPCION,
+            "repeticiones": 12,
+            "url_video": f"https://res.cloudinary.com/demo/video/upload/v1/terapia/ejercicio_{i % 35 + 1}.mp4",
+            "extremidad": "Rodilla",
+            "fecha_realizacion": (inicio + timedelta(days=i // 10)).isoformat(),
+            "observaciones": "Sin molestias" if i % 3 else None
+        }
+        for i in range(filas)
+    ]
+    return {"cedula": "1111111111", "total_terapias_completadas": filas, "historial": historial}
+
+
+def _medir(funcion, repeticiones: int):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+async def _serializar_tipado(campo, contenido):
+    valor = await serialize_response(field=campo, response_content=contenido, is_coroutine=True)
+    return ORJSONResponse(valor).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=3000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    contenido = historial_de_muestra(args.filas)
+    campo = create_response_field(name="Response_historial", type_=HistorialTerapiasResponse)
+    loop = asyncio.new_event_loop()
+
+    antes = _medir(lambda: JSONResponse(jsonable_encoder(contenido)).body, args.repeticiones)
+    despues = _medir(lambda: loop.run_until_complete(_serializar_tipado(campo, contenido)), args.repeticiones)
+    solo_orjson = _medir(lambda: ORJSONResponse(contenido).body, args.repeticiones)
+    loop.close()
+
+    tamano = len(ORJSONResponse(contenido).body)
+    print(f"Historial de {args.filas} filas ({tamano / 1024:.0f} KiB), mediana de {args.repeticiones} repeticiones")
+    print(f"  antes   jsonable_encoder + JSONResponse     {antes * 1000:9.2f} ms  ({antes / args.filas * 1e6:6.2f} µs/fila)")
+    print(f"  ahora   response_model + ORJSONResponse     {despues * 1000:9.2f} ms  ({despues / args.filas * 1e6:6.2f} µs/fila)")
+    print(f"  (solo orjson.dumps, sin validar)            {solo_orjson * 1000:9.2f} ms  ({solo_orjson / args.filas * 1e6:6.2f} µs/fila)")
+    print(f"  mejora: {antes / despues:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# backend/tests/conftest.py
+"""
+Fixtures compartidas de las pruebas.
+
+Las pruebas corren contra la base de datos de DATABASE_URL (PostgreSQL con las
+migraciones aplicadas y los ejercicios cargados); si no hay conexión se omiten.
+Cada prueba crea su propio fisioterapeuta y paciente con cédulas únicas y los borra
+al terminar (Trata, Terapia_Asignada y Progreso_Grupo se borran en cascada).
+
+Uso (desde backend):
+    python -m pytest tests
+"""
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from config.jwt_config import create_access_token
+
+
+def cabeceras(tipo: str, cedula: str) -> dict:
+    token = create_access_token(data={"tipo": tipo, "cedula": cedula, "estado": "activo"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from data.db import engine
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1 FROM Terapia_Ubicacion LIMIT 1"))
+    except OperationalError as e:
+        pytest.skip(f"Base de datos no disponible: {e.orig}")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def ejercicios(engine):
+    """
+    Tres Id_ejercicio existentes.
+    """
+    with engine.connect() as conn:
+        ids = [f[0] for f in conn.execute(text("SELECT Id_ejercicio FROM Ejercicio ORDER BY Id_ejercicio LIMIT 3"))]
+    if len(ids) < 3:
+        pytest.skip("La tabla Ejercicio necesita al menos 3 ejercicios")
+    return ids
+
+
+def _crear_usuarios(engine, cantidad: int = 1):
+    sufijo = uuid.uuid4().hex[:12]
+    fisio = f"tf{sufijo}"
+    pacientes = [f"tp{i}{sufijo}" for i in range(cantidad)]
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO Fisioterapeuta (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)
+            VALUES (:cedula, 'Fisio de prueba', :cedula || '@prueba.invalid', 'x', 'activo', '0')
+        """), {"cedula": fisio})
+        for cedula in pacientes:
+            conn.execute(text("""
+                INSERT INTO Paciente (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)
+                VALUES (:cedula, 'Paciente de prueba', :cedula || '@prueba.invalid', 'x', 'activo', '0')
+            """), {"cedula": cedula})
+            conn.execute(text("INSERT INTO Trata (Cedula_fisioterapeuta, Cedula_paciente) VALUES (:f, :p)"),
+                         {"f": fisio, "p": cedula})
+    return fisio, pacientes
+
+
+def _borrar_usuarios(engine, fisio: str, pacientes: list):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM Paciente WHERE Cedula = ANY(:cedulas)"), {"cedulas": pacientes})
+        conn.execute(text("DELETE FROM Fisioterapeuta WHERE Cedula = :cedula"), {"cedula": fisio})
+
+
+@pytest.fixture
+def paciente(engine):
+    """
+    Paciente activo, sin terapias, tratado por un fisioterapeuta propio.
+    """
+    fisio, (cedula,) = _crear_usuarios(engine)
+    yield SimpleNamespace(
+        cedula=cedula,
+        fisio=fisio,
+        cabeceras=cabeceras("paciente", cedula),
+        cabeceras_fisio=cabeceras("fisio", fisio),
+    )
+    _borrar_usuarios(engine, fisio, [cedula])
+
+
+@pytest.fixture
+def otro_paciente(engine):
+    fisio, (cedula,) = _crear_usuarios(engine)
+    yield SimpleNamespace(cedula=cedula, fisio=fisio, cabeceras=cabeceras("paciente", cedula))
+    _borrar_usuarios(engine, fisio, [cedula])
+
+
+@pytest.fixture
+def cartera(engine):
+    """
+    Fisioterapeuta con cinco pacientes activos, sin terapias.
+    """
+    fisio, cedulas = _crear_usuarios(engine, 5)
+    yield SimpleNamespace(fisio=fisio, cedulas=cedulas, cabeceras=cabeceras("fisio", fisio))
+    _borrar_usuarios(engine, fisio, cedulas)
+
+
+@pytest.fixture
+def insertar_terapias(engine):
+    """
+    Inserta terapias pendientes directamente en Terapia_Asignada:
+    insertar_terapias(cedula, [(grupo, id_ejercicio, fecha_asignacion), ...]) -> [Id_terapia].
+    Progreso_Grupo y los contadores del paciente se reconstruyen para esas terapias.
+    """
+    def insertar(cedula: str, filas: list) -> list:
+        with engine.begin() as conn:
+            ids = [
+                conn.execute(text("""
+                    INSERT INTO Terapia_Asignada (Grupo_terapia, Cedula_paciente, Id_ejercicio, Fecha_asignacion)
+                    VALUES (:grupo, :cedula, :ejercicio, :fecha)
+                    RETURNING Id_terapia
+                """), {"grupo": grupo, "cedula": cedula, "ejercicio": ejercicio, "fecha": fecha}).scalar()
+                for grupo, ejercicio, fecha in filas
+            ]
+            conn.execute(text("""
+                INSERT INTO Progreso_Grupo (Cedula_paciente, Grupo_terapia, Total, Completados, Fecha_inicio)
+                SELECT Cedula_paciente, Grupo_terapia, COUNT(*), 0, MIN(Fecha_asignacion)
+                FROM Terapia_Asignada
+                WHERE Cedula_paciente = :cedula
+                GROUP BY Cedula_paciente, Grupo_terapia
+                ON CONFLICT (Cedula_paciente, Grupo_terapia) DO UPDATE SET Total = EXCLUDED.Total
+            """), {"cedula": cedula})
+            conn.execute(text("""
+                UPDATE Paciente
+                SET Ejercicios_pendientes = (
+                    SELECT COUNT(*) FROM Terapia_Asignada
+                    WHERE Cedula_paciente = :cedula AND Estado <> 'Completado'
+                )
+                WHERE Cedula = :cedula
+            """), {"cedula": cedula})
+        return ids
+    return insertar
+
+
+@pytest.fixture
+def consultar(engine):
+    """
+    consultar(sql, **parametros) -> filas, en una conexión propia.
+    """
+    def ejecutar(sql: str, **parametros):
+        with engine.connect() as conn:
+            return conn.execute(text(sql), parametros).fetchall()
+    return ejecutar
@@ -0,0 +1,111 @@
+# backend/tests/test_auth.py
+import uuid
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+from sqlalchemy import text
+
+from config.jwt_config import CacheTokens, create_access_token
+from config.security import hash_password
+
+
+@pytest.fixture
+def cedula_compartida(engine):
+    """
+    Misma cédula registrada como fisioterapeuta y como paciente, con contraseñas distintas.
+    """
+    cedula = f"ta{uuid.uuid4().hex[:12]}"
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO Fisioterapeuta (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)
+            VALUES (:cedula, 'Fisio de prueba', 'f' || :cedula || '@prueba.invalid', :hash, 'activo', '0')
+        """), {"cedula": cedula, "hash": hash_password("ClaveFisio1")})
+        conn.execute(text("""
+            INSERT INTO Paciente (Cedula, Nombre, Correo, Contrasena, Estado, Telefono)
+            VALUES (:cedula, 'Paciente de prueba', 'p' || :cedula || '@prueba.invalid', :hash, 'activo', '0')
+        """), {"cedula": cedula, "hash": hash_password("ClavePaciente1")})
+    yield cedula
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM Paciente WHERE Cedula = :cedula"), {"cedula": cedula})
+        conn.execute(text("DELETE FROM Fisioterapeuta WHERE Cedula = :cedula"), {"cedula": cedula})
+
+
+def test_login_con_cedula_en_ambas_tablas(client, cedula_compartida):
+    r = client.post("/auth/login", json={"cedula": cedula_compartida, "contrasena": "ClaveFisio1"})
+    assert r.status_code == 200, r.text
+    assert r.json()["tipo_usuario"] == "fisio"
+
+    r = client.post("/auth/login", json={"cedula": cedula_compartida, "contrasena": "ClavePaciente1"})
+    assert r.status_code == 200, r.text
+    assert r.json()["tipo_usuario"] == "paciente"
+
+    r = client.post("/auth/login", json={"cedula": cedula_compartida, "contrasena": "OtraClave1"})
+    assert r.status_code == 401
+
+
+def test_login_paciente(client, paciente, engine):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE Paciente SET Contrasena = :hash WHERE Cedula = :cedula"),
+                     {"hash": hash_password("ClavePaciente1"), "cedula": paciente.cedula})
+
+    r = client.post("/auth/login", json={"cedula": paciente.cedula, "contrasena": "ClavePaciente1"})
+    assert r.status_code == 200, r.text
+    assert r.json()["tipo_usuario"] == "paciente"
+    assert client.post("/auth/login", json={"cedula": paciente.cedula, "contrasena": "Otra"}).status_code == 401
+
+
+# ============================================================
+# CACHÉ DE TOKENS VERIFICADOS (sin base de datos)
+# ============================================================
+def _token(cedula: str, **kwargs) -> str:
+    return create_access_token(data={"tipo": "paciente", "cedula": cedula, "estado": "activo"}, **kwargs)
+
+
+def test_cache_tokens_aciertos_y_fallos():
+    cache = CacheTokens(10)
+    token = _token("111111")
+
+    principal = cache.principal(token)
+    assert (principal.tipo_usuario, principal.cedula, principal.estado) == ("paciente", "111111", "activo")
+    assert cache.principal(token) is principal
+    assert cache.metricas() == {"tokens": 1, "maximo": 10, "aciertos": 1, "fallos": 1}
+
+
+def test_cache_tokens_no_guarda_tokens_invalidos():
+    cache = CacheTokens(10)
+    with pytest.raises(JWTError):
+        cache.principal("no-es-un-token")
+    with pytest.raises(JWTError):
+        cache.principal(_token("111111", expires_delta=timedelta(seconds=-1)))
+    assert cache.metricas()["tokens"] == 0
+
+
+def test_cache_tokens_descarta_entradas_vencidas():
+    cache = CacheTokens(10)
+    token = _token("111111")
+    principal = cache.principal(token)
+
+    # La entrada guardada venció: se verifica el token otra vez en vez de servirla
+    principal.exp = 0
+    nuevo = cache.principal(token)
+    assert nuevo is not principal
+    assert nuevo.exp > 0
+    assert cache.metricas()["fallos"] == 2
+    assert cache.metricas()["aciertos"] == 0
+
+
+def test_cache_tokens_lru():
+    cache = CacheTokens(2)
+    a, b, c = _token("111111"), _token("222222"), _token("333333")
+    cache.principal(a)
+    cache.principal(b)
+    cache.principal(a)   # a pasa a ser el más reciente
+    cache.principal(c)   # sale b
+
+    assert cache.metricas()["tokens"] == 2
+    cache.principal(a)
+    cache.principal(c)
+    assert cache.metricas()["aciertos"] == 3
+    cache.principal(b)
+    assert cache.metricas()["fallos"] == 4
@@ -0,0 +1,98 @@
+# backend/tests/test_fisio.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import text
+
+from data.db import SessionLocal
+from logic.terapia_service import asignar_ejercicios
+
+
+# ============================================================
+# ETAG DEL DETALLE DEL PACIENTE DESPUÉS DE ACTUALIZAR EL PERFIL
+# ============================================================
+def test_actualizar_perfil_cambia_etag_del_detalle(client, paciente):
+    url = f"/paciente/detalle/{paciente.cedula}"
+    r = client.get(url, headers=paciente.cabeceras_fisio)
+    assert r.status_code == 200, r.text
+    etag = r.headers["ETag"]
+    assert client.get(url, headers={**paciente.cabeceras_fisio, "If-None-Match": etag}).status_code == 304
+
+    r = client.put("/paciente/actualizar-perfil", headers=paciente.cabeceras, json={
+        "nombre": "Nombre actualizado", "correo": f"{paciente.cedula}@ejemplo.com", "telefono": "3001234567"
+    })
+    assert r.status_code == 200, r.text
+
+    r = client.get(url, headers={**paciente.cabeceras_fisio, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["paciente"]["correo"] == f"{paciente.cedula}@ejemplo.com"
+
+
+# ============================================================
+# ASIGNAR EJERCICIOS (/asignar-ejercicio)
+# ============================================================
+def test_asignaciones_simultaneas_usan_grupos_distintos(paciente, ejercicios, consultar):
+    hilos = 6
+    barrera = threading.Barrier(hilos)
+
+    def asignar(_):
+        db = SessionLocal()
+        try:
+            barrera.wait()
+            return asignar_ejercicios(db, paciente.cedula, ejercicios[:2], date.today())
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(hilos) as pool:
+        asignaciones = list(pool.map(asignar, range(hilos)))
+
+    assert sorted(grupo for grupo, _ in asignaciones) == list(range(1, hilos + 1))
+    assert not any(activado for _, activado in asignaciones)
+
+    filas = consultar("SELECT Grupo_terapia, COUNT(*) AS cantidad FROM Terapia_Asignada "
+                      "WHERE Cedula_paciente = :cedula GROUP BY Grupo_terapia ORDER BY Grupo_terapia",
+                      cedula=paciente.cedula)
+    assert [tuple(f) for f in filas] == [(g, 2) for g in range(1, hilos + 1)]
+
+    progreso = consultar("SELECT Grupo_terapia, Total, Completados FROM Progreso_Grupo "
+                         "WHERE Cedula_paciente = :cedula ORDER BY Grupo_terapia", cedula=paciente.cedula)
+    assert [tuple(f) for f in progreso] == [(g, 2, 0) for g in range(1, hilos + 1)]
+
+    (p,) = consultar("SELECT Ejercicios_pendientes, Ejercicios_completados, Estado FROM Paciente "
+                     "WHERE Cedula = :cedula", cedula=paciente.cedula)
+    assert tuple(p) == (2 * hilos, 0, "activo")
+
+
+def test_asignar_ejercicio_rechazos(client, paciente, ejercicios, consultar):
+    r = client.post("/paciente/asignar-ejercicio", json={"cedula_paciente": paciente.cedula, "ejercicios": []})
+    assert r.status_code == 422
+
+    r = client.post("/paciente/asignar-ejercicio",
+                    json={"cedula_paciente": paciente.cedula, "ejercicios": [ejercicios[0], 2147483647]})
+    assert r.status_code == 400
+
+    r = client.post("/paciente/asignar-ejercicio",
+                    json={"cedula_paciente": "no-existe", "ejercicios": [ejercicios[0]]})
+    assert r.status_code == 404
+
+    assert consultar("SELECT 1 FROM Terapia_Asignada WHERE Cedula_paciente = :cedula", cedula=paciente.cedula) == []
+    assert consultar("SELECT 1 FROM Terapia_Asignada WHERE Cedula_paciente = 'no-existe'") == []
+
+    r = client.post("/paciente/asignar-ejercicio",
+                    json={"cedula_paciente": paciente.cedula, "ejercicios": [ejercicios[0]]})
+    assert r.status_code == 200, r.text
+    assert r.json()["grupo_terapia"] == 1
+    assert r.json()["estado_paciente"]["cambio_realizado"] is False
+
+
+def test_asignar_ejercicio_reactiva_paciente_inactivo(client, engine, paciente, ejercicios, consultar):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE Paciente SET Estado = 'inactivo' WHERE Cedula = :cedula"), {"cedula": paciente.cedula})
+
+    r = client.post("/paciente/asignar-ejercicio",
+                    json={"cedula_paciente": paciente.cedula, "ejercicios": [ejercicios[0]]})
+    assert r.status_code == 200, r.text
+    assert r.json()["estado_paciente"]["cambio_realizado"] is True
+    assert consultar("SELECT Estado FROM Paciente WHERE Cedula = :cedula", cedula=paciente.cedula)[0][0] == "activo"
@@ -0,0 +1,364 @@
+# backend/tests/test_paciente.py
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from data import sentencias
+from data.db import SessionLocal
+from logic import paciente_service
+from logic.terapia_service import completar_terapias_lote
+from presentation.routers import paciente_router
+
+
+def _meses_distintos():
+    """
+    Fechas de asignación en tres particiones: el mes actual, dos meses adelante
+    (creadas al arrancar la app) y la partición default.
+    """
+    hoy = date.today()
+    adelante = date(hoy.year + (hoy.month > 10), (hoy.month + 1) % 12 + 1, 15)
+    return [hoy, adelante, date(2001, 1, 15)]
+
+
+# ============================================================
+# BÚSQUEDA POR ID_TERAPIA EN TERAPIA_ASIGNADA PARTICIONADA (migración 008)
+# ============================================================
+def test_busqueda_por_id_en_varias_particiones(client, paciente, ejercicios, insertar_terapias, consultar):
+    fechas = _meses_distintos()
+    ids = insertar_terapias(paciente.cedula, [(1, ejercicios[0], f) for f in fechas])
+
+    particiones = consultar("SELECT DISTINCT tableoid::regclass::text FROM Terapia_Asignada WHERE Id_terapia = ANY(:ids)",
+                            ids=ids)
+    assert len(particiones) == 3
+
+    for id_terapia in ids:
+        r = client.put(f"/paciente/marcar-realizado/{id_terapia}")
+        assert r.status_code == 200, r.text
+
+    r = client.post("/paciente/calificar-ejercicio", json={
+        "id_terapia": ids[2], "dolor": 2, "sensacion": 3, "cansancio": 4, "observaciones": "partición default"
+    })
+    assert r.status_code == 200, r.text
+
+    filas = consultar("SELECT Id_terapia, Estado, Dolor FROM Terapia_Asignada WHERE Id_terapia = ANY(:ids) ORDER BY Id_terapia",
+                      ids=ids)
+    assert [f.estado for f in filas] == ["Completado"] * 3
+    assert [f.dolor for f in filas] == [None, None, 2]
+
+
+def test_busqueda_por_id_abre_una_sola_particion(engine, paciente, ejercicios, insertar_terapias):
+    ids = insertar_terapias(paciente.cedula, [(1, ejercicios[0], f) for f in _meses_distintos()])
+
+    with engine.connect() as conn:
+        plan = conn.execute(text("EXPLAIN (ANALYZE, FORMAT JSON) " + sentencias.TERAPIA.text.text),
+                            {"id_terapia": ids[1]}).scalar()
+
+    def nodos(nodo):
+        yield nodo
+        for hijo in nodo.get("Plans", []):
+            yield from nodos(hijo)
+
+    abiertas = [n["Relation Name"] for n in nodos(plan[0]["Plan"])
+                if n.get("Relation Name", "").startswith("terapia_asignada") and n["Actual Loops"] > 0]
+    assert len(abiertas) == 1
+
+
+def test_id_terapia_repetido_se_rechaza(engine, paciente, ejercicios, insertar_terapias):
+    hoy, adelante, _ = _meses_distintos()
+    (id_terapia,) = insertar_terapias(paciente.cedula, [(1, ejercicios[0], hoy)])
+
+    # Otra partición: la llave primaria (Id_terapia, Fecha_asignacion) no lo impediría
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO Terapia_Asignada (Id_terapia, Grupo_terapia, Cedula_paciente, Id_ejercicio, Fecha_asignacion)
+                VALUES (:id, 1, :cedula, :ejercicio, :fecha)
+            """), {"id": id_terapia, "cedula": paciente.cedula, "ejercicio": ejercicios[0], "fecha": adelante})
+
+
+def test_borrar_terapia_borra_su_ubicacion(engine, paciente, ejercicios, insertar_terapias, consultar):
+    ids = insertar_terapias(paciente.cedula, [(1, ejercicios[0], f) for f in _meses_distintos()])
+    assert len(consultar("SELECT 1 FROM Terapia_Ubicacion WHERE Id_terapia = ANY(:ids)", ids=ids)) == 3
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM Paciente WHERE Cedula = :cedula"), {"cedula": paciente.cedula})
+    assert consultar("SELECT 1 FROM Terapia_Ubicacion WHERE Id_terapia = ANY(:ids)", ids=ids) == []
+
+
+# ============================================================
+# PAGINACIÓN POR CURSOR CON CLAVES NULL
+# ============================================================
+def _todas_las_paginas(client, url, cabeceras=None, filas_de=lambda data: data):
+    filas, cursor, paginas = [], None, 0
+    while True:
+        params = {"limite": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get(url, params=params, headers=cabeceras or {})
+        assert r.status_code == 200, r.text
+        filas += filas_de(r.json())
+        paginas += 1
+        cursor = r.headers.get("X-Siguiente-Cursor")
+        if not cursor:
+            return filas, paginas
+
+
+def test_cartera_por_progreso_con_progreso_null(client, engine, cartera):
+    progresos = [None, 40, None, 10, 40]
+    with engine.begin() as conn:
+        for cedula, progreso in zip(cartera.cedulas, progresos):
+            conn.execute(text("UPDATE Paciente SET Progreso = :progreso WHERE Cedula = :cedula"),
+                         {"progreso": progreso, "cedula": cedula})
+
+    con_valor = sorted((p, c) for c, p in zip(cartera.cedulas, progresos) if p is not None)
+    sin_valor = sorted(c for c, p in zip(cartera.cedulas, progresos) if p is None)
+
+    for descendente, esperado in (
+        (False, [c for _, c in con_valor] + sin_valor),
+        (True, [c for _, c in reversed(con_valor)] + sin_valor[::-1]),
+    ):
+        url = f"/paciente/cartera?orden=progreso&descendente={str(descendente).lower()}"
+        filas, paginas = _todas_las_paginas(client, url, cartera.cabeceras)
+        assert [f["cedula"] for f in filas] == esperado
+        assert paginas == 3
+
+
+def test_completados_con_fecha_realizacion_null(client, engine, paciente, ejercicios, insertar_terapias):
+    hoy = date.today()
+    ids = insertar_terapias(paciente.cedula, [(1, ejercicios[0], hoy)] * 5)
+    with engine.begin() as conn:
+        for i, id_terapia in enumerate(ids):
+            conn.execute(text("""
+                UPDATE Terapia_Asignada
+                SET Estado = 'Completado', Observaciones = :obs,
+                    Fecha_realizacion = CASE WHEN :con_fecha THEN CURRENT_DATE END
+                WHERE Id_terapia = :id
+            """), {"obs": f"obs{i}", "con_fecha": i % 2 == 0, "id": id_terapia})
+
+    esperado = sorted(f"obs{i}" for i in range(5))
+
+    filas, _ = _todas_las_paginas(client, f"/paciente/ejercicios-completados/{paciente.cedula}")
+    assert sorted(f["observaciones"] for f in filas) == esperado
+
+    filas, _ = _todas_las_paginas(client, f"/paciente/historial-terapias/{paciente.cedula}",
+                                  filas_de=lambda data: data["historial"])
+    assert sorted(f["observaciones"] for f in filas) == esperado
+
+    r = client.get(f"/paciente/historial-terapias/{paciente.cedula}?limite=2&incluir_total=true")
+    assert r.status_code == 200, r.text
+    assert len(r.json()["historial"]) == 2
+    assert r.json()["total_terapias_completadas"] == 5
+    assert r.headers["X-Total"] == "5"
+
+    r = client.get(f"/paciente/historial-terapias/{paciente.cedula}?limite=2")
+    assert r.json()["total_terapias_completadas"] is None
+
+
+# ============================================================
+# ETAG DEL DASHBOARD DESPUÉS DE ACTUALIZAR EL PERFIL
+# ============================================================
+def test_actualizar_perfil_cambia_etag_del_dashboard(client, paciente):
+    r = client.get("/paciente/dashboard", headers=paciente.cabeceras)
+    assert r.status_code == 200, r.text
+    etag = r.headers["ETag"]
+    assert "Authorization" in r.headers["Vary"]
+    r = client.get("/paciente/dashboard", headers={**paciente.cabeceras, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert "Authorization" in r.headers["Vary"]
+
+    r = client.put("/paciente/actualizar-perfil", headers=paciente.cabeceras, json={
+        "nombre": "Nombre actualizado", "correo": f"{paciente.cedula}@ejemplo.com", "telefono": "3001234567"
+    })
+    assert r.status_code == 200, r.text
+
+    r = client.get("/paciente/dashboard", headers={**paciente.cabeceras, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["paciente"]["nombre"] == "Nombre actualizado"
+
+
+# ============================================================
+# COMPLETAR VARIAS TERAPIAS EN UN LOTE (/completar-lote)
+# ============================================================
+def test_completar_lote_mixto(client, paciente, otro_paciente, ejercicios, insertar_terapias, consultar):
+    hoy = date.today()
+    a, b, c, d = insertar_terapias(paciente.cedula, [(1, ejercicios[0], hoy), (1, ejercicios[1], hoy),
+                                                     (1, ejercicios[2], hoy), (2, ejercicios[0], hoy)])
+    (ajena,) = insertar_terapias(otro_paciente.cedula, [(1, ejercicios[0], hoy)])
+    assert client.put(f"/paciente/marcar-realizado/{b}").status_code == 200
+
+    r = client.post("/paciente/completar-lote", headers=paciente.cabeceras, json={"terapias": [
+        {"id_terapia": a, "dolor": 2, "sensacion": 3, "cansancio": 4, "observaciones": "lote"},
+        {"id_terapia": b, "dolor": 5},
+        {"id_terapia": d},
+        {"id_terapia": ajena, "dolor": 1},
+    ]})
+    assert r.status_code == 200, r.text
+    assert r.json() == {"completadas": sorted([a, d]), "ya_completadas": [b], "no_encontradas": [ajena],
+                        "pendientes": 1, "estado_paciente": "activo"}
+
+    filas = consultar("SELECT Id_terapia, Estado, Dolor, Observaciones FROM Terapia_Asignada "
+                      "WHERE Id_terapia = ANY(:ids) ORDER BY Id_terapia", ids=[a, b, c, d, ajena])
+    assert [(f.estado, f.dolor, f.observaciones) for f in filas] == [
+        ("Completado", 2, "lote"), ("Completado", 5, None), ("Pendiente", None, None),
+        ("Completado", None, None), ("Pendiente", None, None),
+    ]
+
+    grupos = consultar("SELECT Grupo_terapia, Total, Completados FROM Progreso_Grupo "
+                       "WHERE Cedula_paciente = :cedula ORDER BY Grupo_terapia", cedula=paciente.cedula)
+    assert [tuple(g) for g in grupos] == [(1, 3, 2), (2, 1, 1)]
+
+    (p,) = consultar("SELECT Ejercicios_pendientes, Ejercicios_completados, Progreso, Estado FROM Paciente "
+                     "WHERE Cedula = :cedula", cedula=paciente.cedula)
+    assert (p.ejercicios_pendientes, p.ejercicios_completados, float(p.progreso), p.estado) == (1, 3, 75.0, "activo")
+
+    (o,) = consultar("SELECT Ejercicios_pendientes, Ejercicios_completados FROM Paciente WHERE Cedula = :cedula",
+                     cedula=otro_paciente.cedula)
+    assert tuple(o) == (1, 0)
+
+    # La última pendiente deja al paciente sin pendientes: pasa a inactivo
+    r = client.post("/paciente/completar-lote", headers=paciente.cabeceras, json={"terapias": [{"id_terapia": c}]})
+    assert r.status_code == 200, r.text
+    assert (r.json()["pendientes"], r.json()["estado_paciente"]) == (0, "inactivo")
+    grupos = consultar("SELECT Completados FROM Progreso_Grupo WHERE Cedula_paciente = :cedula ORDER BY Grupo_terapia",
+                       cedula=paciente.cedula)
+    assert [g.completados for g in grupos] == [3, 1]
+
+
+def test_completar_lote_rechazos(client, paciente, otro_paciente, ejercicios, insertar_terapias):
+    (propia,) = insertar_terapias(paciente.cedula, [(1, ejercicios[0], date.today())])
+    (ajena,) = insertar_terapias(otro_paciente.cedula, [(1, ejercicios[0], date.today())])
+
+    r = client.post("/paciente/completar-lote", headers=paciente.cabeceras,
+                    json={"terapias": [{"id_terapia": propia}, {"id_terapia": propia}]})
+    assert r.status_code == 400
+
+    r = client.post("/paciente/completar-lote", headers=paciente.cabeceras, json={"terapias": [{"id_terapia": ajena}]})
+    assert r.status_code == 404
+
+    r = client.post("/paciente/completar-lote", headers=paciente.cabeceras, json={"terapias": []})
+    assert r.status_code == 422
+
+
+def test_completar_lote_revierte_todo_si_una_fila_falla(engine, paciente, ejercicios, insertar_terapias, consultar):
+    hoy = date.today()
+    ids = insertar_terapias(paciente.cedula, [(1, ejercicios[0], hoy), (1, ejercicios[1], hoy), (2, ejercicios[2], hoy)])
+
+    def estado():
+        return (
+            consultar("SELECT Estado, Dolor FROM Terapia_Asignada WHERE Id_terapia = ANY(:ids) ORDER BY Id_terapia",
+                      ids=ids),
+            consultar("SELECT Grupo_terapia, Completados, Fecha_fin FROM Progreso_Grupo "
+                      "WHERE Cedula_paciente = :cedula ORDER BY Grupo_terapia", cedula=paciente.cedula),
+            consultar("SELECT Ejercicios_pendientes, Ejercicios_completados, Progreso, Estado, Version "
+                      "FROM Paciente WHERE Cedula = :cedula", cedula=paciente.cedula),
+        )
+
+    antes = estado()
+    # Dolor fuera del CHECK (1-5) en la segunda terapia: el esquema de la API lo rechazaría antes
+    lote = [SimpleNamespace(id_terapia=i, dolor=dolor, sensacion=None, cansancio=None, observaciones=None)
+            for i, dolor in zip(ids, (2, 9, 3))]
+    db = SessionLocal()
+    try:
+        with pytest.raises(IntegrityError):
+            completar_terapias_lote(db, paciente.cedula, lote, hoy)
+    finally:
+        db.close()
+
+    assert estado() == antes
+
+
+# ============================================================
+# IMPORTACIÓN MASIVA DE PACIENTES (/importar-csv)
+# ============================================================
+COLUMNAS_CSV = "cedula,email,nombre,telefono,historiaclinica"
+
+
+@pytest.fixture
+def importar_csv(client, engine, cartera, monkeypatch):
+    """
+    importar_csv(*lineas, columnas=...) -> respuesta de /importar-csv como el fisio de la cartera.
+    Los correos del lote se guardan en importar_csv.enviados en vez de enviarse;
+    los pacientes importados se borran al terminar.
+    """
+    enviados = []
+    monkeypatch.setattr(paciente_router, "send_patient_credentials_batch", enviados.extend)
+    importados = []
+
+    def importar(*lineas, columnas=COLUMNAS_CSV):
+        contenido = "\n".join([columnas, *lineas]).encode("utf-8")
+        r = client.post("/paciente/importar-csv", headers=cartera.cabeceras,
+                        files={"archivo": ("pacientes.csv", contenido, "text/csv")})
+        if r.status_code == 201:
+            importados.extend(r.json()["importados"])
+        return r
+
+    importar.enviados = enviados
+    yield importar
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM Paciente WHERE Cedula = ANY(:cedulas)"), {"cedulas": importados})
+
+
+def _cedula_nueva():
+    return f"ti{uuid.uuid4().hex[:12]}"
+
+
+def test_importar_csv_mixto(importar_csv, engine, cartera, consultar):
+    registrada, con_correo = cartera.cedulas[:2]
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE Paciente SET Correo = :cedula || '@ejemplo.com' WHERE Cedula = :cedula"),
+                     {"cedula": con_correo})
+    a, b, c = _cedula_nueva(), _cedula_nueva(), _cedula_nueva()
+
+    r = importar_csv(
+        f"{a},{a}@ejemplo.com,Paciente A,3001234567,Lumbalgia",
+        f"{b},{b}@ejemplo.com,Paciente B,3001234568,",
+        f"{c},no-es-un-correo,Paciente C,3001234569,",
+        "123,corto@ejemplo.com,Cédula corta,3001234570,",
+        f"{a},otro{a}@ejemplo.com,Repetida,3001234571,",
+        f"{registrada},nuevo{registrada}@ejemplo.com,Ya registrada,3001234572,",
+        f"{c},{con_correo}@ejemplo.com,Correo registrado,3001234573,",
+    )
+    assert r.status_code == 201, r.text
+    data = r.json()
+    assert data["importados"] == [a, b]
+    assert [(f["linea"], f["cedula"]) for f in data["rechazados"]] == [
+        (4, c), (5, "123"), (6, a), (7, registrada), (8, c)
+    ]
+    errores = [f["error"] for f in data["rechazados"]]
+    assert errores[0].startswith("email:")
+    assert errores[1].startswith("cedula:")
+    assert errores[2:] == ["Cédula o correo repetido en el archivo", "La cédula ya está registrada",
+                           "El correo ya está registrado"]
+
+    filas = consultar("SELECT p.Cedula, p.Estado, p.Contrasena, t.Cedula_fisioterapeuta FROM Paciente p "
+                      "JOIN Trata t ON t.Cedula_paciente = p.Cedula WHERE p.Cedula = ANY(:cedulas) ORDER BY p.Cedula",
+                      cedulas=[a, b])
+    assert sorted(f.cedula for f in filas) == sorted([a, b])
+    assert all(f.estado == "activo" and f.contrasena.startswith("$2") and f.cedula_fisioterapeuta == cartera.fisio
+               for f in filas)
+    assert consultar("SELECT 1 FROM Paciente WHERE Cedula = :cedula", cedula=c) == []
+    assert [e["cedula"] for e in importar_csv.enviados] == [a, b]
+
+
+def test_importar_csv_sin_columnas(importar_csv):
+    r = importar_csv(f"{_cedula_nueva()},x@ejemplo.com,Sin teléfono", columnas="cedula,email,nombre")
+    assert r.status_code == 400
+    assert "telefono" in r.json()["detail"] and "historiaclinica" in r.json()["detail"]
+    assert importar_csv.enviados == []
+
+
+def test_importar_csv_conflicto_concurrente(importar_csv, cartera, monkeypatch, consultar):
+    # Otro registro entra con la misma cédula entre la verificación y el COPY
+    monkeypatch.setattr(paciente_service, "_separar_existentes", lambda db, pacientes: (pacientes, []))
+    nueva, registrada = _cedula_nueva(), cartera.cedulas[0]
+
+    r = importar_csv(
+        f"{nueva},{nueva}@ejemplo.com,Paciente nuevo,3001234567,",
+        f"{registrada},nuevo{registrada}@ejemplo.com,Ya registrada,3001234568,",
+    )
+    assert r.status_code == 409, r.text
+    assert consultar("SELECT 1 FROM Paciente WHERE Cedula = :cedula", cedula=nueva) == []
+    assert importar_csv.enviados == []
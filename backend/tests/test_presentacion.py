@@ -0,0 +1,148 @@
+# backend/tests/test_presentacion.py
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from presentation.compresion import CODIFICACIONES, CompresionMiddleware, elegir_codificacion
+from presentation.etag import coincide
+from presentation.paginacion import CLAVES, codificar_cursor, decodificar_cursor
+
+
+# ============================================================
+# COMPRESIÓN DE RESPUESTAS (sin base de datos)
+# ============================================================
+@pytest.mark.parametrize("accept_encoding, esperada", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, gzip;q=0", None),
+    ("*", CODIFICACIONES[0]),
+    ("*, gzip;q=0", "br" if "br" in CODIFICACIONES else None),
+    ("gzip;q=abc", None),
+])
+def test_elegir_codificacion(accept_encoding, esperada):
+    assert elegir_codificacion(accept_encoding) == esperada
+
+
+def test_elegir_codificacion_preferencia():
+    # Con el mismo q gana la primera de CODIFICACIONES; un q mayor gana siempre
+    assert elegir_codificacion("gzip, br") == CODIFICACIONES[0]
+    assert elegir_codificacion("gzip;q=1, br;q=0.5") == "gzip"
+
+
+MINIMO = 100
+
+
+@pytest.fixture(scope="module")
+def cliente_compresion():
+    app = FastAPI()
+    app.add_middleware(CompresionMiddleware, minimo=MINIMO)
+
+    @app.get("/json")
+    def json_de(n: int):
+        return Response(b'"' + b"x" * n + b'"', media_type="application/json", headers={"ETag": '"1.1.abc"'})
+
+    @app.get("/imagen")
+    def imagen():
+        return Response(b"x" * 5000, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b'{"a":1}\n'] * 3), media_type="application/x-ndjson")
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_compresion_por_debajo_del_umbral(cliente_compresion):
+    r = cliente_compresion.get("/json", params={"n": MINIMO - 10}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["ETag"] == '"1.1.abc"'
+
+
+def test_compresion_por_encima_del_umbral(cliente_compresion):
+    r = cliente_compresion.get("/json", params={"n": MINIMO * 10}, headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    # El ETag fuerte se vuelve débil al cambiar los bytes
+    assert r.headers["ETag"] == 'W/"1.1.abc"'
+    # httpx descomprime el cuerpo; Content-Length es el de los bytes comprimidos
+    assert int(r.headers["content-length"]) < MINIMO
+    assert r.json() == "x" * MINIMO * 10
+
+
+def test_compresion_sin_accept_encoding_o_tipo_no_comprimible(cliente_compresion):
+    r = cliente_compresion.get("/json", params={"n": MINIMO * 10}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+
+    r = cliente_compresion.get("/imagen", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+
+def test_compresion_streaming(cliente_compresion):
+    # En streaming no se conoce el tamaño: se comprime aunque sea pequeña
+    r = cliente_compresion.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert r.text == '{"a":1}\n' * 3
+
+
+# ============================================================
+# IF-NONE-MATCH (sin base de datos)
+# ============================================================
+ETAG = '"7.3.a1b2c3"'
+
+
+@pytest.mark.parametrize("if_none_match, esperado", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    ("W/" + ETAG, True),
+    (' "otro" , W/' + ETAG, True),
+    ("*", True),
+    (' * ', True),
+    ('"7.3.a1b2c4"', False),
+    ("7.3.a1b2c3", False),
+    ('"otro", "mas"', False),
+])
+def test_coincide_comparacion_debil(if_none_match, esperado):
+    assert coincide(if_none_match, ETAG) is esperado
+
+
+# ============================================================
+# CURSOR DE PAGINACIÓN (sin base de datos)
+# ============================================================
+def _cursores_invalidos(tipo):
+    tipos, inicio = CLAVES[tipo]
+    cursores = [
+        "no es base64",
+        codificar_cursor("otro_tipo", inicio),
+        codificar_cursor(tipo, inicio[:-1]),
+    ]
+    for i, t in enumerate(tipos):
+        if t is str:
+            continue
+        for valor in ("abc", "NaN", "Infinity", "-Infinity"):
+            clave = list(inicio)
+            clave[i] = valor
+            cursores.append(codificar_cursor(tipo, clave))
+    return cursores
+
+
+@pytest.mark.parametrize("tipo, cursor", [
+    (tipo, cursor) for tipo in CLAVES for cursor in _cursores_invalidos(tipo)
+])
+def test_cursor_invalido_responde_400(tipo, cursor):
+    with pytest.raises(HTTPException) as e:
+        decodificar_cursor(tipo, cursor)
+    assert e.value.status_code == 400
+
+
+@pytest.mark.parametrize("tipo", CLAVES)
+def test_cursor_ida_y_vuelta(tipo):
+    _, inicio = CLAVES[tipo]
+    assert decodificar_cursor(tipo, codificar_cursor(tipo, inicio)) == inicio
@@ -14,6 +14,24 @@ document.addEventListener("DOMContentLoaded", () => {
   const sidebar = document.getElementById("sidebar")
   const fisioId = localStorage.getItem("cedula");
 
+  // Las listas largas vienen paginadas: se piden las páginas siguiendo la cabecera
+  // X-Siguiente-Cursor hasta la última y se juntan las filas.
+  async function obtenerTodasLasPaginas(url, opciones = {}) {
+    const filas = []
+    let cursor = null
+    do {
+      const separador = url.includes("?") ? "&" : "?"
+      const pagina = cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""
+      const res = await fetch(`${url}${separador}limite=1000${pagina}`, opciones)
+      if (!res.ok) {
+        throw new Error(`Error al cargar ${url}: ${res.status}`)
+      }
+      filas.push(...(await res.json()))
+      cursor = res.headers.get("X-Siguiente-Cursor")
+    } while (cursor)
+    return filas
+  }
+
       // Redirigir al formulario de registro de paciente
   const registrarBtn = document.querySelector('[data-section="registrar-paciente"]');
     if (registrarBtn) {
@@ -607,32 +625,28 @@ document.addEventListener("DOMContentLoaded", () => {
 
   async function calcularAvancePaciente(cedula) {
     try {
-     const pacienteRes = await fetch(`${PACIENTE_API_URL}/${cedula}?fisio_id=${fisioId}`);
-
-
-      if (!pacienteRes.ok) {
+      // La cartera ya trae los contadores y el progreso; buscar filtra por prefijo,
+      // así que se toma la fila con la cédula exacta
+      const token = localStorage.getItem("token")
+      const pacientes = await obtenerTodasLasPaginas(
+        `${PACIENTE_API_URL}/cartera?buscar=${encodeURIComponent(cedula)}`,
+        { headers: { Authorization: `Bearer ${token}` } },
+      )
+      const paciente = pacientes.find((p) => p.cedula === cedula)
+      if (!paciente) {
         throw new Error("Paciente no encontrado")
       }
-      const pacienteData = await pacienteRes.json()
 
-      const completadosRes = await fetch(`${PACIENTE_API_URL}/ejercicios-completados/${cedula}`)
-      const completados = await completadosRes.json()
-      const numCompletados = Array.isArray(completados) ? completados.length : 0
-
-      const asignadosRes = await fetch(`${PACIENTE_API_URL}/ejercicios-asignados/${cedula}`)
-      const asignados = await asignadosRes.json()
-      const numAsignados = Array.isArray(asignados) ? asignados.length : 0
-
-      const totalTerapias = numCompletados + numAsignados
-      const porcentaje = totalTerapias > 0 ? Math.round((numCompletados / totalTerapias) * 100) : 0
+      const numCompletados = paciente.ejercicios_completados || 0
+      const numAsignados = paciente.ejercicios_pendientes || 0
 
       return {
         cedula: cedula,
-        nombre: pacienteData.nombre,
-        porcentaje: porcentaje,
+        nombre: paciente.nombre,
+        porcentaje: Math.round(paciente.progreso || 0),
         completados: numCompletados,
         pendientes: numAsignados,
-        total: totalTerapias,
+        total: numCompletados + numAsignados,
       }
     } catch (error) {
       console.error("Error calculando avance:", error)
@@ -694,19 +708,16 @@ document.addEventListener("DOMContentLoaded", () => {
  
  document.getElementById("filtroEstado").addEventListener("change", async (event) => {
     const estado = event.target.value;  // todos | activo | inactivo
-    const fisioId = localStorage.getItem("cedula");
+    const token = localStorage.getItem("token");
 
     try {
-        const res = await fetch(`${PACIENTE_API_URL}/todos?fisio_id=${fisioId}`);
-        const pacientes = await res.json();
-
-        // Filtrar aquí
-        let filtrados = pacientes;
-        if (estado !== "todos") {
-            filtrados = pacientes.filter(p => p.estado === estado);
-        }
+        // El servidor filtra por estado y trae el avance de cada paciente
+        const filtro = estado !== "todos" ? `?estado=${estado}` : "";
+        const pacientes = await obtenerTodasLasPaginas(`${PACIENTE_API_URL}/cartera${filtro}`, {
+            headers: { Authorization: `Bearer ${token}` },
+        });
 
-        mostrarPacientes(filtrados);
+        mostrarPacientes(pacientes);
 
     } catch (err) {
         console.error("Error en el filtro:", err);
@@ -730,11 +741,11 @@ function mostrarPacientes(pacientes) {
                 <p class="patient-name">${p.nombre}</p>
                 <p class="patient-status">Estado: <strong>${p.estado}</strong></p>
                 <p class="progress-label">
-                    Avance: <span class="progress-percentage">${p.porcentaje || 0}%</span>
+                    Avance: <span class="progress-percentage">${p.progreso || 0}%</span>
                 </p>
             </div>
             <div class="progress-bar">
-                <div class="progress-fill" style="width: ${p.porcentaje || 0}%"></div>
+                <div class="progress-fill" style="width: ${p.progreso || 0}%"></div>
             </div>
             <div class="patient-actions">
                 <button class="btn-action btn-details" data-cedula="${p.cedula}">Ver Detalles</button>
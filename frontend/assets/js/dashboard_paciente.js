@@ -13,23 +13,78 @@ let filtroAllExercisesActual = "Todos" // Nuevo filtro
 const API_URL = "http://localhost:8000/paciente"
 const AUTH_API_URL = "http://localhost:8000/auth"
 
+// Las listas largas vienen paginadas: se piden las páginas siguiendo la cabecera
+// X-Siguiente-Cursor hasta la última. `filasDe(data)` saca las filas de cada respuesta.
+async function obtenerTodasLasPaginas(url, filasDe = (data) => data) {
+  const filas = []
+  let cursor = null
+  do {
+    const separador = url.includes("?") ? "&" : "?"
+    const pagina = cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""
+    const response = await fetch(`${url}${separador}limite=1000${pagina}`)
+    if (!response.ok) {
+      throw new Error(`Error al cargar ${url}: ${response.status}`)
+    }
+    filas.push(...filasDe(await response.json()))
+    cursor = response.headers.get("X-Siguiente-Cursor")
+  } while (cursor)
+  return filas
+}
+
 // Inicializar
 document.addEventListener("DOMContentLoaded", () => {
   initSidebar()
   initNavigation()
-  cargarInfoPaciente() // NUEVO: Cargar información del paciente
   initCambiarContrasena() // NUEVO: Inicializar modal de cambio de contraseña
   initEditarPerfil() // Added profile editing initialization
   initCalificacionModal() // Inicializar modal de calificación
-  cargarHistorialTerapias()
-  cargarResumenGrupos()
-  cargarGruposEjerciciosAsignados() // Cargar ejercicios por grupos
   cargarFiltrosAllExercises() // Filtros para todos los ejercicios
-  cargarEjerciciosAsignadosDesdeAPI()
   cargarFiltrosRealizados()
-  cargarEjerciciosRealizadosDesdeAPI()
+  cargarDashboard() // Todas las secciones en una sola solicitud
 })
 
+// Carga inicial: /dashboard trae en una respuesta lo que antes pedían
+// /solo, /historial-terapias, /resumen-grupos, /ejercicios-asignados-por-grupo,
+// /ejercicios-asignados y /ejercicios-completados. Las funciones de cada sección
+// se siguen usando para refrescar después de marcar o calificar.
+async function cargarDashboard() {
+  const token = localStorage.getItem("token")
+
+  try {
+    const response = await fetch(`${API_URL}/dashboard`, {
+      headers: { Authorization: `Bearer ${token}` },
+    })
+
+    if (!response.ok) {
+      throw new Error(`Error al cargar el dashboard: ${response.status}`)
+    }
+
+    const data = await response.json()
+
+    llenarInfoPaciente(data.paciente, data.cedula)
+
+    historialTerapias = data.historial.historial || []
+    mostrarHistorialTerapias()
+
+    resumenGrupos = data.resumen_grupos.grupos || []
+    mostrarResumenGrupos()
+
+    gruposEjerciciosAsignados = data.asignados_por_grupo.grupos || []
+    mostrarGruposEjerciciosAsignados()
+
+    llenarEjerciciosAsignados(data.ejercicios_asignados)
+    llenarEjerciciosRealizados(historialTerapias)
+  } catch (error) {
+    console.error("Error al cargar el dashboard, se cargan las secciones por separado:", error)
+    cargarInfoPaciente()
+    cargarHistorialTerapias()
+    cargarResumenGrupos()
+    cargarGruposEjerciciosAsignados()
+    cargarEjerciciosAsignadosDesdeAPI()
+    cargarEjerciciosRealizadosDesdeAPI()
+  }
+}
+
 async function cargarGruposEjerciciosAsignados() {
   const cedula = localStorage.getItem("cedula") || localStorage.getItem("usuario_id")
 
@@ -142,15 +197,10 @@ async function cargarHistorialTerapias() {
   try {
     console.log(`📊 Cargando historial de terapias para: ${cedula}`)
 
-    const response = await fetch(`${API_URL}/historial-terapias/${cedula}`)
-
-    if (!response.ok) {
-      throw new Error(`Error al cargar historial: ${response.status}`)
-    }
-
-    const data = await response.json()
-
-    historialTerapias = data.historial || []
+    historialTerapias = await obtenerTodasLasPaginas(
+      `${API_URL}/historial-terapias/${cedula}`,
+      (data) => data.historial || [],
+    )
     console.log("Historial de terapias:", historialTerapias)
 
     mostrarHistorialTerapias()
@@ -580,17 +630,21 @@ async function cargarInfoPaciente() {
 
     console.log("Información del paciente cargada:", data)
 
-    // Llenar los campos del formulario
-    document.getElementById("inputNombrePaciente").value = data.nombre || "N/A"
-    document.getElementById("inputDocumentoPaciente").value = cedula
-    document.getElementById("inputCorreoPaciente").value = data.correo || "N/A"
-    document.getElementById("inputTelefonoPaciente").value = data.telefono || "N/A"
+    llenarInfoPaciente(data, cedula)
   } catch (error) {
     console.error("Error al cargar información del paciente:", error)
     alert("Error al cargar tu información. Por favor, inicia sesión nuevamente.")
   }
 }
 
+function llenarInfoPaciente(data, cedula) {
+  // Llenar los campos del formulario
+  document.getElementById("inputNombrePaciente").value = data.nombre || "N/A"
+  document.getElementById("inputDocumentoPaciente").value = cedula
+  document.getElementById("inputCorreoPaciente").value = data.correo || "N/A"
+  document.getElementById("inputTelefonoPaciente").value = data.telefono || "N/A"
+}
+
 function initCambiarContrasena() {
   const btnChangePassword = document.getElementById("btnChangePasswordPaciente")
   const changePasswordModal = document.getElementById("changePasswordModalPaciente")
@@ -1048,27 +1102,31 @@ async function cargarEjerciciosAsignadosDesdeAPI() {
 
     console.log("Ejercicios asignados recibidos:", ejerciciosAsignadosAPI)
 
-    ejerciciosAsignados.length = 0
-    ejerciciosAsignados.push(
-      ...ejerciciosAsignadosAPI.map((ej) => ({
-        id_terapia: ej.id_terapia,
-        id_ejercicio: ej.id_ejercicio,
-        nombre: ej.nombre,
-        extremidad: ej.extremidad,
-        descripcion: ej.descripcion,
-        repeticiones: ej.repeticiones,
-        urlVideo: ej.url_video,
-        imagen: ej.url_video || "/placeholder.svg?height=200&width=300",
-      })),
-    )
-
-    cargarTodosEjercicios()
+    llenarEjerciciosAsignados(ejerciciosAsignadosAPI)
   } catch (error) {
     console.error("Error al cargar ejercicios asignados:", error)
     mostrarMensajeErrorAsignados("Error al cargar los ejercicios asignados")
   }
 }
 
+function llenarEjerciciosAsignados(ejerciciosAsignadosAPI) {
+  ejerciciosAsignados.length = 0
+  ejerciciosAsignados.push(
+    ...ejerciciosAsignadosAPI.map((ej) => ({
+      id_terapia: ej.id_terapia,
+      id_ejercicio: ej.id_ejercicio,
+      nombre: ej.nombre,
+      extremidad: ej.extremidad,
+      descripcion: ej.descripcion,
+      repeticiones: ej.repeticiones,
+      urlVideo: ej.url_video,
+      imagen: ej.url_video || "/placeholder.svg?height=200&width=300",
+    })),
+  )
+
+  cargarTodosEjercicios()
+}
+
 // ==========================================
 // EJERCICIOS REALIZADOS - FILTRADO
 // ==========================================
@@ -1190,36 +1248,34 @@ async function cargarEjerciciosRealizadosDesdeAPI() {
       return
     }
 
-    const response = await fetch(`${API_URL}/ejercicios-completados/${cedula}`)
-
-    if (!response.ok) {
-      throw new Error(`Error al cargar ejercicios: ${response.status}`)
-    }
-
-    const ejerciciosCompletados = await response.json()
-
-    ejerciciosRealizados.length = 0
-    ejerciciosRealizados.push(
-      ...ejerciciosCompletados.map((ej) => ({
-        id: ej.id_ejercicio,
-        nombre: ej.nombre,
-        extremidad: ej.extremidad,
-        descripcion: ej.descripcion,
-        repeticiones: ej.repeticiones,
-        fechaRealizacion: ej.fecha_realizacion,
-        completado: true,
-        urlVideo: ej.url_video,
-        observaciones: ej.observaciones,
-      })),
-    )
+    const ejerciciosCompletados = await obtenerTodasLasPaginas(`${API_URL}/ejercicios-completados/${cedula}`)
 
-    cargarEjerciciosRealizados()
+    llenarEjerciciosRealizados(ejerciciosCompletados)
   } catch (error) {
     console.error("Error al cargar ejercicios completados:", error)
     mostrarMensajeError("Error al cargar los ejercicios completados")
   }
 }
 
+function llenarEjerciciosRealizados(ejerciciosCompletados) {
+  ejerciciosRealizados.length = 0
+  ejerciciosRealizados.push(
+    ...ejerciciosCompletados.map((ej) => ({
+      id: ej.id_ejercicio,
+      nombre: ej.nombre,
+      extremidad: ej.extremidad,
+      descripcion: ej.descripcion,
+      repeticiones: ej.repeticiones,
+      fechaRealizacion: ej.fecha_realizacion,
+      completado: true,
+      urlVideo: ej.url_video,
+      observaciones: ej.observaciones,
+    })),
+  )
+
+  cargarEjerciciosRealizados()
+}
+
 // ==========================================
 // MARCAR COMO REALIZADO
 // ==========================================
@@ -90,12 +90,15 @@ document.addEventListener("DOMContentLoaded", async () => {
         if (el) el.innerText = text ?? "";
     }
 
-    // 4) Cargar info real del paciente
+    // 4) Cargar paciente, progreso por grupo y calificaciones en una sola solicitud
+    let detalle;
     try {
-        const urlPaciente = `${PACIENTE_API}/${encodeURIComponent(cedula)}?fisio_id=${encodeURIComponent(fisioId)}`;
-        console.log("DEBUG - urlPaciente:", urlPaciente);
+        const urlDetalle = `${PACIENTE_API}/detalle/${encodeURIComponent(cedula)}?limite=1000`;
+        console.log("DEBUG - urlDetalle:", urlDetalle);
 
-        const res = await fetch(urlPaciente);
+        const res = await fetch(urlDetalle, {
+            headers: { "Authorization": `Bearer ${localStorage.getItem("token")}` }
+        });
         if (!res.ok) {
             // intentar leer body para mensaje de error
             let body = "";
@@ -105,7 +108,20 @@ document.addEventListener("DOMContentLoaded", async () => {
             return;
         }
 
-        const paciente = await res.json();
+        detalle = await res.json();
+
+        // Las calificaciones vienen paginadas (mismo cursor que /calificaciones):
+        // se piden las páginas restantes hasta que no llegue X-Siguiente-Cursor.
+        let cursor = res.headers.get("X-Siguiente-Cursor");
+        while (cursor) {
+            const resPagina = await fetch(
+                `${PACIENTE_API}/calificaciones/${encodeURIComponent(cedula)}?limite=1000&cursor=${encodeURIComponent(cursor)}`
+            );
+            if (!resPagina.ok) throw new Error(`Error al cargar calificaciones: ${resPagina.status}`);
+            detalle.calificaciones.push(...(await resPagina.json()));
+            cursor = resPagina.headers.get("X-Siguiente-Cursor");
+        }
+        const paciente = detalle.paciente;
         console.log("DEBUG - paciente:", paciente);
 
         setTextIfExists("pacienteNombre", paciente.nombre || "—");
@@ -122,20 +138,9 @@ document.addEventListener("DOMContentLoaded", async () => {
         return;
     }
 
-    // 5) Cargar ejercicios por grupo (con fisio_id)
+    // 5) Progreso por grupo
     try {
-        const urlProgreso = `${PACIENTE_API}/ejercicios-por-grupo/${encodeURIComponent(cedula)}?fisio_id=${encodeURIComponent(fisioId)}`;
-        console.log("DEBUG - urlProgreso:", urlProgreso);
-
-        const res2 = await fetch(urlProgreso);
-        if (!res2.ok) {
-            const txt = await res2.text().catch(() => "");
-            console.error("Error al obtener progreso por grupo:", res2.status, txt);
-            showPageError("No fue posible obtener el progreso del paciente.");
-            return;
-        }
-
-        const data = await res2.json();
+        const data = detalle.grupos;
 
         const tabla = document.getElementById("tablaProgreso");
         if (tabla) {
@@ -194,28 +199,6 @@ document.addEventListener("DOMContentLoaded", async () => {
         return;
     }
 
-    async function cargarCalificaciones() {
-    try {
-        const url = `${PACIENTE_API}/calificaciones/${encodeURIComponent(cedula)}`;
-
-        console.log("DEBUG calificaciones URL:", url);
-
-        const res = await fetch(url);
-
-        if (!res.ok) {
-            console.error("Error al obtener calificaciones", res.status);
-            return;
-        }
-
-        const datos = await res.json();
-        console.log("DEBUG calificaciones:", datos);
-
-        mostrarCalificaciones(datos);
-
-    } catch (error) {
-        console.error("Error cargando calificaciones:", error);
-    }
-}
 function mostrarCalificaciones(lista) {
     const tbody = document.getElementById("tablaCalificaciones");
     if (!tbody) return;
@@ -247,6 +230,8 @@ function mostrarCalificaciones(lista) {
     });
 }
 
-cargarCalificaciones();
+// 6) Calificaciones
+console.log("DEBUG calificaciones:", detalle.calificaciones);
+mostrarCalificaciones(detalle.calificaciones);
 
 });